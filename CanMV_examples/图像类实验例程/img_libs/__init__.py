@@ -0,0 +1,10 @@
+#####################################################################################################
+# @file         __init__.py
+# @author       正点原子团队(ALIENTEK)
+# @version      V1.0
+# @date         2026-10-19
+# @brief        图像类实验例程公共模块
+#   @note       供图像类各例程共用的识别服务和工具，需将img_libs文件夹复制到"/sdcard/CanMV_examples/图像类实验例程"下，
+#               使用前需将该目录加入sys.path
+# @license      Copyright (c) 2020-2032, 广州市星翼电子科技有限公司
+#####################################################################################################
@@ -0,0 +1,161 @@
+#####################################################################################################
+# @file         code_scanner.py
+# @author       正点原子团队(ALIENTEK)
+# @version      V1.0
+# @date         2026-10-19
+# @brief        二维码、条形码、AprilTag码、DM码共用的识别服务
+#   @note       画面没有变化时直接使用上次的结果，画面变化时先在上次码的位置附近识别，找不到时再全图识别，识别结果按位置缓存。
+#               帧差在按MOTION_STEP缩小的灰度小图上计算；有多种识别函数时共用一次整图灰度转换，只有一种时直接在原图上识别。
+#               每隔REPORT_FRAMES帧打印跳过、局部识别、全图识别的次数和每帧耗时，naive = True时为原来的每帧全图识别，用于对比
+# @license      Copyright (c) 2020-2032, 广州市星翼电子科技有限公司
+#####################################################################################################
+
+import time
+import ulab.numpy as np
+
+MOTION_STEP = 8         # 帧差在按MOTION_STEP缩小的灰度图上计算
+MOTION_THRESHOLD = 4    # 小图的平均灰度差低于该值时认为画面没有变化，不重新识别
+ROI_MARGIN = 24         # 先在上次码的位置四周外扩ROI_MARGIN像素的区域内识别
+FULL_SCAN_INTERVAL = 30 # 至少每隔FULL_SCAN_INTERVAL帧全图识别一次，发现新出现的码
+CACHE_FRAMES = 10       # 缓存的码连续CACHE_FRAMES次识别都没有找到时删除
+REPORT_FRAMES = 100     # 每隔REPORT_FRAMES帧打印一次统计
+
+# 两个矩形(x, y, w, h)是否重叠
+def overlap(a, b):
+    return a[0] < b[0] + b[2] and b[0] < a[0] + a[2] and a[1] < b[1] + b[3] and b[1] < a[1] + a[3]
+
+# 缓存的码：码类型、内容和位置，obj为最近一次识别到的码对象
+class CachedCode:
+    def __init__(self, kind, payload, rect, obj, frame):
+        self.kind = kind
+        self.payload = payload
+        self.rect = rect
+        self.obj = obj
+        self.frame = frame      # 最近一次识别到的帧号
+        self.missed = 0         # 连续没有识别到的次数
+
+# 码识别服务：取样帧差显示画面没有变化时直接返回缓存的结果；
+# 画面变化时先在缓存的码的位置附近识别，有码没找到或到了全图识别间隔时再全图识别
+class CodeScanner:
+    # decoders为[(码类型名称, 识别函数fn(img, roi), 内容函数fn(码对象))]，roi为None时全图识别
+    def __init__(self, decoders, width, height, naive=False):
+        self.decoders = decoders
+        self.width = width
+        self.height = height
+        self.naive = naive
+        self.prev = None        # 最近一次识别时的帧差小图
+        self.cache = []
+        self.since_full = FULL_SCAN_INTERVAL
+        self.frame_index = 0    # 帧号
+        self.frames = 0         # 以下为统计，每次打印后清零
+        self.skipped = 0        # 画面没有变化，跳过识别的帧数
+        self.roi_scans = 0      # 局部识别的次数
+        self.full_scans = 0     # 全图识别的次数
+        self.decoded = 0        # 重新识别到的码的个数
+        self.results = 0        # 返回的码的个数(包括缓存的结果)
+        self.scan_us = 0        # 识别(包括灰度转换和帧差)的累计耗时
+        self.start_ms = time.ticks_ms()
+
+    # 用码类型为kind的识别函数识别，kind为None时使用全部识别函数，返回[(码类型名称, 码对象)]
+    def decode(self, img, kind=None, roi=None):
+        codes = []
+        for name, find, describe in self.decoders:
+            if kind is None or kind == name:
+                codes += [(name, obj) for obj in find(img, roi)]
+        return codes
+
+    def expand(self, rect):
+        x0 = max(0, rect[0] - ROI_MARGIN)
+        y0 = max(0, rect[1] - ROI_MARGIN)
+        x1 = min(self.width, rect[0] + rect[2] + ROI_MARGIN)
+        y1 = min(self.height, rect[1] + rect[3] + ROI_MARGIN)
+        return (x0, y0, x1 - x0, y1 - y0)
+
+    def describe(self, kind, obj):
+        for name, find, describe in self.decoders:
+            if name == kind:
+                return describe(obj)
+
+    # codes中是否已有与rect重叠的同类码
+    def contains(self, codes, kind, rect):
+        for name, obj in codes:
+            if name == kind and overlap(obj.rect(), rect):
+                return True
+        return False
+
+    # 按位置更新缓存：与新识别到的同类码位置重叠的缓存项更新为新结果，否则新增。
+    # 相邻的码会同时出现在彼此的ROI中，同一个码多次识别到时只保留第一次，避免缓存中出现重复项
+    def update_cache(self, codes):
+        unique = []
+        for kind, obj in codes:
+            if not self.contains(unique, kind, obj.rect()):
+                unique.append((kind, obj))
+        for entry in self.cache:
+            entry.missed += 1
+        for kind, obj in unique:
+            rect = obj.rect()
+            payload = self.describe(kind, obj)
+            for entry in self.cache:
+                if entry.kind == kind and entry.frame != self.frame_index and overlap(rect, entry.rect):
+                    entry.payload, entry.rect, entry.obj, entry.frame, entry.missed = payload, rect, obj, self.frame_index, 0
+                    break
+            else:
+                self.cache.append(CachedCode(kind, payload, rect, obj, self.frame_index))
+        self.cache = [entry for entry in self.cache if entry.missed < CACHE_FRAMES]
+        self.decoded += len(unique)
+
+    # 识别一帧，返回当前画面中的码(CachedCode列表)，本帧重新识别到的码frame等于scanner.frame_index
+    def scan(self, img):
+        start = time.ticks_us()
+        self.frame_index += 1
+        self.frames += 1
+        if self.naive:
+            self.cache = []
+            self.update_cache(self.decode(img))
+            self.full_scans += 1
+        else:
+            # 帧差只需要很少的点，在缩小后的灰度图上计算
+            small = img.copy(x_scale=1 / MOTION_STEP, y_scale=1 / MOTION_STEP).to_grayscale()
+            sample = np.array(small.to_numpy_ref(), dtype=np.int16)
+            del small
+            self.since_full += 1
+            if self.prev is not None and self.since_full < FULL_SCAN_INTERVAL \
+                    and np.mean(np.abs(sample - self.prev)) < MOTION_THRESHOLD:
+                self.skipped += 1
+            else:
+                self.prev = sample
+                # 多种码的识别共用一次灰度转换，只有一种码时直接在原图上识别
+                gray = img.to_grayscale(copy=True) if len(self.decoders) > 1 else img
+                codes = []
+                found_all = len(self.cache) > 0 and self.since_full < FULL_SCAN_INTERVAL
+                if found_all:
+                    for entry in self.cache:
+                        # 已在相邻码的ROI中识别到的码不再重复识别
+                        if self.contains(codes, entry.kind, entry.rect):
+                            continue
+                        found = self.decode(gray, entry.kind, self.expand(entry.rect))
+                        self.roi_scans += 1
+                        if not found:
+                            found_all = False
+                            break
+                        codes += found
+                if not found_all:
+                    codes = self.decode(gray)
+                    self.full_scans += 1
+                    self.since_full = 0
+                self.update_cache(codes)
+                del gray
+        self.scan_us += time.ticks_diff(time.ticks_us(), start)
+        codes = [entry for entry in self.cache if entry.missed == 0]
+        self.results += len(codes)
+        if self.frames == REPORT_FRAMES:
+            self.report()
+        return codes
+
+    def report(self):
+        elapsed = time.ticks_diff(time.ticks_ms(), self.start_ms)
+        print("%s: %d frames, skipped %d, roi scans %d, full scans %d, cpu %.2fms/frame, %d decoded, %.1f results/s" % (
+            "naive" if self.naive else "scanner", self.frames, self.skipped, self.roi_scans, self.full_scans,
+            self.scan_us / self.frames / 1000, self.decoded, self.results * 1000 / max(elapsed, 1)))
+        self.frames, self.skipped, self.roi_scans, self.full_scans, self.decoded, self.results, self.scan_us = 0, 0, 0, 0, 0, 0, 0
+        self.start_ms = time.ticks_ms()
@@ -0,0 +1,91 @@
+#####################################################################################################
+# @file         pyramid.py
+# @author       正点原子团队(ALIENTEK)
+# @version      V1.0
+# @date         2026-10-19
+# @brief        图像金字塔多尺度检测
+#   @note       第0层为原图，第k层为第k-1层缩小一半。先在最小一层检测出候选，再逐层在每个候选附近的小窗口内重新检测确认，
+#               窗口内没有确认的候选被丢弃，每层确认后合并收敛到同一目标的结果，返回的结果均为原图坐标；levels = 1时只在原图上检测。
+#               BENCH_FRAMES大于0时依次对configs中的每种配置运行BENCH_FRAMES帧，打印构建金字塔和检测的每帧耗时
+# @license      Copyright (c) 2020-2032, 广州市星翼电子科技有限公司
+#####################################################################################################
+
+import time
+
+REFINE_MARGIN = 8       # 重新检测的窗口在候选四周外扩的像素(所在层的坐标)
+BENCH_FRAMES = 0        # 大于0时依次对各种配置运行BENCH_FRAMES帧并打印耗时
+PYRAMID_CONFIGS = [(1, False), (2, False), (2, True), (3, False), (3, True)] # (层数, 是否重新检测)
+
+# 求窗口(x0, y0)-(x1, y1)与图像的交集，返回roi
+def window(img, x0, y0, x1, y1):
+    x0, y0 = max(0, int(x0)), max(0, int(y0))
+    x1, y1 = min(img.width(), int(x1)), min(img.height(), int(y1))
+    return (x0, y0, max(x1 - x0, 1), max(y1 - y0, 1))
+
+# coarse(img, scale)返回候选列表，refine(img, scale, candidate)返回确认后的结果或None，scale为该层相对原图的缩小倍数；
+# same(a, b)判断两个结果是否为同一目标，为None时不合并
+class PyramidDetector:
+    def __init__(self, coarse, refine=None, same=None, levels=2, use_refine=True, configs=PYRAMID_CONFIGS):
+        self.coarse = coarse
+        self.refine = refine
+        self.same = same
+        self.configs = configs
+        self.config = 0
+        if BENCH_FRAMES:
+            levels, use_refine = configs[0]
+        self.set_config(levels, use_refine)
+
+    def set_config(self, levels, use_refine):
+        self.levels = levels
+        self.use_refine = use_refine and self.refine is not None
+        self.frames = 0
+        self.found = 0          # 检测到的结果总数
+        self.merged = 0         # 重新检测后合并掉的重复结果总数
+        self.build_us = 0       # 构建金字塔的累计耗时
+        self.detect_us = 0      # 检测的累计耗时
+
+    # 不同候选在下一层可能收敛到同一目标，只保留其中第一个
+    def merge(self, results):
+        if self.same is None:
+            return results
+        kept = []
+        for result in results:
+            for other in kept:
+                if self.same(result, other):
+                    self.merged += 1
+                    break
+            else:
+                kept.append(result)
+        return kept
+
+    def detect(self, img):
+        start = time.ticks_us()
+        images = [img]
+        for k in range(1, self.levels):
+            images.append(images[-1].copy(x_scale=0.5, y_scale=0.5))
+        built = time.ticks_us()
+        level = self.levels - 1
+        results = self.coarse(images[level], 1 << level)
+        if self.use_refine:
+            for level in range(self.levels - 2, -1, -1):
+                refined = []
+                for candidate in results:
+                    result = self.refine(images[level], 1 << level, candidate)
+                    if result is not None:
+                        refined.append(result)
+                results = self.merge(refined)
+        del images
+        self.build_us += time.ticks_diff(built, start)
+        self.detect_us += time.ticks_diff(time.ticks_us(), built)
+        self.frames += 1
+        self.found += len(results)
+        if BENCH_FRAMES and self.frames == BENCH_FRAMES:
+            self.report()
+            self.config = (self.config + 1) % len(self.configs)
+            self.set_config(*self.configs[self.config])
+        return results
+
+    def report(self):
+        print("levels %d, %s: build %.2fms + detect %.2fms per frame, %.1f results per frame, %d merged" % (
+            self.levels, "refine" if self.use_refine else "coarse only", self.build_us / self.frames / 1000,
+            self.detect_us / self.frames / 1000, self.found / self.frames, self.merged))
@@ -1,9 +1,14 @@
 #####################################################################################################
 # @file         main.py
 # @author       正点原子团队(ALIENTEK)
-# @version      V1.0
-# @date         2024-09-12
+# @version      V1.1
+# @date         2026-10-19
 # @brief        色块追踪实验
+#   @note       学习阈值时把每帧中心框的LAB直方图累加起来，学习结束时按累加后的直方图求1%和99%分位数，
+#               每帧的权重相同(原来的//2平均越晚的帧权重越大)。
+#               锁定色块后只在上一帧色块附近的窗口中寻找，窗口按色块的运动速度预测移动并外扩，窗口内找不到时再全图寻找。
+#               设置RECORD_PATH后在追踪时录制一段原始画面；设置REPLAY_PATH后不打开摄像头，
+#               对录制的画面分别运行每帧全图寻找和窗口追踪，打印两者的追踪帧率、丢失次数和重新锁定耗时
 # @license      Copyright (c) 2020-2032, 广州市星翼电子科技有限公司
 #####################################################################################################
 # @attention
@@ -16,23 +21,182 @@
 #
 #####################################################################################################
 
-import time, os, sys
+import time, os, sys, gc
+import image
+import ulab.numpy as np
 from media.sensor import *  # 导入sensor模块，使用摄像头相关接口
 from media.display import * # 导入display模块，使用display相关接口
 from media.media import *   # 导入media模块，使用meida相关接口
 from machine import Pin
 from machine import FPIOA
 
-# 实例化FPIOA
-fpioa = FPIOA()
+FRAME_WIDTH = 640
+FRAME_HEIGHT = 480
+LEARN_LOW = 0.01        # 阈值下限取1%分位数
+LEARN_HIGH = 0.99       # 阈值上限取99%分位数
+SEARCH_MARGIN = 32      # 搜索窗口在上一帧色块基础上四周外扩的像素
+RECORD_PATH = None      # 例如"/sdcard/blob_clip.raw"，追踪时录制原始RGB565画面(每帧600KB)
+RECORD_FRAMES = 150     # 录制的帧数
+REPLAY_PATH = None      # 例如"/sdcard/blob_clip.raw"，回放录制的画面并对比两种寻找方法
 
-# 为IO分配相应的硬件功能
-fpioa.set_function(34, FPIOA.GPIO34)
+# L, A, B通道的取值范围
+LAB_RANGES = ((0, 100), (-128, 127), (-128, 127))
 
-# 构造GPIO对象
-key0 = Pin(34, Pin.IN, pull=Pin.PULL_UP, drive=7)
+# 阈值学习：累加每帧的LAB直方图，按累加结果求分位数
+class ThresholdLearner:
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.bins = [None, None, None]
+        self.frames = 0
+
+    def add(self, hist):
+        for i, bins in enumerate((hist.l_bins(), hist.a_bins(), hist.b_bins())):
+            bins = np.array(bins)
+            self.bins[i] = bins if self.bins[i] is None else self.bins[i] + bins
+        self.frames += 1
+
+    # 求通道channel的q分位数，与histogram.get_percentile()的计算方法相同
+    def percentile(self, channel, q):
+        bins = self.bins[channel]
+        count = len(bins)
+        target = q * self.frames # 每帧的直方图已归一化，累加后总和为帧数
+        acc = 0.
+        for i in range(count):
+            acc += bins[i]
+            if acc >= target:
+                break
+        low, high = LAB_RANGES[channel]
+        return (i * (high - low)) // (count - 1) + low
+
+    # 返回[L下限, L上限, A下限, A上限, B下限, B上限]
+    def threshold(self):
+        return [self.percentile(c, q) for c in range(3) for q in (LEARN_LOW, LEARN_HIGH)]
+
+# 色块追踪：锁定后只在预测窗口中寻找，找不到时全图寻找，统计窗口命中率和丢失后重新锁定的耗时
+class BlobTracker:
+    def __init__(self, width, height, windowed=True):
+        self.width = width
+        self.height = height
+        self.windowed = windowed
+        self.reset()
+
+    def reset(self):
+        self.rect = None        # 上一帧色块(x, y, w, h)，未锁定时为None
+        self.center = None
+        self.velocity = (0, 0)  # 色块中心每帧移动的像素
+        self.lost_at = None     # 丢失时的时间(ms)
+        self.recoveries = []    # 每次丢失到重新锁定的耗时(ms)
+        self.window_hits = 0    # 在窗口中找到的帧数
+        self.full_searches = 0  # 全图寻找的帧数
+        self.search_us = 0      # 寻找色块的累计耗时
+        self.frames = 0
+
+    # 预测窗口：上一帧色块按速度平移，再按SEARCH_MARGIN和速度外扩
+    def window(self):
+        x, y, w, h = self.rect
+        vx, vy = self.velocity
+        mx = SEARCH_MARGIN + abs(vx)
+        my = SEARCH_MARGIN + abs(vy)
+        x0 = max(0, x + vx - mx)
+        y0 = max(0, y + vy - my)
+        x1 = min(self.width, x + w + vx + mx)
+        y1 = min(self.height, y + h + vy + my)
+        if x1 <= x0 or y1 <= y0:
+            return None
+        return (x0, y0, x1 - x0, y1 - y0)
+
+    # 在roi中寻找最大的色块
+    def search(self, img, threshold, roi=None):
+        if roi is None:
+            blobs = img.find_blobs([threshold], pixels_threshold=100, area_threshold=100, merge=True, margin=10)
+        else:
+            blobs = img.find_blobs([threshold], roi=roi, pixels_threshold=100, area_threshold=100, merge=True, margin=10)
+        return max(blobs, key=lambda b: b.pixels()) if blobs else None
+
+    # 追踪一帧，now_ms为该帧的时间，返回(色块, 使用的搜索窗口)，未找到时色块为None，全图寻找时窗口为None
+    def update(self, img, threshold, now_ms):
+        start = time.ticks_us()
+        blob, roi = None, None
+        if self.windowed and self.rect is not None:
+            roi = self.window()
+            if roi is not None:
+                blob = self.search(img, threshold, roi)
+            if blob is not None:
+                self.window_hits += 1
+        if blob is None:
+            roi = None
+            blob = self.search(img, threshold)
+            self.full_searches += 1
+        self.search_us += time.ticks_diff(time.ticks_us(), start)
+        self.frames += 1
+
+        if blob is None:
+            if self.rect is not None:
+                self.lost_at = now_ms
+            self.rect, self.center, self.velocity = None, None, (0, 0)
+            return None, roi
+        center = (blob.cx(), blob.cy())
+        if self.center is not None:
+            self.velocity = (center[0] - self.center[0], center[1] - self.center[1])
+        self.rect, self.center = blob.rect(), center
+        if self.lost_at is not None:
+            self.recoveries.append(time.ticks_diff(now_ms, self.lost_at))
+            self.lost_at = None
+        return blob, roi
+
+    def report(self, name):
+        fps = self.frames * 1000000 / self.search_us if self.search_us else 0
+        recoveries = sorted(self.recoveries)
+        if recoveries:
+            recovery = "mean %dms, max %dms" % (sum(recoveries) // len(recoveries), recoveries[-1])
+        else:
+            recovery = "-"
+        print("%s: %d frames, search %.2fms/frame (%.1f fps), window hits %d, full searches %d, lost %d, recovery %s" % (
+            name, self.frames, self.search_us / max(self.frames, 1) / 1000, fps, self.window_hits, self.full_searches,
+            len(recoveries), recovery))
+
+def draw_blob(img, blob, roi):
+    if roi is not None:
+        img.draw_rectangle(roi, color=(255, 255, 0))
+    if blob is not None:
+        img.draw_rectangle([v for v in blob.rect()])
+        img.draw_cross(blob.cx(), blob.cy())
+
+# 回放录制的画面，分别用每帧全图寻找和窗口追踪处理同一段画面
+def replay(path):
+    with open(path + ".txt", "r") as f:
+        threshold = [int(v) for v in f.readline().split()]
+        stamps = [int(v) for v in f.read().split()]
+    print("replay %s, %d frames, threshold %s" % (path, len(stamps), threshold))
+    buf = np.zeros(FRAME_WIDTH * FRAME_HEIGHT * 2, dtype=np.uint8)
+    img = image.Image(FRAME_WIDTH, FRAME_HEIGHT, image.RGB565, alloc=image.ALLOC_REF, data=buf)
+    for name, windowed in (("full frame", False), ("windowed", True)):
+        tracker = BlobTracker(FRAME_WIDTH, FRAME_HEIGHT, windowed)
+        with open(path, "rb") as f:
+            for stamp in stamps:
+                os.exitpoint()
+                if f.readinto(buf) != len(buf):
+                    break
+                blob, roi = tracker.update(img, threshold, stamp)
+                draw_blob(img, blob, roi)
+                Display.show_image(img)
+        tracker.report(name)
+        gc.collect()
+
+# 实时追踪：按KEY0学习中心框颜色的阈值，之后追踪该颜色的色块
+def track_live():
+    global sensor
+    # 实例化FPIOA
+    fpioa = FPIOA()
+
+    # 为IO分配相应的硬件功能
+    fpioa.set_function(34, FPIOA.GPIO34)
+
+    # 构造GPIO对象
+    key0 = Pin(34, Pin.IN, pull=Pin.PULL_UP, drive=7)
 
-try:
     sensor = Sensor(width=1280, height=960) # 构建摄像头对象
     sensor.reset() # 复位和初始化摄像头
     sensor.set_framesize(Sensor.VGA)    # 设置帧大小VGA(640x480)，默认通道0
@@ -49,6 +213,9 @@ try:
     threshold = [50, 50, 0, 0, 0, 0] # 中间的 L, A, B 值.
     # 捕捉图像中心的颜色阈值。
     r = [(640//2) - (50//2), (480//2) - (50//2), 50, 50] # 50x50 center of QVGA.
+    learner = ThresholdLearner()
+    tracker = BlobTracker(FRAME_WIDTH, FRAME_HEIGHT)
+    record, stamps = None, None
 
     while True:
         os.exitpoint() # 检测IDE中断
@@ -58,30 +225,27 @@ try:
         if key0.value() == 0:
             frame_count = 0
             threshold_flag = 1
-        if frame_count < 60 & threshold_flag == 1:
+        if frame_count < 60 and threshold_flag == 1:
             if frame_count == 0:
                 print("Letting auto algorithms run. Don't put anything in front of the camera!")
                 print("Auto algorithms done. Hold the object you want to track in front of the camera in the box.")
                 print("MAKE SURE THE COLOR OF THE OBJECT YOU WANT TO TRACK IS FULLY ENCLOSED BY THE BOX!")
+                learner.reset()
             img.draw_rectangle([v for v in r])
             frame_count = frame_count + 1
-        elif (frame_count < 120) & threshold_flag == 1:
+        elif frame_count < 120 and threshold_flag == 1:
             if frame_count == 60:
                 print("Learning thresholds...")
-            elif frame_count == 119:
-                print("Thresholds learned...")
+            hist = img.get_histogram(roi=r)
+            learner.add(hist)
+            threshold = learner.threshold()
+            if frame_count == 119:
+                print("Thresholds learned...", threshold)
                 print("Tracking colors...")
                 threshold_flag = 0 # 解除标记
-            hist = img.get_histogram(roi=r)
-            lo = hist.get_percentile(0.01) # Get the CDF of the histogram at the 1% range (ADJUST AS NECESSARY)!
-            hi = hist.get_percentile(0.99) # Get the CDF of the histogram at the 99% range (ADJUST AS NECESSARY)!
-            # 取平均值
-            threshold[0] = (threshold[0] + lo.l_value()) // 2
-            threshold[1] = (threshold[1] + hi.l_value()) // 2
-            threshold[2] = (threshold[2] + lo.a_value()) // 2
-            threshold[3] = (threshold[3] + hi.a_value()) // 2
-            threshold[4] = (threshold[4] + lo.b_value()) // 2
-            threshold[5] = (threshold[5] + hi.b_value()) // 2
+                tracker.reset()
+                if RECORD_PATH:
+                    record, stamps = open(RECORD_PATH, "wb"), []
             for blob in img.find_blobs([threshold], pixels_threshold=100, area_threshold=100, merge=True, margin=10):
                 img.draw_rectangle([v for v in blob.rect()])
                 img.draw_cross(blob.cx(), blob.cy())
@@ -89,13 +253,34 @@ try:
             frame_count = frame_count + 1
             del hist
         else:
-            for blob in img.find_blobs([threshold], pixels_threshold=100, area_threshold=100, merge=True, margin=10):
-                img.draw_rectangle([v for v in blob.rect()])
-                img.draw_cross(blob.cx(), blob.cy())
+            now = time.ticks_ms()
+            if record is not None:
+                record.write(img.bytearray())
+                stamps.append(now)
+                if len(stamps) >= RECORD_FRAMES:
+                    record.close()
+                    record = None
+                    with open(RECORD_PATH + ".txt", "w") as f:
+                        f.write(" ".join([str(v) for v in threshold]) + "\n")
+                        f.write("\n".join([str(v) for v in stamps]) + "\n")
+                    print("record %d frames to %s" % (len(stamps), RECORD_PATH))
+            blob, roi = tracker.update(img, threshold, now)
+            draw_blob(img, blob, roi)
+            if tracker.frames % 100 == 0:
+                tracker.report("tracking")
         # 显示图片
         Display.show_image(img)
         print(clock.fps()) # 打印FPS
 
+sensor = None
+try:
+    if REPLAY_PATH:
+        Display.init(Display.ST7701, width=640, height=480, fps=90, to_ide=True)
+        MediaManager.init()
+        replay(REPLAY_PATH)
+    else:
+        track_live()
+
 # IDE中断释放资源代码
 except KeyboardInterrupt as e:
     print("user stop: ", e)
@@ -0,0 +1,159 @@
+#####################################################################################################
+# @file         bench_line_track.py
+# @author       正点原子团队(ALIENTEK)
+# @version      V1.0
+# @date         2026-10-19
+# @brief        黑线循迹列投影方法的测试和耗时对比(PC端运行，需要numpy)
+#   @note       直接从同目录的main.py中取出LineTracker类和相关参数运行，测试的是板端实际使用的代码：
+#               1. 逐像素循环计算的参考结果与列投影结果一致
+#               2. 窗口搜索与每帧全宽搜索的结果一致，并统计窗口搜索占比和需要全宽重新搜索的次数
+#               3. 窗口搜索、全宽搜索每帧的耗时
+#               输入为main.py设置RECORD_PATH后录制的原始灰度帧文件，不指定时生成一段弯曲黑线的模拟画面
+#               用法: python bench_line_track.py [track_record.raw] [--width 640 --height 480] [--frames 300] [--repeat 3]
+# @license      Copyright (c) 2020-2032, 广州市星翼电子科技有限公司
+#####################################################################################################
+
+import argparse
+import ast
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+MAIN_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+
+# 取出main.py中的大写参数和LineTracker类，在PC上用numpy执行
+def load_tracker():
+    with open(MAIN_PATH, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    body = []
+    for node in tree.body:
+        if isinstance(node, ast.ClassDef) and node.name == "LineTracker":
+            body.append(node)
+        elif isinstance(node, ast.Assign) and all(isinstance(t, ast.Name) and t.id.isupper() for t in node.targets):
+            body.append(node)
+    namespace = {"np": np, "math": math}
+    exec(compile(ast.Module(body=body, type_ignores=[]), MAIN_PATH, "exec"), namespace)
+    return namespace
+
+def load_record(path, width, height):
+    data = np.fromfile(path, dtype=np.uint8)
+    count = len(data) // (width * height)
+    return data[:count * width * height].reshape((count, height, width))
+
+# 模拟画面：灰色地面上一条缓慢摆动的弯曲黑线，加噪声，部分帧加一块黑色干扰区域
+def synthetic_frames(count, width, height, seed=0):
+    rng = np.random.default_rng(seed)
+    ys = np.arange(height)[:, None]
+    xs = np.arange(width)[None, :]
+    frames = np.empty((count, height, width), dtype=np.uint8)
+    for k in range(count):
+        phase = k * 0.05
+        center = width / 2 + width * 0.3 * math.sin(phase) + (height - ys) * 0.4 * math.sin(phase * 0.7)
+        frame = 150 + rng.normal(0, 12, (height, width))
+        frame[np.abs(xs - center) < 12] = 30
+        if k % 50 > 40:
+            frame[10:60, 20:120] = 20
+        frames[k] = np.clip(frame, 0, 255)
+    return frames
+
+# 逐像素循环的参考实现，按ROW_STEP取行，返回条带[x0, x1)内黑色像素的中心
+def reference_center(frame, roi, ns):
+    low, high = ns["GRAYSCALE_THRESHOLD"][0]
+    x, y, w, h, _ = roi
+    total, moment = 0, 0
+    for row in range(y, y + h, ns["ROW_STEP"]):
+        line = frame[row].tolist()
+        for col in range(x, x + w):
+            if low <= line[col] <= high:
+                total += 1
+                moment += col
+    return moment / total if total else None
+
+def make_tracker(ns, width, height, windowed):
+    tracker = ns["LineTracker"](ns["ROIS"], ns["GRAYSCALE_THRESHOLD"][0], width, height)
+    if not windowed:
+        tracker.last = _NoMemory(len(ns["ROIS"]))
+    return tracker
+
+# 不记住上一帧位置的列表，让LineTracker每帧都做全宽搜索
+class _NoMemory(list):
+    def __init__(self, n):
+        super().__init__([None] * n)
+
+    def __setitem__(self, i, value):
+        pass
+
+def check_reference(ns, frames, count):
+    tracker = make_tracker(ns, frames.shape[2], frames.shape[1], False)
+    max_err = 0.
+    for frame in frames[:count]:
+        for i, roi in enumerate(ns["ROIS"]):
+            x, y, w, h, _ = roi
+            cx, confidence, _ = tracker.scan(frame, x, x + w, y, h)
+            ref = reference_center(frame, roi, ns)
+            if cx is not None and ref is not None:
+                max_err = max(max_err, abs(cx - ref))
+    print("reference: {} frames, max center diff {:.2e} px".format(count, max_err))
+    return max_err < 1e-6
+
+def check_window(ns, frames):
+    width, height = frames.shape[2], frames.shape[1]
+    windowed = make_tracker(ns, width, height, True)
+    full = make_tracker(ns, width, height, False)
+    max_err, found, lost = 0., 0, 0
+    for frame in frames:
+        _, _, results_w = windowed.track(frame)
+        _, _, results_f = full.track(frame)
+        for rw, rf in zip(results_w, results_f):
+            if rw[0] is not None and rf[0] is not None:
+                max_err = max(max_err, abs(rw[0] - rf[0]))
+                found += 1
+            elif rf[0] is not None:
+                lost += 1
+    strips = len(frames) * len(ns["ROIS"])
+    rescans = windowed.window_scans + windowed.full_scans - strips
+    # 窗口外的干扰区域不参与统计，两者的中心可能略有不同
+    print("window vs full: {} strips found, {} lost by window, max center diff {:.2f} px".format(found, lost, max_err))
+    print("window search: {}/{} strips searched in the window, {} full-width rescans".format(windowed.window_scans, strips, rescans))
+    return lost == 0
+
+def bench(ns, frames, repeat):
+    width, height = frames.shape[2], frames.shape[1]
+    for name, windowed in (("full width", False), ("windowed", True)):
+        best = None
+        for _ in range(repeat):
+            tracker = make_tracker(ns, width, height, windowed)
+            t0 = time.perf_counter()
+            for frame in frames:
+                tracker.track(frame)
+            t = (time.perf_counter() - t0) / len(frames)
+            best = t if best is None else min(best, t)
+        print("{:>10}: {:.3f}ms/frame".format(name, best * 1e3))
+
+def main():
+    parser = argparse.ArgumentParser(description="check the column-projection line tracker from main.py and time it on recorded or synthetic footage")
+    parser.add_argument("record", nargs="?", help="raw grayscale frames recorded by main.py (RECORD_PATH)")
+    parser.add_argument("--width", type=int, default=640, help="frame width of the recording")
+    parser.add_argument("--height", type=int, default=480, help="frame height of the recording")
+    parser.add_argument("--frames", type=int, default=300, help="number of synthetic frames when no recording is given")
+    parser.add_argument("--reference-frames", type=int, default=5, help="frames checked against the per-pixel reference")
+    parser.add_argument("--repeat", type=int, default=3, help="timing runs, the best one is reported")
+    args = parser.parse_args()
+
+    ns = load_tracker()
+    if args.record:
+        frames = load_record(args.record, args.width, args.height)
+    else:
+        frames = synthetic_frames(args.frames, args.width, args.height)
+    print("{} frames {}x{}".format(len(frames), frames.shape[2], frames.shape[1]))
+    ok = check_reference(ns, frames, args.reference_frames)
+    ok = check_window(ns, frames) and ok
+    bench(ns, frames, args.repeat)
+    if not ok:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
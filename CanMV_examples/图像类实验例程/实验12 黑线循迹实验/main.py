@@ -1,9 +1,14 @@
 #####################################################################################################
 # @file         main.py
 # @author       正点原子团队(ALIENTEK)
-# @version      V1.0
-# @date         2024-09-12
+# @version      V1.1
+# @date         2026-10-19
 # @brief        黑色灰度循线 实验
+#   @note       每个roi条带只做一次灰度阈值比较，按列统计黑色像素数(列投影)，由列投影直接求出黑线中心和置信度，
+#               不再对每个条带调用find_blobs再挑选最大色块。每个条带记住上一帧的黑线位置，下一帧只在其附近的窗口中搜索，
+#               窗口内丢失或黑线碰到窗口边缘时再做全宽搜索。
+#               USE_FIND_BLOBS = True时使用原来的find_blobs方法，便于在板端对比两种方法的耗时；
+#               设置RECORD_PATH后录制原始灰度帧，可在PC上用bench_line_track.py测试和对比
 # @license      Copyright (c) 2020-2032, 广州市星翼电子科技有限公司
 #####################################################################################################
 # @attention
@@ -17,6 +22,7 @@
 #####################################################################################################
 
 import time, math, os, gc
+import ulab.numpy as np
 from media.sensor import *  # 导入sensor模块，使用摄像头相关接口
 from media.display import * # 导入display模块，使用display相关接口
 from media.media import *   # 导入media模块，使用meida相关接口
@@ -24,8 +30,8 @@ from media.media import *   # 导入media模块，使用meida相关接口
 # 跟踪一条黑线。使用[(128,255)]来跟踪白线。
 GRAYSCALE_THRESHOLD = [(0, 64)]
 
-# 下面是roi【区域】元组列表。每个roi用(x, y, w, h)表示的矩形。线检测算法将尝试在每个roi中找到最大blob的质心。
-# 然后，质心的x位置将使用不同的权重进行平均，其中最大的权重分配给图像底部附近的roi，而较少的权重分配给下一个roi，以此类推。
+# 下面是roi【区域】元组列表。每个roi用(x, y, w, h)表示的矩形。线检测算法将尝试在每个roi中找到黑线的中心。
+# 然后，中心的x位置将使用不同的权重进行平均，其中最大的权重分配给图像底部附近的roi，而较少的权重分配给下一个roi，以此类推。
 # 采样图像QQVGA 160*120
 #ROIS = [ # [ROI, weight]
 #        (0, 100, 160, 20, 0.7), # 可以根据机器人的实际情况调整权重值。
@@ -47,9 +53,104 @@ ROIS = [ # [ROI, weight]
         (0,   0, 640, 80, 0.1)
        ]
 
-# 计算权重值（weight）的和 (结果不一定为1).
-weight_sum = 0
-for r in ROIS: weight_sum += r[4] # r[4] 是矩形权重值.
+ROW_STEP = 2            # 条带内每隔ROW_STEP行取一行统计，条带取样行数需小于256
+SEARCH_HALF_WIDTH = 96  # 跟踪时在上一帧黑线位置左右各SEARCH_HALF_WIDTH像素内搜索
+MIN_LINE_WIDTH = 4      # 平均每行黑色像素少于该值时认为条带内没有黑线
+MIN_CONFIDENCE = 0.3    # 置信度低于该值时不使用该条带的结果，并在下一帧做全宽搜索
+USE_FIND_BLOBS = False  # True: 使用原来的find_blobs方法
+RECORD_PATH = None      # 例如"/sdcard/track_record.raw"，录制原始灰度帧供PC端测试
+RECORD_FRAMES = 300     # 录制的帧数
+
+# 列投影循线：每个条带阈值化一次，按列求和得到列投影，
+# 黑线中心为列投影的加权平均，列投影的标准差与黑线宽度相符时置信度高，有多条黑线、大片黑色区域或噪声时置信度低
+class LineTracker:
+    def __init__(self, rois, threshold, width, height):
+        self.rois = rois
+        self.low, self.high = threshold
+        self.center_x = width / 2
+        self.half_height = height / 2
+        self.xs = np.arange(0, width) * 1.0     # 列坐标，求中心用
+        self.xs2 = self.xs * self.xs            # 列坐标的平方，求标准差用
+        self.last = [None] * len(rois)          # 每个条带上一帧的黑线位置
+        self.full_scans = 0                     # 全宽搜索的次数
+        self.window_scans = 0                   # 窗口搜索的次数
+
+    # 统计条带[x0, x1)范围内的黑线，返回(中心x, 置信度, 列投影是否碰到左右边缘)，没有黑线时中心为None
+    def scan(self, frame, x0, x1, y, h):
+        strip = frame[y:y + h:ROW_STEP, x0:x1]
+        if self.low <= 0:
+            mask = strip <= self.high
+        elif self.high >= 255:
+            mask = strip >= self.low
+        else:
+            mask = (strip >= self.low) * (strip <= self.high)
+        cols = np.sum(mask, axis=0) * 1.0
+        count = np.sum(cols)
+        rows = (h + ROW_STEP - 1) // ROW_STEP
+        line_width = count / rows
+        if line_width < MIN_LINE_WIDTH:
+            return None, 0., False
+        cx = np.sum(cols * self.xs[x0:x1]) / count
+        std = math.sqrt(max(np.sum(cols * self.xs2[x0:x1]) / count - cx * cx, 0.))
+        # 宽度为w的竖直黑线，列投影的标准差约为w/sqrt(12)
+        confidence = min(1., (line_width / 3.464 + 1) / (std + 1))
+        return cx, confidence, cols[0] > 0 or cols[-1] > 0
+
+    # 跟踪第i个条带，返回(中心x, 偏离角度, 置信度, 搜索窗口x0, 搜索窗口x1)
+    def track_strip(self, frame, i):
+        x, y, w, h, weight = self.rois[i]
+        last = self.last[i]
+        x0, x1 = x, x + w
+        if last is not None:
+            x0 = max(x, int(last) - SEARCH_HALF_WIDTH)
+            x1 = min(x + w, int(last) + SEARCH_HALF_WIDTH)
+        cx, confidence, at_edge = self.scan(frame, x0, x1, y, h)
+        if x1 - x0 < w:
+            self.window_scans += 1
+            # 窗口内丢失或黑线伸出窗口，全宽重新搜索
+            if confidence < MIN_CONFIDENCE or at_edge:
+                x0, x1 = x, x + w
+                cx, confidence, at_edge = self.scan(frame, x0, x1, y, h)
+                self.full_scans += 1
+        else:
+            self.full_scans += 1
+        if confidence < MIN_CONFIDENCE:
+            self.last[i] = None
+            return None, 0., confidence, x0, x1
+        self.last[i] = cx
+        return cx, self.deflection(cx), confidence, x0, x1
+
+    # 将中心位置转换为偏离角度(度)，黑线在图像左半部分为正，右半部分为负
+    def deflection(self, cx):
+        return math.degrees(-math.atan((cx - self.center_x) / self.half_height))
+
+    # 跟踪所有条带，返回(加权中心x, 偏离角度, 各条带结果)，所有条带都没有黑线时中心和角度为None
+    def track(self, frame):
+        results = [self.track_strip(frame, i) for i in range(len(self.rois))]
+        centroid_sum, weight_sum = 0., 0.
+        for r, result in zip(self.rois, results):
+            if result[0] is not None:
+                centroid_sum += result[0] * r[4] # r[4] 是矩形的权重值.
+                weight_sum += r[4]
+        if weight_sum == 0:
+            return None, None, results
+        center_pos = centroid_sum / weight_sum # 确定直线的中心。
+        return center_pos, self.deflection(center_pos), results
+
+# 原来的方法：每个条带寻找最大的黑色色块
+def find_blobs_track(img):
+    centroid_sum, weight_sum = 0, 0
+    for r in ROIS:
+        blobs = img.find_blobs(GRAYSCALE_THRESHOLD, roi=r[0:4], merge=True) # r[0:4] 是上面定义的roi元组.
+        if blobs:
+            largest_blob = max(blobs, key=lambda b: b.pixels())
+            img.draw_rectangle([v for v in largest_blob.rect()])
+            img.draw_cross(largest_blob.cx(), largest_blob.cy())
+            centroid_sum += largest_blob.cx() * r[4]
+            weight_sum += r[4]
+    if weight_sum == 0:
+        return None
+    return math.degrees(-math.atan((centroid_sum / weight_sum - 320) / 240))
 
 try:
     sensor = Sensor(width=1280, height=960) # 构建摄像头对象
@@ -63,50 +164,56 @@ try:
     sensor.run() # 启动sensor
     clock = time.clock() # 构造clock对象
 
+    tracker = LineTracker(ROIS, GRAYSCALE_THRESHOLD[0], 640, 480)
+    record = open(RECORD_PATH, "wb") if RECORD_PATH else None
+    recorded = 0
+    track_us, frames = 0, 0
+
     while True:
         os.exitpoint() # 检测IDE中断
         clock.tick()   # 记录开始时间（ms）
         img = sensor.snapshot() # 从通道0捕获一张图
 
-        centroid_sum = 0
-        for r in ROIS:
-            # 在灰度图中寻找黑线
-            blobs = img.find_blobs(GRAYSCALE_THRESHOLD, roi=r[0:4], merge=True) # r[0:4] 是上面定义的roi元组.
-
-            if blobs:
-                # 寻找矩形中最多像素的区域.
-                largest_blob = max(blobs, key=lambda b: b.pixels())
-
-                # 对该区域进行标记.
-                img.draw_rectangle([v for v in largest_blob.rect()])
-                img.draw_cross(largest_blob.cx(), largest_blob.cy())
-                centroid_sum += largest_blob.cx() * r[4] # r[4] 是矩形的权重值.
-
-        center_pos = (centroid_sum / weight_sum) # 确定直线的中心。
-
-        # 将直线中心位置转换成角度.
-        # 我们用的是非线性运算所以我们离线越远响应就越强.
-        deflection_angle = 0
+        if record is not None:
+            record.write(img.bytearray())
+            recorded += 1
+            if recorded >= RECORD_FRAMES:
+                record.close()
+                record = None
+                print("record %d frames to %s" % (recorded, RECORD_PATH))
 
         # 使用反正切函数计算直线中心偏离角度.
         # 角度输出到-45到45左右.（权重X坐标落在图像左半部分记作正偏，落在右边部分记为负偏）
-
-#        deflection_angle = -math.atan((center_pos - 80) / 60) # 采用图像为QQVGA 160*120时候使用
-#        deflection_angle = -math.atan((center_pos - 160) / 120) # 采用图像为QVGA 320*240时候使用
-        deflection_angle = -math.atan((center_pos - 320) / 240) # 采用图像为VGA 640*480时候使用
-
-        # 将角度x从弧度转换为度数。
-        deflection_angle = math.degrees(deflection_angle)
+        start = time.ticks_us()
+        if USE_FIND_BLOBS:
+            deflection_angle = find_blobs_track(img)
+        else:
+            center_pos, deflection_angle, results = tracker.track(img.to_numpy_ref())
+        track_us += time.ticks_diff(time.ticks_us(), start)
+        frames += 1
+
+        if not USE_FIND_BLOBS:
+            # 标记每个条带的搜索窗口、黑线中心和置信度
+            for r, (cx, angle, confidence, x0, x1) in zip(ROIS, results):
+                img.draw_rectangle(x0, r[1], x1 - x0, r[3], color=128)
+                if cx is not None:
+                    img.draw_cross(int(cx), r[1] + r[3] // 2, color=255, size=10, thickness=2)
+                img.draw_string_advanced(x0 + 4, r[1] + 4, 20, '%.2f' % confidence, color=(255,255,255))
 
         # 可以将偏离角度发送给机器人进行处理
 #        print("Turn Angle: %f" % deflection_angle)
 
         # LCD显示偏移角度
-        img.draw_string_advanced(0, 0, 24, str('%.1f' % deflection_angle), color=(255,255,255), thickness=4)
+        if deflection_angle is not None:
+            img.draw_string_advanced(0, 0, 24, str('%.1f' % deflection_angle), color=(255,255,255), thickness=4)
 
         # 显示图片
         Display.show_image(img)
-        print(clock.fps()) # 打印FPS
+        if frames == 100:
+            # 打印FPS和每帧循线的平均耗时
+            print("fps %.1f, track %.2fms/frame (%s)" % (clock.fps(), track_us / frames / 1000, "find_blobs" if USE_FIND_BLOBS else "column projection"))
+            track_us, frames = 0, 0
+            gc.collect()
 
 # IDE中断释放资源代码
 except KeyboardInterrupt as e:
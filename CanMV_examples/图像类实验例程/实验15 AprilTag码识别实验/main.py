@@ -1,9 +1,12 @@
 #####################################################################################################
 # @file         main.py
 # @author       正点原子团队(ALIENTEK)
-# @version      V1.0
-# @date         2024-09-12
+# @version      V1.1
+# @date         2026-10-19
 # @brief        AprilTag码实验
+#   @note       识别由img_libs/code_scanner.py中的CodeScanner完成：画面没有变化时直接使用上次的结果，画面变化时先在上次码的位置附近识别，
+#               找不到时再全图识别，识别结果按位置缓存；在DECODERS中添加识别函数即可同时识别多种码，多种码共用一次灰度转换。
+#               需将img_libs文件夹复制到"/sdcard/CanMV_examples/图像类实验例程"下；NAIVE = True时为原来的每帧全图识别，用于对比
 # @license      Copyright (c) 2020-2032, 广州市星翼电子科技有限公司
 #####################################################################################################
 # @attention
@@ -16,10 +19,12 @@
 #
 #####################################################################################################
 
-import time, math, os, gc
+import time, math, os, gc, sys
 from media.sensor import *  # 导入sensor模块，使用摄像头相关接口
 from media.display import * # 导入display模块，使用display相关接口
 from media.media import *   # 导入media模块，使用meida相关接口
+sys.path.append("/sdcard/CanMV_examples/图像类实验例程")  # 图像类例程公共模块所在目录
+from img_libs.code_scanner import CodeScanner
 
 # AprilTag代码支持多达6个标签族，可以同时处理。
 # 返回的标记对象将具有其标记族和标记族中的ID。
@@ -49,6 +54,16 @@ def family_name(tag):
     if(tag.family() == image.ARTOOLKIT):
         return "ARTOOLKIT"
 
+NAIVE = False           # True: 每帧全图识别(原来的方法)，用于对比耗时
+
+def find_apriltags(img, roi):
+    return img.find_apriltags(families=tag_families, roi=roi) if roi else img.find_apriltags(families=tag_families)
+
+# 要识别的码：(码类型名称, 识别函数, 内容函数)，AprilTag码的内容为标签家族和ID
+DECODERS = [
+    ("AprilTag", find_apriltags, lambda tag: "%s %d" % (family_name(tag), tag.id())),
+]
+
 try:
     sensor = Sensor(width=1280, height=960) # 构建摄像头对象
     sensor.reset() # 复位和初始化摄像头
@@ -60,18 +75,22 @@ try:
     MediaManager.init() # 初始化media资源管理器
     sensor.run() # 启动sensor
     clock = time.clock() # 构造clock对象
+    scanner = CodeScanner(DECODERS, sensor.width(), sensor.height(), NAIVE)
 
     while True:
         os.exitpoint() # 检测IDE中断
         clock.tick()   # 记录开始时间（ms）
         img = sensor.snapshot() # 从通道0捕获一张图
 
-        for tag in img.find_apriltags(families=tag_families):
-            img.draw_rectangle([v for v in tag.rect()], color=(255, 0, 0), thickness=4)
-            img.draw_cross(tag.cx(), tag.cy(), color=(0, 255, 0), thickness=2)
-            #打印AprilTag码信息
-            print_args = (family_name(tag), tag.id(), (180 * tag.rotation()) / math.pi)
-            print("Tag Family %s, Tag ID %d, rotation %f (degrees)" % print_args)
+        for code in scanner.scan(img):
+            rect = code.rect
+            img.draw_rectangle([v for v in rect], color=(255, 0, 0), thickness=4)
+            img.draw_cross(rect[0] + rect[2] // 2, rect[1] + rect[3] // 2, color=(0, 255, 0), thickness=2)
+            #打印本帧重新识别到的AprilTag码信息
+            if code.frame == scanner.frame_index:
+                tag = code.obj
+                print_args = (family_name(tag), tag.id(), (180 * tag.rotation()) / math.pi)
+                print("Tag Family %s, Tag ID %d, rotation %f (degrees)" % print_args)
 
         # 显示图片
         Display.show_image(img, x=round((640-sensor.width())/2), y=round((480-sensor.height())/2))
@@ -1,9 +1,12 @@
 #####################################################################################################
 # @file         main.py
 # @author       正点原子团队(ALIENTEK)
-# @version      V1.0
-# @date         2024-09-12
+# @version      V1.1
+# @date         2026-10-19
 # @brief        DM码识别实验
+#   @note       识别由img_libs/code_scanner.py中的CodeScanner完成：画面没有变化时直接使用上次的结果，画面变化时先在上次码的位置附近识别，
+#               找不到时再全图识别，识别结果按位置缓存；在DECODERS中添加识别函数即可同时识别多种码，多种码共用一次灰度转换。
+#               需将img_libs文件夹复制到"/sdcard/CanMV_examples/图像类实验例程"下；NAIVE = True时为原来的每帧全图识别，用于对比
 # @license      Copyright (c) 2020-2032, 广州市星翼电子科技有限公司
 #####################################################################################################
 # @attention
@@ -16,10 +19,23 @@
 #
 #####################################################################################################
 
-import time, math, os, gc
+import time, math, os, gc, sys
 from media.sensor import *  # 导入sensor模块，使用摄像头相关接口
 from media.display import * # 导入display模块，使用display相关接口
 from media.media import *   # 导入media模块，使用meida相关接口
+sys.path.append("/sdcard/CanMV_examples/图像类实验例程")  # 图像类例程公共模块所在目录
+from img_libs.code_scanner import CodeScanner
+
+NAIVE = False           # True: 每帧全图识别(原来的方法)，用于对比耗时
+
+def find_datamatrices(img, roi):
+    return img.find_datamatrices(roi=roi) if roi else img.find_datamatrices()
+
+# 要识别的码：(码类型名称, 识别函数, 内容函数)
+DECODERS = [
+    ("DM", find_datamatrices, lambda matrix: matrix.payload()),
+#    ("QR", lambda img, roi: img.find_qrcodes(roi=roi) if roi else img.find_qrcodes(), lambda code: code.payload()), # 同时识别二维码
+]
 
 try:
     sensor = Sensor(width=1280, height=960) # 构建摄像头对象
@@ -32,6 +48,7 @@ try:
     MediaManager.init() # 初始化media资源管理器
     sensor.run() # 启动sensor
     clock = time.clock() # 构造clock对象
+    scanner = CodeScanner(DECODERS, 640, 480, NAIVE)
 
     while True:
         os.exitpoint() # 检测IDE中断
@@ -39,12 +56,14 @@ try:
         img = sensor.snapshot() # 从通道0捕获一张图
 
         # 遍历图像中的二维码
-        for matrix in img.find_datamatrices():
+        for code in scanner.scan(img):
             # 绘制识别到的 Data Matrix 码的矩形框
-            img.draw_rectangle([v for v in matrix.rect()], color=(255, 0, 0))
-            img.draw_string_advanced(0, 0, 30, matrix.payload(), color=(255, 255, 255)) # 图像显示DM码信息
-            print_args = (matrix.rows(), matrix.columns(), matrix.payload(), (180 * matrix.rotation()) / math.pi, clock.fps())
-            print("矩阵 [%d:%d], 内容 \"%s\", 旋转 %f (度), FPS %f" % print_args)
+            img.draw_rectangle([v for v in code.rect], color=(255, 0, 0))
+            img.draw_string_advanced(0, 0, 30, code.payload, color=(255, 255, 255)) # 图像显示DM码信息
+            if code.frame == scanner.frame_index: # 本帧重新识别到的码
+                matrix = code.obj
+                print_args = (matrix.rows(), matrix.columns(), matrix.payload(), (180 * matrix.rotation()) / math.pi, clock.fps())
+                print("矩阵 [%d:%d], 内容 \"%s\", 旋转 %f (度), FPS %f" % print_args)
 
         # 显示图片
         Display.show_image(img)
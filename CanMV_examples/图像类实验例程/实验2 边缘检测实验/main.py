@@ -1,9 +1,11 @@
 #####################################################################################################
 # @file         main.py
 # @author       正点原子团队(ALIENTEK)
-# @version      V1.0
-# @date         2024-09-12
+# @version      V1.1
+# @date         2026-10-19
 # @brief        边缘检测实验
+#   @note       边缘检测可用img_libs/pyramid.py中的PyramidDetector在缩小的一层上进行，再放大画回原图(边缘会变粗)；
+#               边缘检测的结果是整幅图像，没有候选窗口，只比较各层数，默认与原来一样在原图上检测
 # @license      Copyright (c) 2020-2032, 广州市星翼电子科技有限公司
 #####################################################################################################
 # @attention
@@ -20,6 +22,13 @@ import time, os, sys
 from media.sensor import *  # 导入sensor模块，使用摄像头相关接口
 from media.display import * # 导入display模块，使用display相关接口
 from media.media import *   # 导入media模块，使用meida相关接口
+sys.path.append("/sdcard/CanMV_examples/图像类实验例程")  # 图像类例程公共模块所在目录
+from img_libs.pyramid import PyramidDetector
+
+# 在scale倍缩小的层上做Canny边缘检测，结果为该层图像本身
+def find_edges_coarse(img, scale):
+    img.find_edges(image.EDGE_CANNY, threshold=(50, 80))
+    return [(img, scale)]
 
 try:
     sensor = Sensor(width=1280, height=960) # 构建摄像头对象
@@ -32,13 +41,16 @@ try:
     MediaManager.init() #初始化media资源管理器
     sensor.run() #启动sensor
     clock = time.clock() # 构造clock对象
+    detector = PyramidDetector(find_edges_coarse, levels=1, configs=[(1, False), (2, False), (3, False)])
 
     while True:
         os.exitpoint() # 检测IDE中断
         clock.tick()  # 记录开始时间（ms）
         img = sensor.snapshot() # 从通道0捕获一张图
         # 使用Canny边缘检测器
-        img.find_edges(image.EDGE_CANNY, threshold=(50, 80))
+        edges, scale = detector.detect(img)[0]
+        if scale > 1:
+            img.draw_image(edges, 0, 0, x_scale=scale, y_scale=scale) # 放大画回原图
         # 使用简单快速边缘检测
         #dect_img.find_edges(image.EDGE_SIMPLE, threshold=(100, 255))
         # 显示图片
@@ -1,9 +1,11 @@
 #####################################################################################################
 # @file         main.py
 # @author       正点原子团队(ALIENTEK)
-# @version      V1.0
-# @date         2024-09-12
+# @version      V1.1
+# @date         2026-10-19
 # @brief        直线检测实验
+#   @note       直线先用img_libs/pyramid.py中的PyramidDetector在缩小一半的图上检测，结果换算为原图坐标；
+#               直线通常贯穿整幅图像，重新检测的窗口接近原图，因此默认只用缩小层的结果
 # @license      Copyright (c) 2020-2032, 广州市星翼电子科技有限公司
 #####################################################################################################
 # @attention
@@ -20,10 +22,40 @@ import time, os, sys
 from media.sensor import *  # 导入sensor模块，使用摄像头相关接口
 from media.display import * # 导入display模块，使用display相关接口
 from media.media import *   # 导入media模块，使用meida相关接口
+sys.path.append("/sdcard/CanMV_examples/图像类实验例程")  # 图像类例程公共模块所在目录
+from img_libs.pyramid import PyramidDetector, window, REFINE_MARGIN
 
 min_degree = 0
 max_degree = 179
 
+LINE_THRESHOLD = 1000
+
+# 直线结果：原图坐标的(x1, y1, x2, y2, theta, rho, magnitude)
+def line_result(l, scale):
+    return (l.x1() * scale, l.y1() * scale, l.x2() * scale, l.y2() * scale, l.theta(), l.rho() * scale, l.magnitude())
+
+# 角度和rho都在find_lines的合并范围内的两条直线视为同一条
+def same_line(a, b):
+    dtheta = abs(a[4] - b[4])
+    return min(dtheta, 180 - dtheta) <= 25 and abs(a[5] - b[5]) <= 25
+
+# 在scale倍缩小的层上检测直线，阈值和rho合并范围按比例缩小
+def find_lines_coarse(img, scale):
+    lines = img.find_lines(threshold=LINE_THRESHOLD // scale, theta_margin=25, rho_margin=max(25 // scale, 1))
+    return [line_result(l, scale) for l in lines]
+
+# 在候选直线的外接窗口内重新检测，返回角度与候选最接近的直线
+def find_lines_refine(img, scale, candidate):
+    x1, y1, x2, y2 = [v // scale for v in candidate[0:4]]
+    roi = window(img, min(x1, x2) - REFINE_MARGIN, min(y1, y2) - REFINE_MARGIN,
+                 max(x1, x2) + REFINE_MARGIN + 1, max(y1, y2) + REFINE_MARGIN + 1)
+    lines = img.find_lines(roi=roi, threshold=LINE_THRESHOLD // scale, theta_margin=25, rho_margin=max(25 // scale, 1))
+    if not lines:
+        return None
+    theta = candidate[4]
+    l = min(lines, key=lambda l: min(abs(l.theta() - theta), 180 - abs(l.theta() - theta)))
+    return line_result(l, scale)
+
 try:
     sensor = Sensor(width=640, height=480) # 构建摄像头对象
     sensor.reset() # 复位和初始化摄像头
@@ -35,15 +67,16 @@ try:
     MediaManager.init() # 初始化media资源管理器
     sensor.run() # 启动sensor
     clock = time.clock() # 构造clock对象
+    detector = PyramidDetector(find_lines_coarse, find_lines_refine, same_line, use_refine=False)
 
     while True:
         os.exitpoint() # 检测IDE中断
         clock.tick()   # 记录开始时间（ms）
         img = sensor.snapshot() # 从通道0捕获一张图
-        for l in img.find_lines(threshold=1000, theta_margin=25, rho_margin=25):
-            if (min_degree <= l.theta()) and (l.theta() <= max_degree):
-                img.draw_line([v for v in l.line()], color=(255, 0, 0))
-                print(l)
+        for l in detector.detect(img):
+            if (min_degree <= l[4]) and (l[4] <= max_degree):
+                img.draw_line([v for v in l[0:4]], color=(255, 0, 0))
+                print("line x1 %d, y1 %d, x2 %d, y2 %d, theta %d, rho %d, magnitude %d" % l)
         Display.show_image(img)
         print(clock.fps()) # 打印FPS
 
@@ -1,9 +1,11 @@
 #####################################################################################################
 # @file         main.py
 # @author       正点原子团队(ALIENTEK)
-# @version      V1.0
-# @date         2024-09-12
+# @version      V1.1
+# @date         2026-10-19
 # @brief        线段检测实验
+#   @note       线段先用img_libs/pyramid.py中的PyramidDetector在缩小一半的图上检测，再在每个候选附近的小窗口内于原图确认，
+#               多个候选确认为同一条线段时只保留一条
 # @license      Copyright (c) 2020-2032, 广州市星翼电子科技有限公司
 #####################################################################################################
 # @attention
@@ -20,6 +22,35 @@ import time, os, sys
 from media.sensor import *  # 导入sensor模块，使用摄像头相关接口
 from media.display import * # 导入display模块，使用display相关接口
 from media.media import *   # 导入media模块，使用meida相关接口
+sys.path.append("/sdcard/CanMV_examples/图像类实验例程")  # 图像类例程公共模块所在目录
+from img_libs.pyramid import PyramidDetector, window, REFINE_MARGIN
+
+# 线段结果：原图坐标的(x1, y1, x2, y2, theta, length)
+def segment_result(l, scale):
+    return (l.x1() * scale, l.y1() * scale, l.x2() * scale, l.y2() * scale, l.theta(), l.length() * scale)
+
+# 角度相近且中点距离在REFINE_MARGIN以内的两条线段视为同一条
+def same_segment(a, b):
+    dtheta = abs(a[4] - b[4])
+    return min(dtheta, 180 - dtheta) <= 15 and abs(a[0] + a[2] - b[0] - b[2]) <= 2 * REFINE_MARGIN \
+        and abs(a[1] + a[3] - b[1] - b[3]) <= 2 * REFINE_MARGIN
+
+# 在scale倍缩小的层上检测线段
+def find_segments_coarse(img, scale):
+    return [segment_result(l, scale) for l in img.find_line_segments(merge_distance=max(2 // scale, 1), max_theta_diff=15)]
+
+# 在候选线段的外接窗口内重新检测，返回角度和中点与候选最接近的线段
+def find_segments_refine(img, scale, candidate):
+    x1, y1, x2, y2 = [v // scale for v in candidate[0:4]]
+    roi = window(img, min(x1, x2) - REFINE_MARGIN, min(y1, y2) - REFINE_MARGIN,
+                 max(x1, x2) + REFINE_MARGIN + 1, max(y1, y2) + REFINE_MARGIN + 1)
+    segments = img.find_line_segments(roi=roi, merge_distance=max(2 // scale, 1), max_theta_diff=15)
+    if not segments:
+        return None
+    theta, cx, cy = candidate[4], (x1 + x2) / 2, (y1 + y2) / 2
+    l = min(segments, key=lambda l: min(abs(l.theta() - theta), 180 - abs(l.theta() - theta)) * 4
+            + abs((l.x1() + l.x2()) / 2 - cx) + abs((l.y1() + l.y2()) / 2 - cy))
+    return segment_result(l, scale)
 
 try:
     sensor = Sensor(width=1280, height=960) #构建摄像头对象
@@ -32,15 +63,16 @@ try:
     MediaManager.init() # 初始化media资源管理器
     sensor.run() # 启动sensor
     clock = time.clock() # 构造clock对象
+    detector = PyramidDetector(find_segments_coarse, find_segments_refine, same_segment)
 
     while True:
         os.exitpoint() # 检测IDE中断
         clock.tick()   # 记录开始时间（ms）
         img = sensor.snapshot() # 从通道0捕获一张图
 
-        for l in img.find_line_segments(merge_distance=2, max_theta_diff=15):
-            img.draw_line(l.line(), color=(255, 0, 0), thickness=2)
-            print(l)
+        for l in detector.detect(img):
+            img.draw_line(l[0:4], color=(255, 0, 0), thickness=2)
+            print("segment x1 %d, y1 %d, x2 %d, y2 %d, theta %d, length %d" % l)
 
         Display.show_image(img, x=round((640 - sensor.width()) / 2), y=round((480 - sensor.height()) / 2))
         print(clock.fps()) # 打印FPS
@@ -1,9 +1,11 @@
 #####################################################################################################
 # @file         main.py
 # @author       正点原子团队(ALIENTEK)
-# @version      V1.0
-# @date         2024-09-12
+# @version      V1.1
+# @date         2026-10-19
 # @brief        圆形检测实验
+#   @note       圆先用img_libs/pyramid.py中的PyramidDetector在缩小一半的图上检测，再在每个候选附近的小窗口内、
+#               候选半径附近于原图确认，多个候选收敛到同一个圆时只保留一个
 # @license      Copyright (c) 2020-2032, 广州市星翼电子科技有限公司
 #####################################################################################################
 # @attention
@@ -20,6 +22,32 @@ import time, os, sys
 from media.sensor import *  # 导入sensor模块，使用摄像头相关接口
 from media.display import * # 导入display模块，使用display相关接口
 from media.media import *   # 导入media模块，使用meida相关接口
+sys.path.append("/sdcard/CanMV_examples/图像类实验例程")  # 图像类例程公共模块所在目录
+from img_libs.pyramid import PyramidDetector, window, REFINE_MARGIN
+
+CIRCLE_THRESHOLD = 3500
+
+# 圆心和半径都在find_circles的合并范围内的两个圆视为同一个
+def same_circle(a, b):
+    return abs(a[0] - b[0]) <= 10 and abs(a[1] - b[1]) <= 10 and abs(a[2] - b[2]) <= 10
+
+# 在scale倍缩小的层上检测圆，阈值、合并范围和半径范围按比例缩小，返回原图坐标的(x, y, r, magnitude)
+def find_circles_coarse(img, scale):
+    circles = img.find_circles(threshold=CIRCLE_THRESHOLD // scale, x_margin=10 // scale, y_margin=10 // scale,
+                               r_margin=10 // scale, r_min=max(6 // scale, 2), r_max=120 // scale, r_step=2)
+    return [(c.x() * scale, c.y() * scale, c.r() * scale, c.magnitude()) for c in circles]
+
+# 在候选圆附近的窗口内、候选半径附近重新检测，返回与候选最接近的圆
+def find_circles_refine(img, scale, candidate):
+    x, y, r = candidate[0] // scale, candidate[1] // scale, candidate[2] // scale
+    size = r + REFINE_MARGIN
+    roi = window(img, x - size, y - size, x + size + 1, y + size + 1)
+    circles = img.find_circles(roi=roi, threshold=CIRCLE_THRESHOLD // scale, x_margin=10 // scale, y_margin=10 // scale,
+                               r_margin=10 // scale, r_min=max(r - REFINE_MARGIN, 2), r_max=r + REFINE_MARGIN, r_step=2)
+    if not circles:
+        return None
+    c = min(circles, key=lambda c: abs(c.x() - x) + abs(c.y() - y) + abs(c.r() - r))
+    return (c.x() * scale, c.y() * scale, c.r() * scale, c.magnitude())
 
 try:
     sensor = Sensor(width=1280, height=960) # 构建摄像头对象
@@ -32,16 +60,16 @@ try:
     MediaManager.init() # 初始化media资源管理器
     sensor.run() # 启动sensor
     clock = time.clock() # 构造clock对象
+    detector = PyramidDetector(find_circles_coarse, find_circles_refine, same_circle)
 
     while True:
         os.exitpoint() # 检测IDE中断
         clock.tick()   # 记录开始时间（ms）
         img = sensor.snapshot() # 从通道0捕获一张图
-        for c in img.find_circles(threshold=3500, x_margin=10, y_margin=10,
-                                  r_margin=10, r_min=6, r_max=120, r_step=2):
+        for c in detector.detect(img):
             # 画红色圆做指示
-            img.draw_circle(c.x(), c.y(), c.r(), color=(255, 0, 0), thickness=2)
-            print(c) # 打印圆形的信息
+            img.draw_circle(c[0], c[1], c[2], color=(255, 0, 0), thickness=2)
+            print("circle x %d, y %d, r %d, magnitude %d" % c) # 打印圆形的信息
         # 显示图片
         Display.show_image(img, x=round((640 - sensor.width()) / 2), y=round((480 - sensor.height()) / 2))
         print(clock.fps()) # 打印FPS
@@ -1,9 +1,11 @@
 #####################################################################################################
 # @file         main.py
 # @author       正点原子团队(ALIENTEK)
-# @version      V1.0
-# @date         2024-09-12
+# @version      V1.1
+# @date         2026-10-19
 # @brief        矩形检测实验
+#   @note       矩形先用img_libs/pyramid.py中的PyramidDetector在缩小一半的图上检测，再在每个候选附近的小窗口内于原图确认，
+#               多个候选收敛到同一个矩形时只保留一个
 # @license      Copyright (c) 2020-2032, 广州市星翼电子科技有限公司
 #####################################################################################################
 # @attention
@@ -20,6 +22,34 @@ import time, os, sys
 from media.sensor import *  # 导入sensor模块，使用摄像头相关接口
 from media.display import * # 导入display模块，使用display相关接口
 from media.media import *   # 导入media模块，使用meida相关接口
+sys.path.append("/sdcard/CanMV_examples/图像类实验例程")  # 图像类例程公共模块所在目录
+from img_libs.pyramid import PyramidDetector, window, REFINE_MARGIN
+
+RECT_THRESHOLD = 8000
+
+# 矩形结果：原图坐标的(x, y, w, h, 四个角点, magnitude)
+def rect_result(r, scale):
+    x, y, w, h = r.rect()
+    return (x * scale, y * scale, w * scale, h * scale, [(p[0] * scale, p[1] * scale) for p in r.corners()], r.magnitude())
+
+# 位置和大小相差都不超过REFINE_MARGIN的两个矩形视为同一个
+def same_rect(a, b):
+    return abs(a[0] - b[0]) <= REFINE_MARGIN and abs(a[1] - b[1]) <= REFINE_MARGIN \
+        and abs(a[2] - b[2]) <= REFINE_MARGIN and abs(a[3] - b[3]) <= REFINE_MARGIN
+
+# 在scale倍缩小的层上检测矩形，阈值按比例缩小
+def find_rects_coarse(img, scale):
+    return [rect_result(r, scale) for r in img.find_rects(threshold=RECT_THRESHOLD // scale)]
+
+# 在候选矩形附近的窗口内重新检测，返回位置和大小与候选最接近的矩形
+def find_rects_refine(img, scale, candidate):
+    x, y, w, h = [v // scale for v in candidate[0:4]]
+    roi = window(img, x - REFINE_MARGIN, y - REFINE_MARGIN, x + w + REFINE_MARGIN + 1, y + h + REFINE_MARGIN + 1)
+    rects = img.find_rects(roi=roi, threshold=RECT_THRESHOLD // scale)
+    if not rects:
+        return None
+    r = min(rects, key=lambda r: abs(r.x() - x) + abs(r.y() - y) + abs(r.w() - w) + abs(r.h() - h))
+    return rect_result(r, scale)
 
 try:
     sensor = Sensor(width=1280, height=960) # 构建摄像头对象
@@ -32,15 +62,16 @@ try:
     MediaManager.init() # 初始化media资源管理器
     sensor.run()        # 启动sensor
     clock = time.clock() # 构造clock对象
+    detector = PyramidDetector(find_rects_coarse, find_rects_refine, same_rect)
 
     while True:
         os.exitpoint() # 检测IDE中断
         clock.tick()   # 记录开始时间（ms）
         img = sensor.snapshot() # 从通道0捕获一张图
-        for r in img.find_rects(threshold=8000):
-            img.draw_rectangle([v for v in r.rect()], color=(255, 0, 0))
-            for p in r.corners(): img.draw_circle(p[0], p[1], 5, color=(0, 255, 0))
-            print(r)
+        for r in detector.detect(img):
+            img.draw_rectangle([v for v in r[0:4]], color=(255, 0, 0))
+            for p in r[4]: img.draw_circle(p[0], p[1], 5, color=(0, 255, 0))
+            print("rect x %d, y %d, w %d, h %d, magnitude %d" % (r[0], r[1], r[2], r[3], r[5]))
         # 显示图片
         Display.show_image(img, x=round((640 - sensor.width()) / 2), y=round((480 - sensor.height()) / 2))
         print(clock.fps()) # 打印FPS
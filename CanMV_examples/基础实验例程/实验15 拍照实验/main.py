@@ -1,10 +1,12 @@
 #####################################################################################################
 # @file         main.py
 # @author       正点原子团队(ALIENTEK)
-# @version      V1.0
-# @date         2024-09-12
+# @version      V1.1
+# @date         2026-10-19
 # @brief        拍照 实验
-#   @note       按下KEY0拍摄JPG格式的照片，按下KEY1拍摄BMP格式的照片
+#   @note       按下KEY0拍摄JPG格式的照片，按住KEY0连拍BURST_COUNT张JPG照片，按下KEY1拍摄BMP格式的照片
+#               拍照时只把图像拷贝到预分配的帧缓存中，由后台线程编码并保存，照片按IMG_0001、IMG_0002...顺序命名不再覆盖。
+#               帧缓存用完时等待后台线程保存完一张再继续拍摄(反压)，保存完成后打印连拍速度和编码+写入耗时的分位数
 # @license      Copyright (c) 2020-2032, 广州市星翼电子科技有限公司
 #####################################################################################################
 # @attention
@@ -18,6 +20,7 @@
 #####################################################################################################
 
 import time, os, sys
+import _thread
 from machine import Pin
 from machine import FPIOA
 from media.sensor import *  #导入sensor模块，使用摄像头相关接口
@@ -36,9 +39,133 @@ fpioa.set_function(35, FPIOA.GPIO35)
 key0 = Pin(34, Pin.IN, pull=Pin.PULL_UP, drive=7)
 key1 = Pin(35, Pin.IN, pull=Pin.PULL_UP, drive=7)
 
+PHOTO_DIR = "/data/PHOTO"
+PHOTO_WIDTH = 1280      # 通道1输出的照片大小
+PHOTO_HEIGHT = 960
+POOL_SIZE = 4           # 预分配的帧缓存数(每块1280x960 RGB565约2.4MB)，最多POOL_SIZE张照片同时等待保存
+BURST_COUNT = 8         # 按住KEY0连拍的张数
+BURST_HOLD_MS = 500     # KEY0按住超过该时间开始连拍
+DROP_WHEN_FULL = False  # 帧缓存用完时：False等待后台线程空出帧缓存，True丢弃这一张
+
+# 求已排序列表的q分位数
+def percentile(values, q):
+    return values[int(q * (len(values) - 1))] if values else 0
+
+# 拍照服务：拍照时把图像拷贝到空闲的帧缓存后放入保存队列立即返回，后台线程依次编码、保存，保存完后归还帧缓存
+class CaptureService:
+    def __init__(self, sensor, chn, width, height, pool_size=POOL_SIZE):
+        self.sensor = sensor
+        self.chn = chn
+        self.pool_size = pool_size
+        self.free = [image.Image(width, height, image.RGB565) for i in range(pool_size)]
+        self.queue = []         # 等待保存的照片[(帧缓存, 文件名, 拍摄时间)]
+        self.lock = _thread.allocate_lock()
+        self.index = self.next_index()
+        self.save_ms = []       # 每张照片编码+写入的耗时
+        self.latency_ms = []    # 每张照片从拍摄到保存完成的耗时
+        self.waits = 0          # 帧缓存用完需要等待的次数
+        self.dropped = 0        # 帧缓存用完丢弃的张数
+        self.running = True
+        self.worker_alive = True
+        _thread.start_new_thread(self._worker, ())
+
+    # 找出PHOTO_DIR中已有照片的最大序号，新照片从下一个序号开始
+    def next_index(self):
+        index = 0
+        for name in os.listdir(PHOTO_DIR):
+            if name.startswith("IMG_") and name[4:8].isdigit():
+                index = max(index, int(name[4:8]))
+        return index + 1
+
+    # 取一块空闲的帧缓存，没有空闲时等待，DROP_WHEN_FULL时返回None
+    def _acquire(self):
+        waited = False
+        while True:
+            with self.lock:
+                if self.free:
+                    return self.free.pop()
+            if DROP_WHEN_FULL:
+                self.dropped += 1
+                return None
+            if not waited:
+                self.waits += 1
+                waited = True
+            time.sleep_ms(1)
+
+    # 拍摄一张照片放入保存队列，返回文件名，照片被丢弃时返回None
+    def capture(self, ext="jpg"):
+        buf = self._acquire()
+        if buf is None:
+            return None
+        img = self.sensor.snapshot(chn=self.chn) # 从通道1捕获一张图
+        buf.draw_image(img, 0, 0) # 拷贝到帧缓存，sensor的帧随即可以复用
+        name = "%s/IMG_%04d.%s" % (PHOTO_DIR, self.index, ext)
+        self.index += 1
+        with self.lock:
+            self.queue.append((buf, name, time.ticks_us()))
+        return name
+
+    # 连拍count张，拍摄速度只受sensor帧率和帧缓存数限制
+    def burst(self, count, ext="jpg"):
+        start = time.ticks_ms()
+        shots = 0
+        for i in range(count):
+            os.exitpoint()
+            if self.capture(ext):
+                shots += 1
+        elapsed = time.ticks_diff(time.ticks_ms(), start)
+        print("burst: %d/%d shots in %dms, %.1f shots/s" % (shots, count, elapsed, shots * 1000 / max(elapsed, 1)))
+
+    # 还没有保存完成的照片数
+    def pending(self):
+        with self.lock:
+            return self.pool_size - len(self.free)
+
+    def _worker(self):
+        try:
+            while self.running or self.queue:
+                job = None
+                with self.lock:
+                    if self.queue:
+                        job = self.queue.pop(0)
+                if job is None:
+                    time.sleep_ms(2)
+                    continue
+                buf, name, shot_us = job
+                start = time.ticks_us()
+                try:
+                    buf.save(name) # 按扩展名编码为JPG或BMP并写入
+                    print("snapshot success: %s" % name) # 提示照片保存成功
+                except Exception as e:
+                    print("save %s failed: %s" % (name, e))
+                end = time.ticks_us()
+                self.save_ms.append(time.ticks_diff(end, start) / 1000)
+                self.latency_ms.append(time.ticks_diff(end, shot_us) / 1000)
+                with self.lock:
+                    self.free.append(buf)
+        finally:
+            self.worker_alive = False
+
+    # 打印上次统计以来保存照片的编码+写入耗时和拍摄到保存完成耗时的分位数
+    def report(self):
+        save_ms = sorted(self.save_ms)
+        latency_ms = sorted(self.latency_ms)
+        print("saved %d photos (waits %d, dropped %d): encode+write p50 %.1fms p90 %.1fms p99 %.1fms, shot->saved p50 %.1fms p90 %.1fms p99 %.1fms" % (
+            len(save_ms), self.waits, self.dropped, percentile(save_ms, 0.5), percentile(save_ms, 0.9), percentile(save_ms, 0.99),
+            percentile(latency_ms, 0.5), percentile(latency_ms, 0.9), percentile(latency_ms, 0.99)))
+        self.save_ms, self.latency_ms = [], []
+        self.waits, self.dropped = 0, 0
+
+    # 保存完队列中的照片后停止后台线程
+    def stop(self):
+        self.running = False
+        while self.worker_alive:
+            time.sleep_ms(10)
+
+service = None
 try:
     try:
-        os.mkdir("/data/PHOTO")
+        os.mkdir(PHOTO_DIR)
     except Exception:
         pass
     sensor = Sensor(width=1280, height=960) # 构建摄像头对象
@@ -60,20 +187,31 @@ try:
     MediaManager.init()  # 初始化media资源管理器
 
     sensor.run()  # 启动sensor
+    service = CaptureService(sensor, CAM_CHN_ID_1, PHOTO_WIDTH, PHOTO_HEIGHT)
+    reported = True
 
     while True:
         os.exitpoint() # 检测IDE中断
         # 读取按键状态，并做相应的按键解释
         if key0.value() == 0:
-            img = sensor.snapshot(chn=CAM_CHN_ID_1) # 从通道1捕获一张图
-            img.save("/data/PHOTO/photo.jpg")
-            print("snapshot success") # 提示照片保存成功
-            time.sleep_ms(50)
+            service.capture("jpg")
+            pressed = time.ticks_ms()
+            while key0.value() == 0 and time.ticks_diff(time.ticks_ms(), pressed) < BURST_HOLD_MS:
+                time.sleep_ms(10)
+            if key0.value() == 0:
+                service.burst(BURST_COUNT) # 按住KEY0连拍
+            while key0.value() == 0: # 等待按键松开
+                time.sleep_ms(10)
+            reported = False
         if key1.value() == 0:
-            img = sensor.snapshot(chn=CAM_CHN_ID_1) # 从通道1捕获一张图
-            img.save("/data/PHOTO/photo.bmp")
-            print("snapshot success") # 提示照片保存成功
-            time.sleep_ms(50)
+            service.capture("bmp")
+            while key1.value() == 0: # 等待按键松开
+                time.sleep_ms(10)
+            reported = False
+        # 照片全部保存完成后打印统计
+        if not reported and service.pending() == 0:
+            service.report()
+            reported = True
         time.sleep_ms(10)
 # IDE中断释放资源代码
 except KeyboardInterrupt as e:
@@ -81,6 +219,9 @@ except KeyboardInterrupt as e:
 except BaseException as e:
     print(f"Exception {e}")
 finally:
+    # 保存完队列中的照片
+    if service is not None:
+        service.stop()
     # sensor stop run
     if isinstance(sensor, Sensor):
         sensor.stop()
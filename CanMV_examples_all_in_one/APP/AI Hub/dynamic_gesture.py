@@ -38,19 +38,14 @@ import machine
 from machine import Pin
 from machine import FPIOA
 
-class Button():
-    def __init__(self, fpioa, pinx, valid=0):
-        fpioa.set_function(pinx, fpioa.GPIO0 + pinx)
-
-        pull = Pin.PULL_UP if valid == 0 else Pin.PULL_DOWN
-        self.pin = Pin(pinx, Pin.IN, pull=pull, drive=7)
-        self.valid = valid
-
-    def is_pressing(self):
-        return True if self.pin.value() == self.valid else False
+sys.path.append("/sdcard/CanMV Sample/APP/AI Hub")  # AI Hub公共模块所在目录
+from hub_libs.demo_host import HostedDemo, run_standalone
+from hub_libs.model_cache import CachedAIBase, MODEL_CACHE
+from hub_libs.gesture import GESTURE_CLASSIFIER, vector_2d_angle
+from hub_libs.sprite_pack import SPRITE_PACK
 
 # 自定义手掌检测任务类
-class HandDetApp(AIBase):
+class HandDetApp(CachedAIBase):
     def __init__(self,kmodel_path,labels,model_input_size,anchors,confidence_threshold=0.2,nms_threshold=0.5,nms_option=False, strides=[8,16,32],rgb888p_size=[1920,1080],display_size=[1920,1080],debug_mode=0):
         super().__init__(kmodel_path,model_input_size,rgb888p_size,debug_mode)
         # kmodel路径
@@ -125,7 +120,7 @@ class HandDetApp(AIBase):
         return top, bottom, left, right
 
 # 自定义手势关键点分类任务类
-class HandKPClassApp(AIBase):
+class HandKPClassApp(CachedAIBase):
     def __init__(self,kmodel_path,model_input_size,rgb888p_size=[1920,1080],display_size=[1920,1080],debug_mode=0):
         super().__init__(kmodel_path,model_input_size,rgb888p_size,debug_mode)
         # kmodel路径
@@ -167,7 +162,7 @@ class HandKPClassApp(AIBase):
             results_show[0::2] = results[0::2] * self.crop_params[3] + self.crop_params[0]
             results_show[1::2] = results[1::2] * self.crop_params[2] + self.crop_params[1]
             # 根据输出计算手势
-            gesture=self.hk_gesture(results_show)
+            gesture=GESTURE_CLASSIFIER.classify(results_show)[0]
             return results_show,gesture
 
     # 计算crop参数
@@ -190,48 +185,87 @@ class HandKPClassApp(AIBase):
         h_kp = int(y2_kp - y1_kp + 1)
         return [x1_kp, y1_kp, w_kp, h_kp]
 
-    # 求两个vector之间的夹角
-    def hk_vector_2d_angle(self,v1,v2):
-        with ScopedTiming("hk_vector_2d_angle",self.debug_mode > 0):
-            v1_x,v1_y,v2_x,v2_y = v1[0],v1[1],v2[0],v2[1]
-            v1_norm = np.sqrt(v1_x * v1_x+ v1_y * v1_y)
-            v2_norm = np.sqrt(v2_x * v2_x + v2_y * v2_y)
-            dot_product = v1_x * v2_x + v1_y * v2_y
-            cos_angle = dot_product/(v1_norm*v2_norm)
-            angle = np.acos(cos_angle)*180/np.pi
-            return angle
-
-    # 根据手掌关键点检测结果判断手势类别
-    def hk_gesture(self,results):
-        with ScopedTiming("hk_gesture",self.debug_mode > 0):
-            angle_list = []
-            for i in range(5):
-                angle = self.hk_vector_2d_angle([(results[0]-results[i*8+4]), (results[1]-results[i*8+5])],[(results[i*8+6]-results[i*8+8]),(results[i*8+7]-results[i*8+9])])
-                angle_list.append(angle)
-            thr_angle,thr_angle_thumb,thr_angle_s,gesture_str = 65.,53.,49.,None
-            if 65535. not in angle_list:
-                if (angle_list[0]>thr_angle_thumb)  and (angle_list[1]>thr_angle) and (angle_list[2]>thr_angle) and (angle_list[3]>thr_angle) and (angle_list[4]>thr_angle):
-                    gesture_str = "fist"
-                elif (angle_list[0]<thr_angle_s)  and (angle_list[1]<thr_angle_s) and (angle_list[2]<thr_angle_s) and (angle_list[3]<thr_angle_s) and (angle_list[4]<thr_angle_s):
-                    gesture_str = "five"
-                elif (angle_list[0]<thr_angle_s)  and (angle_list[1]<thr_angle_s) and (angle_list[2]>thr_angle) and (angle_list[3]>thr_angle) and (angle_list[4]>thr_angle):
-                    gesture_str = "gun"
-                elif (angle_list[0]<thr_angle_s)  and (angle_list[1]<thr_angle_s) and (angle_list[2]>thr_angle) and (angle_list[3]>thr_angle) and (angle_list[4]<thr_angle_s):
-                    gesture_str = "love"
-                elif (angle_list[0]>5)  and (angle_list[1]<thr_angle_s) and (angle_list[2]>thr_angle) and (angle_list[3]>thr_angle) and (angle_list[4]>thr_angle):
-                    gesture_str = "one"
-                elif (angle_list[0]<thr_angle_s)  and (angle_list[1]>thr_angle) and (angle_list[2]>thr_angle) and (angle_list[3]>thr_angle) and (angle_list[4]<thr_angle_s):
-                    gesture_str = "six"
-                elif (angle_list[0]>thr_angle_thumb)  and (angle_list[1]<thr_angle_s) and (angle_list[2]<thr_angle_s) and (angle_list[3]<thr_angle_s) and (angle_list[4]>thr_angle):
-                    gesture_str = "three"
-                elif (angle_list[0]<thr_angle_s)  and (angle_list[1]>thr_angle) and (angle_list[2]>thr_angle) and (angle_list[3]>thr_angle) and (angle_list[4]>thr_angle):
-                    gesture_str = "thumbUp"
-                elif (angle_list[0]>thr_angle_thumb)  and (angle_list[1]<thr_angle_s) and (angle_list[2]<thr_angle_s) and (angle_list[3]>thr_angle) and (angle_list[4]>thr_angle):
-                    gesture_str = "yeah"
-            return gesture_str
+# 定长环形缓冲区，保存最近若干帧的动态手势logit并维护其累加和，每帧更新代价与手势持续时间无关
+class LogitRing:
+    def __init__(self,capacity=20):
+        self.capacity=capacity
+        self.buf=None           # (capacity,类别数)的logit缓存，首次写入时按输出长度分配
+        self.sum=None           # 缓存中所有logit的累加和
+        self.head=0             # 下一次写入的位置
+        self.count=0            # 当前有效的logit数量
+        self.pushes=0           # 累计写入次数，用于定期重算累加和，消除浮点累积误差
+
+    def __len__(self):
+        return self.count
+
+    # 写入一帧logit，缓存已满时先从累加和中减去被覆盖的最旧一帧
+    def push(self,logit):
+        if self.buf is None:
+            self.buf=np.zeros((self.capacity,len(logit)),dtype=np.float)
+            self.sum=np.zeros(len(logit),dtype=np.float)
+        if self.count==self.capacity:
+            self.sum-=self.buf[self.head]
+        else:
+            self.count+=1
+        self.buf[self.head]=logit
+        self.sum+=logit
+        self.head=(self.head+1)%self.capacity
+        self.pushes+=1
+        if self.pushes%(self.capacity*64)==0:
+            self.sum=self.recompute()
+        return self.sum
+
+    # 按有效数据重新计算累加和
+    def recompute(self):
+        total=np.zeros(self.buf.shape[1],dtype=np.float)
+        for i in range(self.count):
+            total+=self.buf[(self.head-1-i)%self.capacity]
+        return total
+
+    # 只保留最新的一帧
+    def keep_last(self):
+        if self.count==0:
+            return
+        last=(self.head-1)%self.capacity
+        self.sum=self.buf[last].copy()
+        self.buf[0]=self.sum
+        self.head=1%self.capacity
+        self.count=1
+
+    def clear(self):
+        if self.sum is not None:
+            self.sum=np.zeros(len(self.sum),dtype=np.float)
+        self.head=0
+        self.count=0
+
+# 定长环形缓冲区，保存最近若干帧的手势判断结果，支持history[-1]形式的倒序访问
+class HistoryRing:
+    def __init__(self,capacity=20,init=2):
+        self.capacity=capacity
+        self.buf=[0]*capacity
+        self.reset(init)
+
+    def __len__(self):
+        return self.count
+
+    # 倒序访问，index为-1表示最新一帧
+    def __getitem__(self,index):
+        return self.buf[(self.head+index)%self.capacity]
+
+    def append(self,value):
+        self.buf[self.head]=value
+        self.head=(self.head+1)%self.capacity
+        if self.count<self.capacity:
+            self.count+=1
+
+    # 重置为只包含一个初始值
+    def reset(self,init=2):
+        self.head=0
+        self.count=0
+        self.append(init)
 
 # 自定义动态手势识别任务类
-class DynamicGestureApp(AIBase):
+class DynamicGestureApp(CachedAIBase):
     def __init__(self,kmodel_path,model_input_size,rgb888p_size=[1920,1080],display_size=[1920,1080],debug_mode=0):
         super().__init__(kmodel_path,model_input_size,rgb888p_size,debug_mode)
         # kmodel路径
@@ -315,18 +349,16 @@ class DynamicGestureApp(AIBase):
         # 返回后处理结果
         return self.postprocess(outputs,his_logit,history)
 
-    # 自定义后处理
+    # 自定义后处理，his_logit为LogitRing，history为HistoryRing
     def postprocess(self,results,his_logit, history):
         with ScopedTiming("postprocess",self.debug_mode > 0):
-            his_logit.append(results[0])
-            avg_logit = sum(np.array(his_logit))
+            avg_logit = his_logit.push(results[0].flatten())
             idx_ = np.argmax(avg_logit)
             idx = self.gesture_process_output(idx_, history)
             if (idx_ != idx):
-                his_logit_last = his_logit[-1]
-                his_logit = []
-                his_logit.append(his_logit_last)
-            return idx, avg_logit
+                # 平滑结果被修正时，只保留当前帧的logit重新累加
+                his_logit.keep_last()
+            return idx, his_logit.sum.copy()
 
     # 手势处理函数
     def gesture_process_output(self,pred,history):
@@ -338,11 +370,10 @@ class DynamicGestureApp(AIBase):
             pred = 2
         if (pred != history[-1]) :
             if (len(history)>= 2) :
-                if (history[-1] != history[len(history)-2]) :
+                if (history[-1] != history[-2]) :
                     pred = history[-1]
+        # 环形缓冲区容量为max_hist_len，写满后自动覆盖最旧的结果
         history.append(pred)
-        if (len(history) > self.max_hist_len) :
-            history = history[-self.max_hist_len:]
         return history[-1]
 
     # 计算crop参数
@@ -366,7 +397,8 @@ class DynamicGestureApp(AIBase):
     # 重写逆初始化
     def deinit(self):
         with ScopedTiming("deinit",self.debug_mode > 0):
-            del self.kpu
+            MODEL_CACHE.release(self.kpu)
+            self.kpu = None
             del self.ai2d_resize
             del self.ai2d_crop
             self.tensors.clear()
@@ -407,14 +439,17 @@ class DynamicGesture:
         # 动态手势识别贴图
         self.bin_width = 150                                                     # 动态手势识别屏幕坐上角标志状态文件的短边尺寸
         self.bin_height = 216                                                    # 动态手势识别屏幕坐上角标志状态文件的长边尺寸
-        shang_argb = np.fromfile("/sdcard/examples/utils/shang.bin", dtype=np.uint8)
-        self.shang_argb = shang_argb.reshape((self.bin_height, self.bin_width, 4))
-        xia_argb = np.fromfile("/sdcard/examples/utils/xia.bin", dtype=np.uint8)
-        self.xia_argb = xia_argb.reshape((self.bin_height, self.bin_width, 4))
-        zuo_argb = np.fromfile("/sdcard/examples/utils/zuo.bin", dtype=np.uint8)
-        self.zuo_argb = zuo_argb.reshape((self.bin_width, self.bin_height, 4))
-        you_argb = np.fromfile("/sdcard/examples/utils/you.bin", dtype=np.uint8)
-        self.you_argb = you_argb.reshape((self.bin_width, self.bin_height, 4))
+        # 方向标志贴图从共享的贴图资源包获取，资源包中没有时读取单独的bin文件
+        sprites = SPRITE_PACK.load_sprites("dynamic_gesture", {
+            "shang": ((self.bin_height, self.bin_width, 4), "/sdcard/examples/utils/shang.bin"),
+            "xia": ((self.bin_height, self.bin_width, 4), "/sdcard/examples/utils/xia.bin"),
+            "zuo": ((self.bin_width, self.bin_height, 4), "/sdcard/examples/utils/zuo.bin"),
+            "you": ((self.bin_width, self.bin_height, 4), "/sdcard/examples/utils/you.bin"),
+        })
+        self.shang_argb = sprites["shang"]
+        self.xia_argb = sprites["xia"]
+        self.zuo_argb = sprites["zuo"]
+        self.you_argb = sprites["you"]
         #其他参数
         self.TRIGGER = 0                                                         # 动态手势识别应用的结果状态
         self.MIDDLE = 1
@@ -429,8 +464,8 @@ class DynamicGesture:
         self.pre_state = self.TRIGGER
         self.draw_state = self.TRIGGER
         self.vec_flag = []
-        self.his_logit = []
-        self.history = [2]
+        self.his_logit = LogitRing(self.max_hist_len)
+        self.history = HistoryRing(self.max_hist_len,2)
         self.s_start = time.time_ns()
         self.m_start=None
         self.hand_det=HandDetApp(self.hand_det_kmodel,self.labels,model_input_size=self.det_input_size,anchors=self.anchors,confidence_threshold=self.confidence_threshold,nms_threshold=self.nms_threshold,nms_option=self.nms_option,strides=self.strides,rgb888p_size=self.rgb888p_size,display_size=self.display_size,debug_mode=0)
@@ -479,7 +514,7 @@ class DynamicGesture:
                 if ((gesture == "five") or (gesture == "yeah")):
                     v_x = hk_results[24]-hk_results[0]
                     v_y = hk_results[25]-hk_results[1]
-                    angle = self.hand_kp.hk_vector_2d_angle([v_x,v_y],[1.0,0.0])
+                    angle = vector_2d_angle([v_x,v_y],[1.0,0.0])
                     if (v_y>0):
                         angle = 360-angle
                     if ((70.0<=angle) and (angle<110.0)):                                                   # 手指朝上
@@ -507,9 +542,9 @@ class DynamicGesture:
                             draw_img_np[:self.bin_width,:self.bin_height,:] = self.zuo_argb
                             self.cur_state = self.LEFT
                     self.m_start = time.time_ns()
-            self.his_logit = []
+            self.his_logit.clear()
         else:
-            idx,avg_logit=output1,output2[0]
+            idx,avg_logit=output1,output2 # output2为(类别数,)的logit累加和
             if (self.cur_state == self.UP):
                 draw_img_np[:self.bin_height,:self.bin_width,:] = self.shang_argb
                 if ((idx==15) or (idx==10)):
@@ -518,7 +553,7 @@ class DynamicGesture:
                         self.s_start = time.time_ns()
                         self.cur_state = self.TRIGGER
                         self.draw_state = self.DOWN
-                        self.history = [2]
+                        self.history.reset(2)
                     self.pre_state = self.UP
                 elif ((idx==25)or(idx==26)) :
                     self.vec_flag.clear()
@@ -526,7 +561,7 @@ class DynamicGesture:
                         self.s_start = time.time_ns()
                         self.cur_state = self.TRIGGER
                         self.draw_state = self.MIDDLE
-                        self.history = [2]
+                        self.history.reset(2)
                     self.pre_state = self.MIDDLE
                 else:
                     self.his_logit.clear()
@@ -538,7 +573,7 @@ class DynamicGesture:
                         self.s_start = time.time_ns()
                         self.cur_state = self.TRIGGER
                         self.draw_state = self.RIGHT
-                        self.history = [2]
+                        self.history.reset(2)
                     self.pre_state = self.RIGHT
                 else:
                     self.his_logit.clear()
@@ -550,7 +585,7 @@ class DynamicGesture:
                         self.s_start = time.time_ns()
                         self.cur_state = self.TRIGGER
                         self.draw_state = self.UP
-                        self.history = [2]
+                        self.history.reset(2)
                     self.pre_state = self.DOWN
                 else:
                     self.his_logit.clear()
@@ -562,7 +597,7 @@ class DynamicGesture:
                         self.s_start = time.time_ns()
                         self.cur_state = self.TRIGGER
                         self.draw_state = self.LEFT
-                        self.history = [2]
+                        self.history.reset(2)
                     self.pre_state = self.LEFT
                 else:
                     self.his_logit.clear()
@@ -595,13 +630,12 @@ class DynamicGesture:
         pl.osd_img.copy_from(draw_img)
 
 
-if __name__=="__main__":
-    fpioa = FPIOA()
-    button0 = Button(fpioa, 34, 0)
+# 例程需要的AI输入分辨率，由宿主或run_standalone设置sensor通道2的输出尺寸
+RGB888P_SIZE = [1024, 768]
 
-    # 显示模式，默认"lcd"
-    display_mode="lcd"
-    display_size=[640,480]
+# 例程入口：在已创建的PipeLine上初始化模型，返回HostedDemo，由AI Hub宿主或run_standalone运行和释放
+def start(pl):
+    display_size = pl.display_size
     # 手掌检测模型路径
     hand_det_kmodel_path="/sdcard/examples/kmodel/hand_det.kmodel"
     # 手部关键点模型路径
@@ -609,7 +643,6 @@ if __name__=="__main__":
     # 动态手势识别模型路径
     gesture_kmodel_path="/sdcard/examples/kmodel/gesture.kmodel"
     # 其他参数
-    rgb888p_size=[1024,768]
     hand_det_input_size=[512,512]
     hand_kp_input_size=[256,256]
     gesture_input_size=[224,224]
@@ -618,38 +651,21 @@ if __name__=="__main__":
     labels=["hand"]
     anchors = [26,27, 53,52, 75,71, 80,99, 106,82, 99,134, 140,113, 161,172, 245,276]
 
-    # 初始化PipeLine，只关注传给AI的图像分辨率，显示的分辨率
-    sensor = Sensor(width=1280, height=960) # 构建摄像头对象
-    pl = PipeLine(rgb888p_size=rgb888p_size, display_size=display_size, display_mode=display_mode)
-    pl.create(sensor=sensor)  # 创建PipeLine实例
     # 自定义动态手势识别任务实例
-    dg=DynamicGesture(hand_det_kmodel_path,hand_kp_kmodel_path,gesture_kmodel_path,det_input_size=hand_det_input_size,kp_input_size=hand_kp_input_size,gesture_input_size=gesture_input_size,labels=labels,anchors=anchors,confidence_threshold=confidence_threshold,nms_threshold=nms_threshold,nms_option=False,strides=[8,16,32],rgb888p_size=rgb888p_size,display_size=display_size)
-    try:
-        while True:
-            os.exitpoint()
-            with ScopedTiming("total",1):
-                img=pl.get_frame()                 # 获取当前帧
-                output1,output2=dg.run(img)        # 推理当前帧
-#                print(output1, output2)            # 打印结果
-                dg.draw_result(pl,output1,output2) # 绘制推理结果
-                pl.show_image()                    # 展示推理结果
-                gc.collect()
-            if button0.is_pressing():
-                try:
-                    with open("/sdcard/main.py", "rb") as f:
-                        os.remove("/sdcard/main.py")
-                except Exception as e:
-                    pass
-                with open("/sdcard/CanMV Sample/main.py", "rb") as f:
-                    code_src = f.read()
-                with open("/sdcard/main.py", "wb") as f:
-                    f.write(code_src)
-                machine.reset()
-    except Exception as e:
-        sys.print_exception(e)
-    finally:
+    dg=DynamicGesture(hand_det_kmodel_path,hand_kp_kmodel_path,gesture_kmodel_path,det_input_size=hand_det_input_size,kp_input_size=hand_kp_input_size,gesture_input_size=gesture_input_size,labels=labels,anchors=anchors,confidence_threshold=confidence_threshold,nms_threshold=nms_threshold,nms_option=False,strides=[8,16,32],rgb888p_size=RGB888P_SIZE,display_size=display_size)
+
+    # 逐帧处理：推理并绘制结果，取帧和送显由HostedDemo完成
+    def frame(img):
+        output1,output2=dg.run(img)        # 推理当前帧
+#        print(output1, output2)            # 打印结果
+        dg.draw_result(pl,output1,output2) # 绘制推理结果
+
+    def release():
         dg.hand_det.deinit()
         dg.hand_kp.deinit()
         dg.dg.deinit()
-        pl.destroy()
 
+    return HostedDemo(pl, release, frame_func=frame)
+
+if __name__=="__main__":
+    run_standalone(start, RGB888P_SIZE)
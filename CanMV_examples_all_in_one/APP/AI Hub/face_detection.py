@@ -37,19 +37,14 @@ import machine
 from machine import Pin
 from machine import FPIOA
 
-class Button():
-    def __init__(self, fpioa, pinx, valid=0):
-        fpioa.set_function(pinx, fpioa.GPIO0 + pinx)
-
-        pull = Pin.PULL_UP if valid == 0 else Pin.PULL_DOWN
-        self.pin = Pin(pinx, Pin.IN, pull=pull, drive=7)
-        self.valid = valid
-
-    def is_pressing(self):
-        return True if self.pin.value() == self.valid else False
+sys.path.append("/sdcard/CanMV Sample/APP/AI Hub")  # AI Hub公共模块所在目录
+from hub_libs.pipeline_runner import PipelineRunner
+from hub_libs.tracker import TrackedDetector
+from hub_libs.demo_host import HostedDemo, run_standalone
+from hub_libs.model_cache import CachedAIBase
 
 # 自定义人脸检测类，继承自AIBase基类
-class FaceDetectionApp(AIBase):
+class FaceDetectionApp(CachedAIBase):
     def __init__(self, kmodel_path, model_input_size, anchors, confidence_threshold=0.5, nms_threshold=0.2, rgb888p_size=[224,224], display_size=[1920,1080], debug_mode=0):
         super().__init__(kmodel_path, model_input_size, rgb888p_size, debug_mode)  # 调用基类的构造函数
         self.kmodel_path = kmodel_path  # 模型文件路径
@@ -94,6 +89,8 @@ class FaceDetectionApp(AIBase):
                     w = w * self.display_size[0] // self.rgb888p_size[0]
                     h = h * self.display_size[1] // self.rgb888p_size[1]
                     pl.osd_img.draw_rectangle(x, y, w, h, color=(255, 255, 0, 255), thickness=2)  # 绘制矩形框
+                    if len(det) > 5:
+                        pl.osd_img.draw_string_advanced(x, y-40, 32, " #" + str(det[5]), color=(255, 255, 0, 255))  # 绘制轨迹ID
             else:
                 pl.osd_img.clear()
 
@@ -114,13 +111,12 @@ class FaceDetectionApp(AIBase):
         right = int(round(dw * 2 - 0.1))
         return top, bottom, left, right
 
-if __name__ == "__main__":
-    fpioa = FPIOA()
-    button0 = Button(fpioa, 34, 0)
+# 例程需要的AI输入分辨率，由宿主或run_standalone设置sensor通道2的输出尺寸
+RGB888P_SIZE = [1280, 960]
 
-    # 显示模式，默认"lcd"
-    display_mode="lcd"
-    display_size=[640,480]
+# 例程入口：在已创建的PipeLine上初始化模型，返回HostedDemo，由AI Hub宿主或run_standalone运行和释放
+def start(pl):
+    display_size = pl.display_size
     # 设置模型路径和其他参数
     kmodel_path = "/sdcard/examples/kmodel/face_detection_320.kmodel"
     # 其它参数
@@ -131,42 +127,25 @@ if __name__ == "__main__":
     anchors_path = "/sdcard/examples/utils/prior_data_320.bin"
     anchors = np.fromfile(anchors_path, dtype=np.float)
     anchors = anchors.reshape((anchor_len, det_dim))
-    rgb888p_size = [1280, 960]
 
-    # 初始化PipeLine，用于图像处理流程
-    sensor = Sensor(width=1280, height=960) # 构建摄像头对象
-    pl = PipeLine(rgb888p_size=rgb888p_size, display_size=display_size, display_mode=display_mode)
-    pl.create(sensor=sensor)  # 创建PipeLine实例
     # 初始化自定义人脸检测实例
-    face_det = FaceDetectionApp(kmodel_path, model_input_size=[320, 320], anchors=anchors, confidence_threshold=confidence_threshold, nms_threshold=nms_threshold, rgb888p_size=rgb888p_size, display_size=display_size, debug_mode=0)
+    face_det = FaceDetectionApp(kmodel_path, model_input_size=[320, 320], anchors=anchors, confidence_threshold=confidence_threshold, nms_threshold=nms_threshold, rgb888p_size=RGB888P_SIZE, display_size=display_size, debug_mode=0)
     face_det.config_preprocess()  # 配置预处理
 
-    try:
-        while True:
-            os.exitpoint()                      # 检查是否有退出信号
-            with ScopedTiming("total",1):
-                img = pl.get_frame()            # 获取当前帧数据
-                res = face_det.run(img)         # 推理当前帧
-                # 当检测到人脸时，打印结果
-                if res:
-                    print(res)
-                face_det.draw_result(pl, res)   # 绘制结果
-                pl.show_image()                 # 显示结果
-                gc.collect()                    # 垃圾回收
-            if button0.is_pressing():
-                try:
-                    with open("/sdcard/main.py", "rb") as f:
-                        os.remove("/sdcard/main.py")
-                except Exception as e:
-                    pass
-                with open("/sdcard/CanMV Sample/main.py", "rb") as f:
-                    code_src = f.read()
-                with open("/sdcard/main.py", "wb") as f:
-                    f.write(code_src)
-                machine.reset()
-    except Exception as e:
-        sys.print_exception(e)                  # 打印异常信息
-    finally:
+    # 流水线运行器，pipeline_mode为False时按原例程的串行方式运行，便于对比帧率和各阶段占用率
+    pipeline_mode = True
+    # 间隔检测+跟踪：检测间隔根据实测帧耗时在1~8帧之间自适应，画面运动较大时立即重新检测
+    tracked = TrackedDetector(face_det,
+                              to_xyxy=lambda d: [d[0], d[1], d[0] + d[2], d[1] + d[3], d[4] if len(d) > 4 else 1.0, 0],
+                              from_xyxy=lambda r: [r[0], r[1], r[2] - r[0], r[3] - r[1], r[4], r[6]],
+                              target_fps=30)
+    runner = PipelineRunner(pl, face_det, infer_func=tracked.run, render_func=lambda dets: face_det.draw_result(pl, dets))
+
+    def release():
+        tracked.deinit()
         face_det.deinit()                       # 反初始化
-        pl.destroy()                            # 销毁PipeLine实例
 
+    return HostedDemo(pl, release, runner=runner, pipelined=pipeline_mode)
+
+if __name__ == "__main__":
+    run_standalone(start, RGB888P_SIZE)
@@ -36,19 +36,83 @@ import machine
 from machine import Pin
 from machine import FPIOA
 
-class Button():
-    def __init__(self, fpioa, pinx, valid=0):
-        fpioa.set_function(pinx, fpioa.GPIO0 + pinx)
+sys.path.append("/sdcard/CanMV Sample/APP/AI Hub")  # AI Hub公共模块所在目录
+from hub_libs.batch_infer import BatchSecondStage, quantize
+from hub_libs.demo_host import HostedDemo, run_standalone
+from hub_libs.model_cache import CachedAIBase
 
-        pull = Pin.PULL_UP if valid == 0 else Pin.PULL_DOWN
-        self.pin = Pin(pinx, Pin.IN, pull=pull, drive=7)
-        self.valid = valid
+# 人脸关键点后处理(逐点循环版本)，保留用于与批量版本对比耗时和结果
+def landmark_postprocess_loop(preds,matrices,input_len):
+    n=len(matrices)
+    out_len=preds.size//n
+    preds=preds.flatten()
+    half_input_len = input_len // 2
+    landmark_res=[]
+    for i in range(n):
+        pred=preds[i*out_len:(i+1)*out_len]
+        for j in range(len(pred)):
+            pred[j] += (pred[j] + 1) * half_input_len
+        matrix_dst_inv = aidemo.invert_affine_transform(matrices[i]).flatten()
+        for kp_id in range(out_len // 2):
+            old_x = pred[kp_id * 2]
+            old_y = pred[kp_id * 2 + 1]
+            pred[kp_id * 2] = old_x * matrix_dst_inv[0] + old_y * matrix_dst_inv[1] + matrix_dst_inv[2]
+            pred[kp_id * 2 + 1] = old_x * matrix_dst_inv[3] + old_y * matrix_dst_inv[4] + matrix_dst_inv[5]
+        landmark_res.append(pred)
+    return landmark_res
 
-    def is_pressing(self):
-        return True if self.pin.value() == self.valid else False
+# 人脸关键点后处理(批量版本)，preds为整批模型输出，matrices为各人脸的2x3仿射矩阵
+# 一次缩放把整批输出变换到模型输入空间，各人脸的逆矩阵按列广播，一次完成整批关键点的仿射逆变换
+# 返回与matrices顺序一致的关键点列表，每个人脸为(关键点数, 2)的数组
+def landmark_postprocess(preds,matrices,input_len):
+    n=len(matrices)
+    preds=preds.reshape((n,preds.size//n))
+    half_input_len = input_len // 2
+    # （1）将人脸关键点输出变换到模型输入空间
+    preds=preds*(half_input_len+1)+half_input_len
+    # （2）整批求仿射矩阵的逆，每列为(n,1)，与(n,关键点数)的坐标按行广播
+    m=np.zeros((n,6),dtype=np.float)
+    for i in range(n):
+        m[i,:]=matrices[i].flatten()
+    a,b,c,d,e,f=m[:,0:1],m[:,1:2],m[:,2:3],m[:,3:4],m[:,4:5],m[:,5:6]
+    det=a*e-b*d
+    # （3）对所有关键点进行逆变换
+    old_x=preds[:,0::2]
+    old_y=preds[:,1::2]
+    out=np.zeros(preds.shape,dtype=np.float)
+    out[:,0::2]=(old_x*e-old_y*b+(b*f-c*e))/det
+    out[:,1::2]=(old_y*a-old_x*d+(c*d-a*f))/det
+    kp_num=preds.shape[1]//2
+    return [out[i].reshape((kp_num,2)) for i in range(n)]
+
+# 保存一帧的模型输出和仿射矩阵，供bench_postprocess离线对比
+def record_landmark_tensors(path,preds,matrices):
+    np.save(path+"_pred.npy",preds)
+    m=np.zeros((len(matrices)*2,3),dtype=np.float)
+    for i in range(len(matrices)):
+        m[i*2:i*2+2,:]=matrices[i]
+    np.save(path+"_matrix.npy",m)
+
+# 用record_landmark_tensors保存的数据对比循环版本和批量版本的后处理耗时及结果误差
+# 用法(REPL): import face_landmark; face_landmark.bench_postprocess("/sdcard/landmark")
+def bench_postprocess(path,input_len=192,repeat=20):
+    preds=np.load(path+"_pred.npy")
+    m=np.load(path+"_matrix.npy")
+    matrices=[m[i*2:i*2+2,:] for i in range(m.shape[0]//2)]
+    times=[]
+    for func in (landmark_postprocess_loop,landmark_postprocess):
+        gc.collect()
+        t0=time.ticks_us()
+        for i in range(repeat):
+            res=func(preds.copy(),matrices,input_len)
+        times.append(time.ticks_diff(time.ticks_us(),t0)//repeat)
+    loop_res=landmark_postprocess_loop(preds.copy(),matrices,input_len)
+    vec_res=landmark_postprocess(preds.copy(),matrices,input_len)
+    err=max(np.max(abs(loop_res[i]-vec_res[i].flatten())) for i in range(len(matrices)))
+    print("[landmark] {} faces, {} keypoints: loop {}us, batched {}us, max diff {}".format(len(matrices),preds.size//len(matrices)//2,times[0],times[1],err))
 
 # 自定义人脸检测任务类
-class FaceDetApp(AIBase):
+class FaceDetApp(CachedAIBase):
     def __init__(self,kmodel_path,model_input_size,anchors,confidence_threshold=0.25,nms_threshold=0.3,rgb888p_size=[1280,720],display_size=[1920,1080],debug_mode=0):
         super().__init__(kmodel_path,model_input_size,rgb888p_size,debug_mode)
         # kmodel路径
@@ -115,7 +179,7 @@ class FaceDetApp(AIBase):
         return [0,0,0,0,top, bottom, left, right]
 
 # 自定义人脸关键点任务类
-class FaceLandMarkApp(AIBase):
+class FaceLandMarkApp(CachedAIBase):
     def __init__(self,kmodel_path,model_input_size,rgb888p_size=[1920,1080],display_size=[1920,1080],debug_mode=0):
         super().__init__(kmodel_path,model_input_size,rgb888p_size,debug_mode)
         # kmodel路径
@@ -132,6 +196,12 @@ class FaceLandMarkApp(AIBase):
         self.matrix_dst=None
         self.ai2d=Ai2d(debug_mode)
         self.ai2d.set_ai2d_dtype(nn.ai2d_format.NCHW_FMT,nn.ai2d_format.NCHW_FMT,np.uint8, np.uint8)
+        # 人脸框的量化步长，人脸轻微移动时复用已缓存的预处理builder
+        self.box_step=4
+        # 批量推理，一帧内所有人脸共用一次输入tensor和固定的槽位tensor
+        self.batch=BatchSecondStage(self.kpu,self.rgb888p_size,self.model_input_size,debug_mode=debug_mode)
+        # 不为None时保存下一帧的模型输出和仿射矩阵(路径前缀)，用于bench_postprocess
+        self.record_path=None
 
     # 配置预处理操作，这里使用了affine，Ai2d支持crop/shift/pad/resize/affine，具体代码请打开/sdcard/app/libs/AI2D.py查看
     def config_preprocess(self,det,input_image_size=None):
@@ -147,29 +217,43 @@ class FaceLandMarkApp(AIBase):
             # 构建预处理流程,参数为预处理输入tensor的shape和预处理输出的tensor的shape
             self.ai2d.build([1,3,ai2d_input_size[1],ai2d_input_size[0]],[1,3,self.model_input_size[1],self.model_input_size[0]])
 
-    # 自定义后处理，results是模型输出的array列表，这里使用了aidemo库的invert_affine_transform接口
+    # 自定义后处理，results是模型输出的array列表，返回(关键点数, 2)的关键点数组
     def postprocess(self,results):
         with ScopedTiming("postprocess",self.debug_mode > 0):
-            pred=results[0]
-            # （1）将人脸关键点输出变换模型输入
-            half_input_len = self.model_input_size[0] // 2
-            pred = pred.flatten()
-            for i in range(len(pred)):
-                pred[i] += (pred[i] + 1) * half_input_len
-            # （2）获取仿射矩阵的逆矩阵
-            matrix_dst_inv = aidemo.invert_affine_transform(self.matrix_dst)
-            matrix_dst_inv = matrix_dst_inv.flatten()
-            # （3）对每个关键点进行逆变换
-            half_out_len = len(pred) // 2
-            for kp_id in range(half_out_len):
-                old_x = pred[kp_id * 2]
-                old_y = pred[kp_id * 2 + 1]
-                # 逆变换公式
-                new_x = old_x * matrix_dst_inv[0] + old_y * matrix_dst_inv[1] + matrix_dst_inv[2]
-                new_y = old_x * matrix_dst_inv[3] + old_y * matrix_dst_inv[4] + matrix_dst_inv[5]
-                pred[kp_id * 2] = new_x
-                pred[kp_id * 2 + 1] = new_y
-            return pred
+            return landmark_postprocess(results[0],[self.matrix_dst],self.model_input_size[0])[0]
+
+    # 批量推理，对一帧内的所有人脸框做关键点检测，返回与det_boxes顺序一致的关键点列表
+    def run_batch(self,input_np,det_boxes):
+        self.batch.begin()
+        matrices=[]
+        for det in det_boxes:
+            box=[quantize(v,self.box_step) for v in det[:4]]
+            matrix_dst=self.get_affine_matrix(box)
+            matrices.append(matrix_dst)
+            self.batch.add(tuple(box),lambda ai2d,m=matrix_dst:self.config_affine(ai2d,m))
+        results=self.batch.run(input_np)
+        if not results:
+            return []
+        if self.record_path is not None:
+            record_landmark_tensors(self.record_path,results[0],matrices)
+            self.record_path=None
+        return self.postprocess_batch(results,matrices)
+
+    # 批量推理使用的预处理配置，ai2d为nncase_runtime的ai2d对象
+    def config_affine(self,ai2d,matrix_dst):
+        affine_matrix = [matrix_dst[0][0],matrix_dst[0][1],matrix_dst[0][2],
+                         matrix_dst[1][0],matrix_dst[1][1],matrix_dst[1][2]]
+        ai2d.set_affine_param(True,nn.interp_method.cv2_bilinear,0, 0, 127, 1,affine_matrix)
+
+    # 批量后处理，整批关键点一次完成缩放和仿射逆变换
+    def postprocess_batch(self,results,matrices):
+        with ScopedTiming("postprocess",self.debug_mode > 0):
+            return landmark_postprocess(results[0],matrices,self.model_input_size[0])
+
+    # 先释放批量推理占用的资源，再释放KPU和Ai2d
+    def deinit(self):
+        self.batch.deinit()
+        super().deinit()
 
     def get_affine_matrix(self,bbox):
         # 获取仿射矩阵，用于将边界框映射到模型输入空间
@@ -244,6 +328,11 @@ class FaceLandMark:
             (255, 255, 220, 50),
             (255, 30, 30, 255)
         ]
+        # 各部位关键点的索引数组，绘制时整段取出
+        self.kp_index = [np.array(sub_part,dtype=np.uint16) for sub_part in self.dict_kp_seq]
+        # 关键点从AI图像坐标到显示坐标的缩放
+        self.display_scale = np.array([self.display_size[0]/self.rgb888p_size[0],self.display_size[1]/self.rgb888p_size[1]],dtype=np.float)
+        self.color_np_for_osd_kp = [np.array(color,dtype=np.uint8) for color in self.color_list_for_osd_kp]
         # 人脸检测实例
         self.face_det=FaceDetApp(self.face_det_kmodel,model_input_size=self.det_input_size,anchors=self.anchors,confidence_threshold=self.confidence_threshold,nms_threshold=self.nms_threshold,rgb888p_size=self.rgb888p_size,display_size=self.display_size,debug_mode=0)
         # 人脸标志解析实例
@@ -256,11 +345,9 @@ class FaceLandMark:
         # 执行人脸检测
         det_boxes=self.face_det.run(input_np)
         landmark_res=[]
-        for det_box in det_boxes:
-            # 对每一个检测到的人脸解析关键部位
-            self.face_landmark.config_preprocess(det_box)
-            res=self.face_landmark.run(input_np)
-            landmark_res.append(res)
+        # 对检测到的所有人脸批量解析关键部位
+        if det_boxes:
+            landmark_res=self.face_landmark.run_batch(input_np,det_boxes)
         return det_boxes,landmark_res
 
 
@@ -271,48 +358,35 @@ class FaceLandMark:
             draw_img_np = np.zeros((self.display_size[1],self.display_size[0],4),dtype=np.uint8)
             draw_img = image.Image(self.display_size[0], self.display_size[1], image.ARGB8888, alloc=image.ALLOC_REF,data = draw_img_np)
             for pred in landmark_res:
-                # （1）获取单个人脸框对应的人脸关键点
-                for sub_part_index in range(len(self.dict_kp_seq)):
-                    # （2）构建人脸某个区域关键点集
-                    sub_part = self.dict_kp_seq[sub_part_index]
-                    face_sub_part_point_set = []
-                    for kp_index in range(len(sub_part)):
-                        real_kp_index = sub_part[kp_index]
-                        x, y = pred[real_kp_index * 2], pred[real_kp_index * 2 + 1]
-                        x = int(x * self.display_size[0] // self.rgb888p_size[0])
-                        y = int(y * self.display_size[1] // self.rgb888p_size[1])
-                        face_sub_part_point_set.append((x, y))
+                # （1）单个人脸的关键点一次缩放到显示坐标
+                points = pred * self.display_scale
+                for sub_part_index in range(len(self.kp_index)):
+                    # （2）按索引数组取出人脸某个区域的关键点集
+                    face_sub_part_point_set = np.take(points, self.kp_index[sub_part_index], axis=0)
                     # （3）画人脸不同区域的轮廓
                     if sub_part_index in (9, 6):
-                        color = np.array(self.color_list_for_osd_kp[sub_part_index],dtype = np.uint8)
-                        face_sub_part_point_set = np.array(face_sub_part_point_set)
-                        aidemo.polylines(draw_img_np, face_sub_part_point_set,False,color,5,8,0)
+                        aidemo.polylines(draw_img_np, face_sub_part_point_set,False,self.color_np_for_osd_kp[sub_part_index],5,8,0)
                     elif sub_part_index == 4:
                         color = self.color_list_for_osd_kp[sub_part_index]
-                        for kp in face_sub_part_point_set:
-                            x,y = kp[0],kp[1]
-                            draw_img.draw_circle(x,y ,2, color, 1)
+                        for kp_index in range(face_sub_part_point_set.shape[0]):
+                            draw_img.draw_circle(int(face_sub_part_point_set[kp_index,0]),int(face_sub_part_point_set[kp_index,1]),2, color, 1)
                     else:
-                        color = np.array(self.color_list_for_osd_kp[sub_part_index],dtype = np.uint8)
-                        face_sub_part_point_set = np.array(face_sub_part_point_set)
-                        aidemo.contours(draw_img_np, face_sub_part_point_set,-1,color,2,8)
+                        aidemo.contours(draw_img_np, face_sub_part_point_set,-1,self.color_np_for_osd_kp[sub_part_index],2,8)
             pl.osd_img.copy_from(draw_img)
 
 
-if __name__=="__main__":
-    fpioa = FPIOA()
-    button0 = Button(fpioa, 34, 0)
+# 例程需要的AI输入分辨率，由宿主或run_standalone设置sensor通道2的输出尺寸
+RGB888P_SIZE = [1280, 960]
 
-    # 显示模式，默认"lcd"
-    display_mode="lcd"
-    display_size=[640,480]
+# 例程入口：在已创建的PipeLine上初始化模型，返回HostedDemo，由AI Hub宿主或run_standalone运行和释放
+def start(pl):
+    display_size = pl.display_size
     # 人脸检测模型路径
     face_det_kmodel_path="/sdcard/examples/kmodel/face_detection_320.kmodel"
     # 人脸关键标志模型路径
     face_landmark_kmodel_path="/sdcard/examples/kmodel/face_landmark.kmodel"
     # 其它参数
     anchors_path="/sdcard/examples/utils/prior_data_320.bin"
-    rgb888p_size=[1280,960]
     face_det_input_size=[320,320]
     face_landmark_input_size=[192,192]
     confidence_threshold=0.5
@@ -322,35 +396,21 @@ if __name__=="__main__":
     anchors = np.fromfile(anchors_path, dtype=np.float)
     anchors = anchors.reshape((anchor_len,det_dim))
 
-    # 初始化PipeLine，只关注传给AI的图像分辨率，显示的分辨率
-    sensor = Sensor(width=1280, height=960) # 构建摄像头对象
-    pl = PipeLine(rgb888p_size=rgb888p_size, display_size=display_size, display_mode=display_mode)
-    pl.create(sensor=sensor)  # 创建PipeLine实例
-    flm=FaceLandMark(face_det_kmodel_path,face_landmark_kmodel_path,det_input_size=face_det_input_size,landmark_input_size=face_landmark_input_size,anchors=anchors,confidence_threshold=confidence_threshold,nms_threshold=nms_threshold,rgb888p_size=rgb888p_size,display_size=display_size)
-    try:
-        while True:
-            os.exitpoint()
-            with ScopedTiming("total",1):
-                img=pl.get_frame()                          # 获取当前帧
-                det_boxes,landmark_res=flm.run(img)         # 推理当前帧
-#                print(det_boxes,landmark_res)               # 打印结果
-                flm.draw_result(pl,det_boxes,landmark_res)  # 绘制推理结果
-                pl.show_image()                             # 展示推理效果
-                gc.collect()
-            if button0.is_pressing():
-                try:
-                    with open("/sdcard/main.py", "rb") as f:
-                        os.remove("/sdcard/main.py")
-                except Exception as e:
-                    pass
-                with open("/sdcard/CanMV Sample/main.py", "rb") as f:
-                    code_src = f.read()
-                with open("/sdcard/main.py", "wb") as f:
-                    f.write(code_src)
-                machine.reset()
-    except Exception as e:
-        sys.print_exception(e)
-    finally:
+    flm=FaceLandMark(face_det_kmodel_path,face_landmark_kmodel_path,det_input_size=face_det_input_size,landmark_input_size=face_landmark_input_size,anchors=anchors,confidence_threshold=confidence_threshold,nms_threshold=nms_threshold,rgb888p_size=RGB888P_SIZE,display_size=display_size)
+    # 设置为路径前缀(如"/sdcard/landmark")时保存一帧模型输出，之后可用bench_postprocess离线对比后处理耗时
+    flm.face_landmark.record_path=None
+
+    # 逐帧处理：推理并绘制结果，取帧和送显由HostedDemo完成
+    def frame(img):
+        det_boxes,landmark_res=flm.run(img)         # 推理当前帧
+#        print(det_boxes,landmark_res)               # 打印结果
+        flm.draw_result(pl,det_boxes,landmark_res)  # 绘制推理结果
+
+    def release():
         flm.face_det.deinit()
         flm.face_landmark.deinit()
-        pl.destroy()
+
+    return HostedDemo(pl, release, frame_func=frame)
+
+if __name__=="__main__":
+    run_standalone(start, RGB888P_SIZE)
@@ -37,19 +37,13 @@ import machine
 from machine import Pin
 from machine import FPIOA
 
-class Button():
-    def __init__(self, fpioa, pinx, valid=0):
-        fpioa.set_function(pinx, fpioa.GPIO0 + pinx)
-
-        pull = Pin.PULL_UP if valid == 0 else Pin.PULL_DOWN
-        self.pin = Pin(pinx, Pin.IN, pull=pull, drive=7)
-        self.valid = valid
-
-    def is_pressing(self):
-        return True if self.pin.value() == self.valid else False
+sys.path.append("/sdcard/CanMV Sample/APP/AI Hub")  # AI Hub公共模块所在目录
+from hub_libs.batch_infer import BatchSecondStage, quantize
+from hub_libs.demo_host import HostedDemo, run_standalone
+from hub_libs.model_cache import CachedAIBase
 
 # 自定义人脸检测任务类
-class FaceDetApp(AIBase):
+class FaceDetApp(CachedAIBase):
     def __init__(self,kmodel_path,model_input_size,anchors,confidence_threshold=0.25,nms_threshold=0.3,rgb888p_size=[1280,720],display_size=[1920,1080],debug_mode=0):
         super().__init__(kmodel_path,model_input_size,rgb888p_size,debug_mode)
         # kmodel路径
@@ -115,7 +109,7 @@ class FaceDetApp(AIBase):
         return [0,0,0,0,top, bottom, left, right]
 
 # 自定义人脸姿态任务类
-class FacePoseApp(AIBase):
+class FacePoseApp(CachedAIBase):
     def __init__(self,kmodel_path,model_input_size,rgb888p_size=[1920,1080],display_size=[1920,1080],debug_mode=0):
         super().__init__(kmodel_path,model_input_size,rgb888p_size,debug_mode)
         # kmodel路径
@@ -132,6 +126,10 @@ class FacePoseApp(AIBase):
         self.ai2d=Ai2d(debug_mode)
         # 设置Ai2d的输入输出格式和类型
         self.ai2d.set_ai2d_dtype(nn.ai2d_format.NCHW_FMT,nn.ai2d_format.NCHW_FMT,np.uint8, np.uint8)
+        # 人脸框的量化步长，人脸轻微移动时复用已缓存的预处理builder
+        self.box_step=4
+        # 批量推理，一帧内所有人脸共用一次输入tensor和固定的槽位tensor
+        self.batch=BatchSecondStage(self.kpu,self.rgb888p_size,self.model_input_size,debug_mode=debug_mode)
 
     # 配置预处理操作，这里使用了affine，Ai2d支持crop/shift/pad/resize/affine，具体代码请打开/sdcard/app/libs/AI2D.py查看
     def config_preprocess(self,det,input_image_size=None):
@@ -147,8 +145,29 @@ class FacePoseApp(AIBase):
     # 自定义后处理，results是模型输出的array列表，计算欧拉角
     def postprocess(self,results):
         with ScopedTiming("postprocess",self.debug_mode > 0):
-            R,eular = self.get_euler(results[0][0])
-            return R,eular
+            return self.get_euler_batch(results[0],1)[0]
+
+    # 批量推理，对一帧内的所有人脸框做姿态估计，返回与det_boxes顺序一致的(R,欧拉角)列表
+    def run_batch(self,input_np,det_boxes):
+        self.batch.begin()
+        for det in det_boxes:
+            box=[quantize(v,self.box_step) for v in det[:4]]
+            matrix_dst=self.get_affine_matrix(box)
+            self.batch.add(tuple(box),lambda ai2d,m=matrix_dst:ai2d.set_affine_param(True,nn.interp_method.cv2_bilinear,0, 0, 127, 1,m))
+        results=self.batch.run(input_np)
+        if not results:
+            return []
+        return self.postprocess_batch(results)
+
+    # 批量后处理，results[0]为按人脸堆叠的姿态矩阵
+    def postprocess_batch(self,results):
+        with ScopedTiming("postprocess",self.debug_mode > 0):
+            return self.get_euler_batch(results[0],len(self.batch))
+
+    # 先释放批量推理占用的资源，再释放KPU和Ai2d
+    def deinit(self):
+        self.batch.deinit()
+        super().deinit()
 
     def get_affine_matrix(self,bbox):
         # 获取仿射矩阵，用于将边界框映射到模型输入空间
@@ -175,27 +194,28 @@ class FacePoseApp(AIBase):
             affine_matrix = [scale, 0, cx, 0, scale, cy]
             return affine_matrix
 
-    def rotation_matrix_to_euler_angles(self,R):
-        # 将旋转矩阵（3x3 矩阵）转换为欧拉角（pitch、yaw、roll）
+    # 将整批旋转矩阵转换为欧拉角（pitch、yaw、roll），Rs为(n,9)的数组，每行为按行展开的3x3旋转矩阵
+    def rotation_matrices_to_euler_angles(self,Rs):
+        n=Rs.shape[0]
+        r00,r10,r11,r12,r20,r21,r22=Rs[:,0],Rs[:,3],Rs[:,4],Rs[:,5],Rs[:,6],Rs[:,7],Rs[:,8]
         # 计算 sin(yaw)
-        sy = np.sqrt(R[0, 0] ** 2 + R[1, 0] ** 2)
-        if sy < 1e-6:
-            # 若 sin(yaw) 过小，说明 pitch 接近 ±90 度
-            pitch = np.arctan2(-R[1, 2], R[1, 1]) * 180 / np.pi
-            yaw = np.arctan2(-R[2, 0], sy) * 180 / np.pi
-            roll = 0
-        else:
-            # 计算 pitch、yaw、roll 的角度
-            pitch = np.arctan2(R[2, 1], R[2, 2]) * 180 / np.pi
-            yaw = np.arctan2(-R[2, 0], sy) * 180 / np.pi
-            roll = np.arctan2(R[1, 0], R[0, 0]) * 180 / np.pi
-        return [pitch,yaw,roll]
+        sy = np.sqrt(r00 * r00 + r10 * r10)
+        # 若 sin(yaw) 过小，说明 pitch 接近 ±90 度，此时按另一组元素计算 pitch，roll 为0
+        singular = sy < 1e-6
+        eular = np.zeros((n,3),dtype=np.float)
+        eular[:,0] = np.where(singular,np.arctan2(-r12,r11),np.arctan2(r21,r22)) * 180 / np.pi
+        eular[:,1] = np.arctan2(-r20,sy) * 180 / np.pi
+        eular[:,2] = np.where(singular,np.zeros(n,dtype=np.float),np.arctan2(r10,r00)) * 180 / np.pi
+        return eular
 
-    def get_euler(self,data):
-        # 获取旋转矩阵和欧拉角
-        R = data[:3, :3].copy()
-        eular = self.rotation_matrix_to_euler_angles(R)
-        return R,eular
+    # 获取n个人脸的旋转矩阵和欧拉角，data为按人脸堆叠的姿态矩阵，返回[(R,[pitch,yaw,roll])]
+    def get_euler_batch(self,data,n):
+        Rs = [data[i][:3, :3].copy() for i in range(n)]
+        flat = np.zeros((n,9),dtype=np.float)
+        for i in range(n):
+            flat[i,:] = Rs[i].flatten()
+        eular = self.rotation_matrices_to_euler_angles(flat)
+        return [(Rs[i],[eular[i,0],eular[i,1],eular[i,2]]) for i in range(n)]
 
 # 人脸姿态任务类
 class FacePose:
@@ -223,17 +243,27 @@ class FacePose:
         self.face_det=FaceDetApp(self.face_det_kmodel,model_input_size=self.det_input_size,anchors=self.anchors,confidence_threshold=self.confidence_threshold,nms_threshold=self.nms_threshold,rgb888p_size=self.rgb888p_size,display_size=self.display_size,debug_mode=0)
         self.face_pose=FacePoseApp(self.face_pose_kmodel,model_input_size=self.pose_input_size,rgb888p_size=self.rgb888p_size,display_size=self.display_size)
         self.face_det.config_preprocess()
+        # 立方体模板：后部为边长1的正方形，前部放大sqrt(2)倍并向前平移，按人脸框的(w,h,w)缩放后即为该人脸的立方体
+        factor = np.sqrt(2.0)
+        self.cube_template = np.array([
+            [-0.5, -0.5, 0],
+            [-0.5, 0.5, 0],
+            [0.5, 0.5, 0],
+            [0.5, -0.5, 0],
+            [-0.5 * factor, -0.5 * factor, 0.5 * factor],
+            [-0.5 * factor, 0.5 * factor, 0.5 * factor],
+            [0.5 * factor, 0.5 * factor, 0.5 * factor],
+            [0.5 * factor, -0.5 * factor, 0.5 * factor]
+        ],dtype=np.float)
 
     # run函数
     def run(self,input_np):
         # 人脸检测
         det_boxes=self.face_det.run(input_np)
         pose_res=[]
-        for det_box in det_boxes:
-            # 对检测到的每一个人脸做人脸姿态估计
-            self.face_pose.config_preprocess(det_box)
-            R,eular=self.face_pose.run(input_np)
-            pose_res.append((R,eular))
+        # 对检测到的所有人脸批量做人脸姿态估计
+        if det_boxes:
+            pose_res=self.face_pose.run_batch(input_np,det_boxes)
         return det_boxes,pose_res
 
 
@@ -244,30 +274,27 @@ class FacePose:
             draw_img_np = np.zeros((self.display_size[1],self.display_size[0],4),dtype=np.uint8)
             draw_img=image.Image(self.display_size[0], self.display_size[1], image.ARGB8888,alloc=image.ALLOC_REF,data=draw_img_np)
             line_color = np.array([255, 0, 0 ,255],dtype=np.uint8)    #bgra
+            n = len(dets)
+            # （1）每个人脸占两列：姿态矩阵的x、-y投影方向按人脸框尺寸(w,h,w)缩放，等价于先缩放立方体模板再投影
+            projection = np.zeros((3,2*n),dtype=np.float)
+            center = np.zeros(2*n,dtype=np.float)
             for i,det in enumerate(dets):
-                # （1）获取人脸姿态矩阵和欧拉角
-                projections,center_point = self.build_projection_matrix(det)
-                R,euler = pose_res[i]
-                # （2）遍历人脸投影矩阵的关键点，进行投影，并将结果画在图像上
-                first_points = []
-                second_points = []
-                for pp in range(8):
-                    sum_x, sum_y = 0.0, 0.0
-                    for cc in range(3):
-                        sum_x += projections[pp][cc] * R[cc][0]
-                        sum_y += projections[pp][cc] * (-R[cc][1])
-                    center_x,center_y = center_point[0],center_point[1]
-                    x = (sum_x + center_x) / self.rgb888p_size[0] * self.display_size[0]
-                    y = (sum_y + center_y) / self.rgb888p_size[1] * self.display_size[1]
-                    x = max(0, min(x, self.display_size[0]))
-                    y = max(0, min(y, self.display_size[1]))
-                    if pp < 4:
-                        first_points.append((x, y))
-                    else:
-                        second_points.append((x, y))
-                first_points = np.array(first_points,dtype=np.float)
+                x1, y1, w, h = map(lambda x: int(round(x, 0)), det[:4])
+                R = pose_res[i][0]
+                box_scale = np.array([w, h, w],dtype=np.float)
+                projection[:,2*i] = R[:,0] * box_scale
+                projection[:,2*i+1] = -R[:,1] * box_scale
+                center[2*i] = x1 + w / 2.0
+                center[2*i+1] = y1 + h / 2.0
+            # （2）一次矩阵乘法得到所有人脸立方体8个顶点的投影，整体变换到显示坐标并裁剪
+            display_scale = np.array([self.display_size[0] / self.rgb888p_size[0], self.display_size[1] / self.rgb888p_size[1]] * n,dtype=np.float)
+            display_limit = np.array([self.display_size[0], self.display_size[1]] * n,dtype=np.float)
+            points = np.minimum(np.maximum((np.dot(self.cube_template,projection) + center) * display_scale,0),display_limit)
+            # （3）画出每个人脸的立方体
+            for i in range(n):
+                first_points = points[0:4,2*i:2*i+2].copy()
+                second_points = points[4:8,2*i:2*i+2].copy()
                 aidemo.polylines(draw_img_np,first_points,True,line_color,2,8,0)
-                second_points = np.array(second_points,dtype=np.float)
                 aidemo.polylines(draw_img_np,second_points,True,line_color,2,8,0)
                 for ll in range(4):
                     x0, y0 = int(first_points[ll][0]),int(first_points[ll][1])
@@ -275,49 +302,19 @@ class FacePose:
                     draw_img.draw_line(x0, y0, x1, y1, color = (255, 0, 0 ,255), thickness = 2)
             pl.osd_img.copy_from(draw_img)
 
-    def build_projection_matrix(self,det):
-        x1, y1, w, h = map(lambda x: int(round(x, 0)), det[:4])
-        # 计算边界框中心坐标
-        center_x = x1 + w / 2.0
-        center_y = y1 + h / 2.0
-        # 定义后部（rear）和前部（front）的尺寸和深度
-        rear_width = 0.5 * w
-        rear_height = 0.5 * h
-        rear_depth = 0
-        factor = np.sqrt(2.0)
-        front_width = factor * rear_width
-        front_height = factor * rear_height
-        front_depth = factor * rear_width  # 使用宽度来计算深度，也可以使用高度，取决于需求
-        # 定义立方体的顶点坐标
-        temp = [
-            [-rear_width, -rear_height, rear_depth],
-            [-rear_width, rear_height, rear_depth],
-            [rear_width, rear_height, rear_depth],
-            [rear_width, -rear_height, rear_depth],
-            [-front_width, -front_height, front_depth],
-            [-front_width, front_height, front_depth],
-            [front_width, front_height, front_depth],
-            [front_width, -front_height, front_depth]
-        ]
-        projections = np.array(temp)
-        # 返回投影矩阵和中心坐标
-        return projections, (center_x, center_y)
-
 
-if __name__=="__main__":
-    fpioa = FPIOA()
-    button0 = Button(fpioa, 34, 0)
+# 例程需要的AI输入分辨率，由宿主或run_standalone设置sensor通道2的输出尺寸
+RGB888P_SIZE = [1280, 960]
 
-    # 显示模式，默认"lcd"
-    display_mode="lcd"
-    display_size=[640,480]
+# 例程入口：在已创建的PipeLine上初始化模型，返回HostedDemo，由AI Hub宿主或run_standalone运行和释放
+def start(pl):
+    display_size = pl.display_size
     # 人脸检测模型路径
     face_det_kmodel_path="/sdcard/examples/kmodel/face_detection_320.kmodel"
     # 人脸姿态模型路径
     face_pose_kmodel_path="/sdcard/examples/kmodel/face_pose.kmodel"
     # 其它参数
     anchors_path="/sdcard/examples/utils/prior_data_320.bin"
-    rgb888p_size=[1280,960]
     face_det_input_size=[320,320]
     face_pose_input_size=[120,120]
     confidence_threshold=0.5
@@ -327,38 +324,19 @@ if __name__=="__main__":
     anchors = np.fromfile(anchors_path, dtype=np.float)
     anchors = anchors.reshape((anchor_len,det_dim))
 
-    # 初始化PipeLine，只关注传给AI的图像分辨率，显示的分辨率
-    sensor = Sensor(width=1280, height=960) # 构建摄像头对象
-    pl = PipeLine(rgb888p_size=rgb888p_size, display_size=display_size, display_mode=display_mode)
-    pl.create(sensor=sensor)  # 创建PipeLine实例
-    fp=FacePose(face_det_kmodel_path,face_pose_kmodel_path,det_input_size=face_det_input_size,pose_input_size=face_pose_input_size,anchors=anchors,confidence_threshold=confidence_threshold,nms_threshold=nms_threshold,rgb888p_size=rgb888p_size,display_size=display_size)
-    try:
-        while True:
-            os.exitpoint()
-            with ScopedTiming("total",1):
-                img=pl.get_frame()                      # 获取当前帧
-                det_boxes,pose_res=fp.run(img)          # 推理当前帧
-#                print(det_boxes,pose_res)               # 打印结果
-                fp.draw_result(pl,det_boxes,pose_res)   # 绘制推理效果
-                pl.show_image()                         # 展示推理效果
-                gc.collect()
-            if button0.is_pressing():
-                try:
-                    with open("/sdcard/main.py", "rb") as f:
-                        os.remove("/sdcard/main.py")
-                except Exception as e:
-                    pass
-                with open("/sdcard/CanMV Sample/main.py", "rb") as f:
-                    code_src = f.read()
-                with open("/sdcard/main.py", "wb") as f:
-                    f.write(code_src)
-                machine.reset()
-    except Exception as e:
-        sys.print_exception(e)
-    finally:
+    fp=FacePose(face_det_kmodel_path,face_pose_kmodel_path,det_input_size=face_det_input_size,pose_input_size=face_pose_input_size,anchors=anchors,confidence_threshold=confidence_threshold,nms_threshold=nms_threshold,rgb888p_size=RGB888P_SIZE,display_size=display_size)
+
+    # 逐帧处理：推理并绘制结果，取帧和送显由HostedDemo完成
+    def frame(img):
+        det_boxes,pose_res=fp.run(img)          # 推理当前帧
+#        print(det_boxes,pose_res)               # 打印结果
+        fp.draw_result(pl,det_boxes,pose_res)   # 绘制推理效果
+
+    def release():
         fp.face_det.deinit()
         fp.face_pose.deinit()
-        pl.destroy()
-
 
+    return HostedDemo(pl, release, frame_func=frame)
 
+if __name__=="__main__":
+    run_standalone(start, RGB888P_SIZE)
@@ -37,19 +37,14 @@ import machine
 from machine import Pin
 from machine import FPIOA
 
-class Button():
-    def __init__(self, fpioa, pinx, valid=0):
-        fpioa.set_function(pinx, fpioa.GPIO0 + pinx)
-
-        pull = Pin.PULL_UP if valid == 0 else Pin.PULL_DOWN
-        self.pin = Pin(pinx, Pin.IN, pull=pull, drive=7)
-        self.valid = valid
-
-    def is_pressing(self):
-        return True if self.pin.value() == self.valid else False
+sys.path.append("/sdcard/CanMV Sample/APP/AI Hub")  # AI Hub公共模块所在目录
+from hub_libs.pipeline_runner import PipelineRunner
+from hub_libs.tracker import TrackedDetector
+from hub_libs.demo_host import HostedDemo, run_standalone
+from hub_libs.model_cache import CachedAIBase
 
 # 自定义跌倒检测类，继承自AIBase基类
-class FallDetectionApp(AIBase):
+class FallDetectionApp(CachedAIBase):
     def __init__(self, kmodel_path, model_input_size, labels, anchors, confidence_threshold=0.2, nms_threshold=0.5, nms_option=False, strides=[8,16,32], rgb888p_size=[224,224], display_size=[1920,1080], debug_mode=0):
         super().__init__(kmodel_path, model_input_size, rgb888p_size, debug_mode)  # 调用基类的构造函数
         self.kmodel_path = kmodel_path                      # 模型文件路径
@@ -100,7 +95,7 @@ class FallDetectionApp(AIBase):
                     y2 = int(y2 * self.display_size[1] // self.rgb888p_size[1])
                     # 绘制矩形框和类别标签
                     pl.osd_img.draw_rectangle(x1, y1, int(w), int(h), color=self.color[det_box[0]], thickness=2)
-                    pl.osd_img.draw_string_advanced(x1, y1-50, 32," " + self.labels[det_box[0]] + " " + str(round(det_box[1],2)), color=self.color[det_box[0]])
+                    pl.osd_img.draw_string_advanced(x1, y1-50, 32," " + self.labels[det_box[0]] + " " + str(round(det_box[1],2)) + (" #" + str(det_box[6]) if len(det_box) > 6 else ""), color=self.color[det_box[0]])
             else:
                 pl.osd_img.clear()
 
@@ -126,53 +121,36 @@ class FallDetectionApp(AIBase):
         right = int(round(dw - 0.1))
         return top, bottom, left, right
 
-if __name__ == "__main__":
-    fpioa = FPIOA()
-    button0 = Button(fpioa, 34, 0)
+# 例程需要的AI输入分辨率，由宿主或run_standalone设置sensor通道2的输出尺寸
+RGB888P_SIZE = [1280, 960]
 
-    # 显示模式，默认"lcd"
-    display_mode="lcd"
-    display_size=[640,480]
+# 例程入口：在已创建的PipeLine上初始化模型，返回HostedDemo，由AI Hub宿主或run_standalone运行和释放
+def start(pl):
+    display_size = pl.display_size
     # 设置模型路径和其他参数
     kmodel_path = "/sdcard/examples/kmodel/yolov5n-falldown.kmodel"
     confidence_threshold = 0.3
     nms_threshold = 0.45
-    rgb888p_size = [1280, 960]
     labels = ["Fall","NoFall"]  # 模型输出类别名称
     anchors = [10, 13, 16, 30, 33, 23, 30, 61, 62, 45, 59, 119, 116, 90, 156, 198, 373, 326]  # anchor设置
 
-    # 初始化PipeLine
-    sensor = Sensor(width=1280, height=960) # 构建摄像头对象
-    pl = PipeLine(rgb888p_size=rgb888p_size, display_size=display_size, display_mode=display_mode)
-    pl.create(sensor=sensor)  # 创建PipeLine实例
     # 初始化自定义跌倒检测实例
-    fall_det = FallDetectionApp(kmodel_path, model_input_size=[640, 640], labels=labels, anchors=anchors, confidence_threshold=confidence_threshold, nms_threshold=nms_threshold, nms_option=False, strides=[8,16,32], rgb888p_size=rgb888p_size, display_size=display_size, debug_mode=0)
+    fall_det = FallDetectionApp(kmodel_path, model_input_size=[640, 640], labels=labels, anchors=anchors, confidence_threshold=confidence_threshold, nms_threshold=nms_threshold, nms_option=False, strides=[8,16,32], rgb888p_size=RGB888P_SIZE, display_size=display_size, debug_mode=0)
     fall_det.config_preprocess()
-    try:
-        while True:
-            os.exitpoint()                                  # 检查是否有退出信号
-            with ScopedTiming("total",1):
-                img = pl.get_frame()                        # 获取当前帧数据
-                res = fall_det.run(img)                     # 推理当前帧
-#                print(res)                                  # 打印结果
-                fall_det.draw_result(pl, res)               # 绘制结果到PipeLine的osd图像
-                pl.show_image()                             # 显示当前的绘制结果
-                gc.collect()                                # 垃圾回收
-            if button0.is_pressing():
-                try:
-                    with open("/sdcard/main.py", "rb") as f:
-                        os.remove("/sdcard/main.py")
-                except Exception as e:
-                    pass
-                with open("/sdcard/CanMV Sample/main.py", "rb") as f:
-                    code_src = f.read()
-                with open("/sdcard/main.py", "wb") as f:
-                    f.write(code_src)
-                machine.reset()
-    except Exception as e:
-        sys.print_exception(e)                              # 打印异常信息
-    finally:
+    # 流水线运行器，pipeline_mode为False时按原例程的串行方式运行，便于对比帧率和各阶段占用率
+    pipeline_mode = True
+    # 间隔检测+跟踪：检测间隔根据实测帧耗时在1~8帧之间自适应，画面运动较大时立即重新检测
+    tracked = TrackedDetector(fall_det,
+                              to_xyxy=lambda d: [d[2], d[3], d[4], d[5], d[1], d[0]],
+                              from_xyxy=lambda r: [int(r[5]), r[4], r[0], r[1], r[2], r[3], r[6]],
+                              target_fps=30)
+    runner = PipelineRunner(pl, fall_det, infer_func=tracked.run, render_func=lambda dets: fall_det.draw_result(pl, dets))
+
+    def release():
+        tracked.deinit()
         fall_det.deinit()                                   # 反初始化
-        pl.destroy()                                        # 销毁PipeLine实例
 
+    return HostedDemo(pl, release, runner=runner, pipelined=pipeline_mode)
 
+if __name__ == "__main__":
+    run_standalone(start, RGB888P_SIZE)
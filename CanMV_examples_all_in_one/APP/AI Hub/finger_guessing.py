@@ -38,19 +38,14 @@ import machine
 from machine import Pin
 from machine import FPIOA
 
-class Button():
-    def __init__(self, fpioa, pinx, valid=0):
-        fpioa.set_function(pinx, fpioa.GPIO0 + pinx)
-
-        pull = Pin.PULL_UP if valid == 0 else Pin.PULL_DOWN
-        self.pin = Pin(pinx, Pin.IN, pull=pull, drive=7)
-        self.valid = valid
-
-    def is_pressing(self):
-        return True if self.pin.value() == self.valid else False
+sys.path.append("/sdcard/CanMV Sample/APP/AI Hub")  # AI Hub公共模块所在目录
+from hub_libs.demo_host import HostedDemo, run_standalone
+from hub_libs.model_cache import CachedAIBase
+from hub_libs.gesture import GESTURE_CLASSIFIER
+from hub_libs.sprite_pack import SPRITE_PACK
 
 # 自定义手掌检测任务类
-class HandDetApp(AIBase):
+class HandDetApp(CachedAIBase):
     def __init__(self,kmodel_path,labels,model_input_size,anchors,confidence_threshold=0.2,nms_threshold=0.5,nms_option=False, strides=[8,16,32],rgb888p_size=[1920,1080],display_size=[1920,1080],debug_mode=0):
         super().__init__(kmodel_path,model_input_size,rgb888p_size,debug_mode)
         # kmodel路径
@@ -123,7 +118,7 @@ class HandDetApp(AIBase):
         return top, bottom, left, right
 
 # 自定义手势关键点分类任务类
-class HandKPClassApp(AIBase):
+class HandKPClassApp(CachedAIBase):
     def __init__(self,kmodel_path,model_input_size,rgb888p_size=[1920,1080],display_size=[1920,1080],debug_mode=0):
         super().__init__(kmodel_path,model_input_size,rgb888p_size,debug_mode)
         # kmodel路径
@@ -161,7 +156,7 @@ class HandKPClassApp(AIBase):
             results_show = np.zeros(results.shape,dtype=np.int16)
             results_show[0::2] = results[0::2] * self.crop_params[3] + self.crop_params[0]
             results_show[1::2] = results[1::2] * self.crop_params[2] + self.crop_params[1]
-            gesture=self.hk_gesture(results_show)
+            gesture=GESTURE_CLASSIFIER.classify(results_show)[0]
             results_show[0::2] = results_show[0::2] * (self.display_size[0] / self.rgb888p_size[0])
             results_show[1::2] = results_show[1::2] * (self.display_size[1] / self.rgb888p_size[1])
             return results_show,gesture
@@ -186,46 +181,6 @@ class HandKPClassApp(AIBase):
         h_kp = int(y2_kp - y1_kp + 1)
         return [x1_kp, y1_kp, w_kp, h_kp]
 
-    # 求两个vector之间的夹角
-    def hk_vector_2d_angle(self,v1,v2):
-        with ScopedTiming("hk_vector_2d_angle",self.debug_mode > 0):
-            v1_x,v1_y,v2_x,v2_y = v1[0],v1[1],v2[0],v2[1]
-            v1_norm = np.sqrt(v1_x * v1_x+ v1_y * v1_y)
-            v2_norm = np.sqrt(v2_x * v2_x + v2_y * v2_y)
-            dot_product = v1_x * v2_x + v1_y * v2_y
-            cos_angle = dot_product/(v1_norm*v2_norm)
-            angle = np.acos(cos_angle)*180/np.pi
-            return angle
-
-    # 根据手掌关键点检测结果判断手势类别
-    def hk_gesture(self,results):
-        with ScopedTiming("hk_gesture",self.debug_mode > 0):
-            angle_list = []
-            for i in range(5):
-                angle = self.hk_vector_2d_angle([(results[0]-results[i*8+4]), (results[1]-results[i*8+5])],[(results[i*8+6]-results[i*8+8]),(results[i*8+7]-results[i*8+9])])
-                angle_list.append(angle)
-            thr_angle,thr_angle_thumb,thr_angle_s,gesture_str = 65.,53.,49.,None
-            if 65535. not in angle_list:
-                if (angle_list[0]>thr_angle_thumb)  and (angle_list[1]>thr_angle) and (angle_list[2]>thr_angle) and (angle_list[3]>thr_angle) and (angle_list[4]>thr_angle):
-                    gesture_str = "fist"
-                elif (angle_list[0]<thr_angle_s)  and (angle_list[1]<thr_angle_s) and (angle_list[2]<thr_angle_s) and (angle_list[3]<thr_angle_s) and (angle_list[4]<thr_angle_s):
-                    gesture_str = "five"
-                elif (angle_list[0]<thr_angle_s)  and (angle_list[1]<thr_angle_s) and (angle_list[2]>thr_angle) and (angle_list[3]>thr_angle) and (angle_list[4]>thr_angle):
-                    gesture_str = "gun"
-                elif (angle_list[0]<thr_angle_s)  and (angle_list[1]<thr_angle_s) and (angle_list[2]>thr_angle) and (angle_list[3]>thr_angle) and (angle_list[4]<thr_angle_s):
-                    gesture_str = "love"
-                elif (angle_list[0]>5)  and (angle_list[1]<thr_angle_s) and (angle_list[2]>thr_angle) and (angle_list[3]>thr_angle) and (angle_list[4]>thr_angle):
-                    gesture_str = "one"
-                elif (angle_list[0]<thr_angle_s)  and (angle_list[1]>thr_angle) and (angle_list[2]>thr_angle) and (angle_list[3]>thr_angle) and (angle_list[4]<thr_angle_s):
-                    gesture_str = "six"
-                elif (angle_list[0]>thr_angle_thumb)  and (angle_list[1]<thr_angle_s) and (angle_list[2]<thr_angle_s) and (angle_list[3]<thr_angle_s) and (angle_list[4]>thr_angle):
-                    gesture_str = "three"
-                elif (angle_list[0]<thr_angle_s)  and (angle_list[1]>thr_angle) and (angle_list[2]>thr_angle) and (angle_list[3]>thr_angle) and (angle_list[4]>thr_angle):
-                    gesture_str = "thumbUp"
-                elif (angle_list[0]>thr_angle_thumb)  and (angle_list[1]<thr_angle_s) and (angle_list[2]<thr_angle_s) and (angle_list[3]>thr_angle) and (angle_list[4]>thr_angle):
-                    gesture_str = "yeah"
-            return gesture_str
-
 # 猜拳游戏任务类
 class FingerGuess:
     def __init__(self,hand_det_kmodel,hand_kp_kmodel,det_input_size,kp_input_size,labels,anchors,confidence_threshold=0.25,nms_threshold=0.3,nms_option=False,strides=[8,16,32],guess_mode=3,rgb888p_size=[1280,720],display_size=[1920,1080],debug_mode=0):
@@ -256,9 +211,14 @@ class FingerGuess:
         self.debug_mode=debug_mode
         self.guess_mode=guess_mode
         # 石头剪刀布的贴图array
-        self.five_image = self.read_file("/sdcard/examples/utils/five.bin")
-        self.fist_image = self.read_file("/sdcard/examples/utils/fist.bin")
-        self.shear_image = self.read_file("/sdcard/examples/utils/shear.bin")
+        sprites = SPRITE_PACK.load_sprites("finger_guessing", {
+            "five": ((400,400,4), "/sdcard/examples/utils/five.bin"),
+            "fist": ((400,400,4), "/sdcard/examples/utils/fist.bin"),
+            "shear": ((400,400,4), "/sdcard/examples/utils/shear.bin"),
+        })
+        self.five_image = sprites["five"]
+        self.fist_image = sprites["fist"]
+        self.shear_image = sprites["shear"]
         self.counts_guess = -1                                                               # 猜拳次数 计数
         self.player_win = 0                                                                  # 玩家 赢次计数
         self.k230_win = 0                                                                    # k230 赢次计数
@@ -373,27 +333,19 @@ class FingerGuess:
                         draw_img.draw_string_advanced(self.display_size[0]//2-50,self.display_size[1]//2-50,60,"第" + str(self.counts_guess+1) + "回合", color=(255,255,0,0))
             pl.osd_img.copy_from(draw_img)
 
-    # 读取石头剪刀布的bin文件方法
-    def read_file(self,file_name):
-        image_arr = np.fromfile(file_name,dtype=np.uint8)
-        image_arr = image_arr.reshape((400,400,4))
-        return image_arr
-
 
-if __name__=="__main__":
-    fpioa = FPIOA()
-    button0 = Button(fpioa, 34, 0)
+# 例程需要的AI输入分辨率，由宿主或run_standalone设置sensor通道2的输出尺寸
+RGB888P_SIZE = [1024, 768]
 
-    # 显示模式，默认"lcd"
-    display_mode="lcd"
-    display_size=[640,480]
+# 例程入口：在已创建的PipeLine上初始化模型，返回HostedDemo，由AI Hub宿主或run_standalone运行和释放
+def start(pl):
+    display_size = pl.display_size
     # 手掌检测模型路径
     hand_det_kmodel_path="/sdcard/examples/kmodel/hand_det.kmodel"
     # 手掌关键点模型路径
     hand_kp_kmodel_path="/sdcard/examples/kmodel/handkp_det.kmodel"
     # 其它参数
     anchors_path="/sdcard/examples/utils/prior_data_320.bin"
-    rgb888p_size=[1024,768]
     hand_det_input_size=[512,512]
     hand_kp_input_size=[256,256]
     confidence_threshold=0.2
@@ -403,38 +355,19 @@ if __name__=="__main__":
     # 猜拳模式  0 玩家稳赢 ， 1 玩家必输 ， n > 2 多局多胜
     guess_mode = 3
 
-    # 初始化PipeLine，只关注传给AI的图像分辨率，显示的分辨率
-    sensor = Sensor(width=1280, height=960) # 构建摄像头对象
-    pl = PipeLine(rgb888p_size=rgb888p_size, display_size=display_size, display_mode=display_mode)
-    pl.create(sensor=sensor)  # 创建PipeLine实例
-    hkc=FingerGuess(hand_det_kmodel_path,hand_kp_kmodel_path,det_input_size=hand_det_input_size,kp_input_size=hand_kp_input_size,labels=labels,anchors=anchors,confidence_threshold=confidence_threshold,nms_threshold=nms_threshold,nms_option=False,strides=[8,16,32],guess_mode=guess_mode,rgb888p_size=rgb888p_size,display_size=display_size)
-    try:
-        while True:
-            os.exitpoint()
-            with ScopedTiming("total",1):
-                img=pl.get_frame()                          # 获取当前帧
-                det_boxes,gesture_res=hkc.run(img)          # 推理当前帧
-#                print(det_boxes, gesture_res)               # 打印结果
-                hkc.draw_result(pl,det_boxes,gesture_res)   # 绘制推理结果
-                pl.show_image()                             # 展示推理结果
-                gc.collect()
-            if button0.is_pressing():
-                try:
-                    with open("/sdcard/main.py", "rb") as f:
-                        os.remove("/sdcard/main.py")
-                except Exception as e:
-                    pass
-                with open("/sdcard/CanMV Sample/main.py", "rb") as f:
-                    code_src = f.read()
-                with open("/sdcard/main.py", "wb") as f:
-                    f.write(code_src)
-                machine.reset()
-    except Exception as e:
-        sys.print_exception(e)
-    finally:
+    hkc=FingerGuess(hand_det_kmodel_path,hand_kp_kmodel_path,det_input_size=hand_det_input_size,kp_input_size=hand_kp_input_size,labels=labels,anchors=anchors,confidence_threshold=confidence_threshold,nms_threshold=nms_threshold,nms_option=False,strides=[8,16,32],guess_mode=guess_mode,rgb888p_size=RGB888P_SIZE,display_size=display_size)
+
+    # 逐帧处理：推理并绘制结果，取帧和送显由HostedDemo完成
+    def frame(img):
+        det_boxes,gesture_res=hkc.run(img)          # 推理当前帧
+#        print(det_boxes, gesture_res)               # 打印结果
+        hkc.draw_result(pl,det_boxes,gesture_res)   # 绘制推理结果
+
+    def release():
         hkc.hand_det.deinit()
         hkc.hand_kp.deinit()
-        pl.destroy()
-
 
+    return HostedDemo(pl, release, frame_func=frame)
 
+if __name__=="__main__":
+    run_standalone(start, RGB888P_SIZE)
@@ -37,19 +37,14 @@ import machine
 from machine import Pin
 from machine import FPIOA
 
-class Button():
-    def __init__(self, fpioa, pinx, valid=0):
-        fpioa.set_function(pinx, fpioa.GPIO0 + pinx)
-
-        pull = Pin.PULL_UP if valid == 0 else Pin.PULL_DOWN
-        self.pin = Pin(pinx, Pin.IN, pull=pull, drive=7)
-        self.valid = valid
-
-    def is_pressing(self):
-        return True if self.pin.value() == self.valid else False
+sys.path.append("/sdcard/CanMV Sample/APP/AI Hub")  # AI Hub公共模块所在目录
+from hub_libs.batch_infer import BatchSecondStage, quantize_crop
+from hub_libs.demo_host import HostedDemo, run_standalone
+from hub_libs.model_cache import CachedAIBase
+from hub_libs.gesture import GESTURE_CLASSIFIER
 
 # 自定义手掌检测任务类
-class HandDetApp(AIBase):
+class HandDetApp(CachedAIBase):
     def __init__(self,kmodel_path,labels,model_input_size,anchors,confidence_threshold=0.2,nms_threshold=0.5,nms_option=False, strides=[8,16,32],rgb888p_size=[1920,1080],display_size=[1920,1080],debug_mode=0):
         super().__init__(kmodel_path,model_input_size,rgb888p_size,debug_mode)
         # kmodel路径
@@ -125,7 +120,7 @@ class HandDetApp(AIBase):
         return top, bottom, left, right
 
 # 自定义手势关键点分类任务类
-class HandKPClassApp(AIBase):
+class HandKPClassApp(CachedAIBase):
     def __init__(self,kmodel_path,model_input_size,rgb888p_size=[1920,1080],display_size=[1920,1080],debug_mode=0):
         super().__init__(kmodel_path,model_input_size,rgb888p_size,debug_mode)
         # kmodel路径
@@ -143,6 +138,10 @@ class HandKPClassApp(AIBase):
         self.ai2d=Ai2d(debug_mode)
         # 设置ai2d的输入输出的格式和数据类型
         self.ai2d.set_ai2d_dtype(nn.ai2d_format.NCHW_FMT,nn.ai2d_format.NCHW_FMT,np.uint8, np.uint8)
+        # 裁剪参数的量化步长，手掌轻微移动时复用已缓存的预处理builder
+        self.crop_step=8
+        # 批量推理，一帧内所有手掌共用一次输入tensor和固定的槽位tensor
+        self.batch=BatchSecondStage(self.kpu,self.rgb888p_size,self.model_input_size,debug_mode=debug_mode)
 
     # 配置预处理操作，这里使用了crop和resize，Ai2d支持crop/shift/pad/resize/affine，具体代码请打开/sdcard/app/libs/AI2D.py查看
     def config_preprocess(self,det,input_image_size=None):
@@ -160,11 +159,48 @@ class HandKPClassApp(AIBase):
             results_show = np.zeros(results.shape,dtype=np.int16)
             results_show[0::2] = results[0::2] * self.crop_params[3] + self.crop_params[0]
             results_show[1::2] = results[1::2] * self.crop_params[2] + self.crop_params[1]
-            gesture=self.hk_gesture(results_show)
+            gesture=GESTURE_CLASSIFIER.classify(results_show)[0]
             results_show[0::2] = results_show[0::2] * (self.display_size[0] / self.rgb888p_size[0])
             results_show[1::2] = results_show[1::2] * (self.display_size[1] / self.rgb888p_size[1])
             return results_show,gesture
 
+    # 批量推理，对一帧内的所有手掌框做关键点检测，返回与det_boxes顺序一致的(关键点,手势)列表
+    def run_batch(self,input_np,det_boxes):
+        self.batch.begin()
+        crops=[]
+        for det_box in det_boxes:
+            crop=quantize_crop(self.get_crop_param(det_box),self.crop_step,self.rgb888p_size[0],self.rgb888p_size[1])
+            crops.append(crop)
+            self.batch.add(tuple(crop),lambda ai2d,c=crop:self.config_crop(ai2d,c))
+        results=self.batch.run(input_np)
+        if not results:
+            return []
+        return self.postprocess_batch(results,crops)
+
+    # 批量推理使用的预处理配置，ai2d为nncase_runtime的ai2d对象
+    def config_crop(self,ai2d,crop):
+        ai2d.set_crop_param(True,crop[0],crop[1],crop[2],crop[3])
+        ai2d.set_resize_param(True,nn.interp_method.tf_bilinear,nn.interp_mode.half_pixel)
+
+    # 批量后处理，results[0]为(N,42)的关键点输出，整批一起映射回原图坐标和显示坐标
+    def postprocess_batch(self,results,crops):
+        with ScopedTiming("postprocess",self.debug_mode > 0):
+            n=len(crops)
+            kps=results[0].reshape((n,results[0].size//n))
+            crops=np.array(crops,dtype=np.float)
+            results_show=np.zeros(kps.shape,dtype=np.int16)
+            results_show[:,0::2]=kps[:,0::2]*crops[:,3:4]+crops[:,0:1]
+            results_show[:,1::2]=kps[:,1::2]*crops[:,2:3]+crops[:,1:2]
+            gestures=GESTURE_CLASSIFIER.classify(results_show)
+            results_show[:,0::2]=results_show[:,0::2]*(self.display_size[0]/self.rgb888p_size[0])
+            results_show[:,1::2]=results_show[:,1::2]*(self.display_size[1]/self.rgb888p_size[1])
+            return [(results_show[i],gestures[i]) for i in range(n)]
+
+    # 先释放批量推理占用的资源，再释放KPU和Ai2d
+    def deinit(self):
+        self.batch.deinit()
+        super().deinit()
+
     # 计算crop参数
     def get_crop_param(self,det_box):
         x1, y1, x2, y2 = det_box[2],det_box[3],det_box[4],det_box[5]
@@ -185,46 +221,6 @@ class HandKPClassApp(AIBase):
         h_kp = int(y2_kp - y1_kp + 1)
         return [x1_kp, y1_kp, w_kp, h_kp]
 
-    # 求两个vector之间的夹角
-    def hk_vector_2d_angle(self,v1,v2):
-        with ScopedTiming("hk_vector_2d_angle",self.debug_mode > 0):
-            v1_x,v1_y,v2_x,v2_y = v1[0],v1[1],v2[0],v2[1]
-            v1_norm = np.sqrt(v1_x * v1_x+ v1_y * v1_y)
-            v2_norm = np.sqrt(v2_x * v2_x + v2_y * v2_y)
-            dot_product = v1_x * v2_x + v1_y * v2_y
-            cos_angle = dot_product/(v1_norm*v2_norm)
-            angle = np.acos(cos_angle)*180/np.pi
-            return angle
-
-    # 根据手掌关键点检测结果判断手势类别
-    def hk_gesture(self,results):
-        with ScopedTiming("hk_gesture",self.debug_mode > 0):
-            angle_list = []
-            for i in range(5):
-                angle = self.hk_vector_2d_angle([(results[0]-results[i*8+4]), (results[1]-results[i*8+5])],[(results[i*8+6]-results[i*8+8]),(results[i*8+7]-results[i*8+9])])
-                angle_list.append(angle)
-            thr_angle,thr_angle_thumb,thr_angle_s,gesture_str = 65.,53.,49.,None
-            if 65535. not in angle_list:
-                if (angle_list[0]>thr_angle_thumb)  and (angle_list[1]>thr_angle) and (angle_list[2]>thr_angle) and (angle_list[3]>thr_angle) and (angle_list[4]>thr_angle):
-                    gesture_str = "fist"
-                elif (angle_list[0]<thr_angle_s)  and (angle_list[1]<thr_angle_s) and (angle_list[2]<thr_angle_s) and (angle_list[3]<thr_angle_s) and (angle_list[4]<thr_angle_s):
-                    gesture_str = "five"
-                elif (angle_list[0]<thr_angle_s)  and (angle_list[1]<thr_angle_s) and (angle_list[2]>thr_angle) and (angle_list[3]>thr_angle) and (angle_list[4]>thr_angle):
-                    gesture_str = "gun"
-                elif (angle_list[0]<thr_angle_s)  and (angle_list[1]<thr_angle_s) and (angle_list[2]>thr_angle) and (angle_list[3]>thr_angle) and (angle_list[4]<thr_angle_s):
-                    gesture_str = "love"
-                elif (angle_list[0]>5)  and (angle_list[1]<thr_angle_s) and (angle_list[2]>thr_angle) and (angle_list[3]>thr_angle) and (angle_list[4]>thr_angle):
-                    gesture_str = "one"
-                elif (angle_list[0]<thr_angle_s)  and (angle_list[1]>thr_angle) and (angle_list[2]>thr_angle) and (angle_list[3]>thr_angle) and (angle_list[4]<thr_angle_s):
-                    gesture_str = "six"
-                elif (angle_list[0]>thr_angle_thumb)  and (angle_list[1]<thr_angle_s) and (angle_list[2]<thr_angle_s) and (angle_list[3]<thr_angle_s) and (angle_list[4]>thr_angle):
-                    gesture_str = "three"
-                elif (angle_list[0]<thr_angle_s)  and (angle_list[1]>thr_angle) and (angle_list[2]>thr_angle) and (angle_list[3]>thr_angle) and (angle_list[4]>thr_angle):
-                    gesture_str = "thumbUp"
-                elif (angle_list[0]>thr_angle_thumb)  and (angle_list[1]<thr_angle_s) and (angle_list[2]<thr_angle_s) and (angle_list[3]>thr_angle) and (angle_list[4]>thr_angle):
-                    gesture_str = "yeah"
-            return gesture_str
-
 # 手掌关键点分类任务
 class HandKeyPointClass:
     def __init__(self,hand_det_kmodel,hand_kp_kmodel,det_input_size,kp_input_size,labels,anchors,confidence_threshold=0.25,nms_threshold=0.3,nms_option=False,strides=[8,16,32],rgb888p_size=[1280,720],display_size=[1920,1080],debug_mode=0):
@@ -262,7 +258,7 @@ class HandKeyPointClass:
         boxes=[]
         gesture_res=[]
         for det_box in det_boxes:
-            # 对于检测到的每一个手掌执行关键点识别
+            # 过滤掉太小或者位置不合理的手掌框
             x1, y1, x2, y2 = det_box[2],det_box[3],det_box[4],det_box[5]
             w,h= int(x2 - x1),int(y2 - y1)
             if (h<(0.1*self.rgb888p_size[1])):
@@ -271,10 +267,10 @@ class HandKeyPointClass:
                 continue
             if (w<(0.15*self.rgb888p_size[0]) and ((x1<(0.01*self.rgb888p_size[0])) or (x2>(0.99*self.rgb888p_size[0])))):
                 continue
-            self.hand_kp.config_preprocess(det_box)
-            results_show,gesture=self.hand_kp.run(input_np)
-            gesture_res.append((results_show,gesture))
             boxes.append(det_box)
+        # 对所有手掌批量执行关键点检测和手势分类
+        if boxes:
+            gesture_res=self.hand_kp.run_batch(input_np,boxes)
         return boxes,gesture_res
 
     # 绘制效果，绘制关键点、手掌检测框和识别结果
@@ -322,20 +318,18 @@ class HandKeyPointClass:
 
 
 
-if __name__=="__main__":
-    fpioa = FPIOA()
-    button0 = Button(fpioa, 34, 0)
+# 例程需要的AI输入分辨率，由宿主或run_standalone设置sensor通道2的输出尺寸
+RGB888P_SIZE = [1280, 960]
 
-    # 显示模式，默认"lcd"
-    display_mode="lcd"
-    display_size=[640,480]
+# 例程入口：在已创建的PipeLine上初始化模型，返回HostedDemo，由AI Hub宿主或run_standalone运行和释放
+def start(pl):
+    display_size = pl.display_size
     # 手掌检测模型路径
     hand_det_kmodel_path="/sdcard/examples/kmodel/hand_det.kmodel"
     # 手掌关键点模型路径
     hand_kp_kmodel_path="/sdcard/examples/kmodel/handkp_det.kmodel"
     # 其他参数
     anchors_path="/sdcard/examples/utils/prior_data_320.bin"
-    rgb888p_size=[1280,960]
     hand_det_input_size=[512,512]
     hand_kp_input_size=[256,256]
     confidence_threshold=0.2
@@ -343,39 +337,19 @@ if __name__=="__main__":
     labels=["hand"]
     anchors = [26,27, 53,52, 75,71, 80,99, 106,82, 99,134, 140,113, 161,172, 245,276]
 
-    # 初始化PipeLine，只关注传给AI的图像分辨率，显示的分辨率
-    sensor = Sensor(width=1280, height=960) # 构建摄像头对象
-    pl = PipeLine(rgb888p_size=rgb888p_size, display_size=display_size, display_mode=display_mode)
-    pl.create(sensor=sensor)  # 创建PipeLine实例
-    hkc=HandKeyPointClass(hand_det_kmodel_path,hand_kp_kmodel_path,det_input_size=hand_det_input_size,kp_input_size=hand_kp_input_size,labels=labels,anchors=anchors,confidence_threshold=confidence_threshold,nms_threshold=nms_threshold,nms_option=False,strides=[8,16,32],rgb888p_size=rgb888p_size,display_size=display_size)
-    try:
-        while True:
-            os.exitpoint()
-            with ScopedTiming("total",1):
-                img=pl.get_frame()                          # 获取当前帧
-                det_boxes,gesture_res=hkc.run(img)          # 推理当前帧
-#                print(det_boxes, gesture_res)               # 打印结果
-                hkc.draw_result(pl,det_boxes,gesture_res)   # 绘制当前帧推理结果
-                pl.show_image()                             # 展示推理结果
-                gc.collect()
-            if button0.is_pressing():
-                try:
-                    with open("/sdcard/main.py", "rb") as f:
-                        os.remove("/sdcard/main.py")
-                except Exception as e:
-                    pass
-                with open("/sdcard/CanMV Sample/main.py", "rb") as f:
-                    code_src = f.read()
-                with open("/sdcard/main.py", "wb") as f:
-                    f.write(code_src)
-                machine.reset()
-    except Exception as e:
-        sys.print_exception(e)
-    finally:
-        hkc.hand_det.deinit()
-        hkc.hand_kp.deinit()
-        pl.destroy()
+    hkc=HandKeyPointClass(hand_det_kmodel_path,hand_kp_kmodel_path,det_input_size=hand_det_input_size,kp_input_size=hand_kp_input_size,labels=labels,anchors=anchors,confidence_threshold=confidence_threshold,nms_threshold=nms_threshold,nms_option=False,strides=[8,16,32],rgb888p_size=RGB888P_SIZE,display_size=display_size)
 
+    # 逐帧处理：推理并绘制结果，取帧和送显由HostedDemo完成
+    def frame(img):
+        det_boxes,gesture_res=hkc.run(img)          # 推理当前帧
+#        print(det_boxes, gesture_res)               # 打印结果
+        hkc.draw_result(pl,det_boxes,gesture_res)   # 绘制当前帧推理结果
 
+    def release():
+        hkc.hand_det.deinit()
+        hkc.hand_kp.deinit()
 
+    return HostedDemo(pl, release, frame_func=frame)
 
+if __name__=="__main__":
+    run_standalone(start, RGB888P_SIZE)
@@ -37,19 +37,15 @@ import machine
 from machine import Pin
 from machine import FPIOA
 
-class Button():
-    def __init__(self, fpioa, pinx, valid=0):
-        fpioa.set_function(pinx, fpioa.GPIO0 + pinx)
-
-        pull = Pin.PULL_UP if valid == 0 else Pin.PULL_DOWN
-        self.pin = Pin(pinx, Pin.IN, pull=pull, drive=7)
-        self.valid = valid
-
-    def is_pressing(self):
-        return True if self.pin.value() == self.valid else False
+sys.path.append("/sdcard/CanMV Sample/APP/AI Hub")  # AI Hub公共模块所在目录
+from hub_libs.batch_infer import BatchSecondStage, quantize_crop
+from hub_libs.pipeline_runner import PipelineRunner
+from hub_libs.resolution import ResolutionController
+from hub_libs.demo_host import HostedDemo, run_standalone
+from hub_libs.model_cache import CachedAIBase
 
 # 自定义手掌检测任务类
-class HandDetApp(AIBase):
+class HandDetApp(CachedAIBase):
     def __init__(self,kmodel_path,model_input_size,anchors,confidence_threshold=0.2,nms_threshold=0.5,nms_option=False, strides=[8,16,32],rgb888p_size=[1920,1080],display_size=[1920,1080],debug_mode=0):
         super().__init__(kmodel_path,model_input_size,rgb888p_size,debug_mode)
         # kmodel路径
@@ -124,7 +120,7 @@ class HandDetApp(AIBase):
         return top, bottom, left, right
 
 # 自定义手势识别任务类
-class HandRecognitionApp(AIBase):
+class HandRecognitionApp(CachedAIBase):
     def __init__(self,kmodel_path,model_input_size,labels,rgb888p_size=[1920,1080],display_size=[1920,1080],debug_mode=0):
         super().__init__(kmodel_path,model_input_size,rgb888p_size,debug_mode)
         # kmodel路径
@@ -143,6 +139,10 @@ class HandRecognitionApp(AIBase):
         self.ai2d=Ai2d(debug_mode)
         # 设置ai2d的输入输出的格式和数据类型
         self.ai2d.set_ai2d_dtype(nn.ai2d_format.NCHW_FMT,nn.ai2d_format.NCHW_FMT,np.uint8, np.uint8)
+        # 裁剪参数的量化步长，手掌轻微移动时复用已缓存的预处理builder
+        self.crop_step=8
+        # 批量推理，一帧内所有手掌共用一次输入tensor和固定的槽位tensor
+        self.batch=BatchSecondStage(self.kpu,self.rgb888p_size,self.model_input_size,debug_mode=debug_mode)
 
     # 配置预处理操作，这里使用了crop和resize，Ai2d支持crop/shift/pad/resize/affine，具体代码请打开/sdcard/app/libs/AI2D.py查看
     def config_preprocess(self,det,input_image_size=None):
@@ -162,6 +162,42 @@ class HandRecognitionApp(AIBase):
             text = " " + self.labels[idx] + ": " + str(round(x_softmax[idx],2))
             return text
 
+    # 批量推理，对一帧内的所有手掌框做手势识别，返回与det_boxes顺序一致的识别结果
+    def run_batch(self,input_np,det_boxes):
+        self.batch.begin()
+        for det_box in det_boxes:
+            crop=quantize_crop(self.get_crop_param(det_box),self.crop_step,self.rgb888p_size[0],self.rgb888p_size[1])
+            self.batch.add(tuple(crop),lambda ai2d,c=crop:self.config_crop(ai2d,c))
+        results=self.batch.run(input_np)
+        if not results:
+            return []
+        return self.postprocess_batch(results)
+
+    # 批量推理使用的预处理配置，ai2d为nncase_runtime的ai2d对象
+    def config_crop(self,ai2d,crop):
+        ai2d.set_crop_param(True,crop[0],crop[1],crop[2],crop[3])
+        ai2d.set_resize_param(True,nn.interp_method.tf_bilinear,nn.interp_mode.half_pixel)
+
+    # 批量后处理，results[0]为(N,类别数)的输出，整批一起做softmax
+    def postprocess_batch(self,results):
+        with ScopedTiming("postprocess",self.debug_mode > 0):
+            n=len(self.batch)
+            logits=results[0].reshape((n,results[0].size//n))
+            logits=logits-np.max(logits,axis=1).reshape((n,1))
+            exp_logits=np.exp(logits)
+            probs=exp_logits/np.sum(exp_logits,axis=1).reshape((n,1))
+            idx=np.argmax(probs,axis=1)
+            texts=[]
+            for i in range(n):
+                k=int(idx[i])
+                texts.append(" " + self.labels[k] + ": " + str(round(probs[i,k],2)))
+            return texts
+
+    # 先释放批量推理占用的资源，再释放KPU和Ai2d
+    def deinit(self):
+        self.batch.deinit()
+        super().deinit()
+
     # 计算crop参数
     def get_crop_param(self,det_box):
         x1, y1, x2, y2 = det_box[2],det_box[3],det_box[4],det_box[5]
@@ -226,7 +262,7 @@ class HandRecognition:
         hand_rec_res=[]
         hand_det_res=[]
         for det_box in det_boxes:
-            # 对检测到的每一个手掌执行手势识别
+            # 过滤掉太小或者位置不合理的手掌框
             x1, y1, x2, y2 = det_box[2],det_box[3],det_box[4],det_box[5]
             w,h= int(x2 - x1),int(y2 - y1)
             if (h<(0.1*self.rgb888p_size[1])):
@@ -235,12 +271,18 @@ class HandRecognition:
                 continue
             if (w<(0.15*self.rgb888p_size[0]) and ((x1<(0.01*self.rgb888p_size[0])) or (x2>(0.99*self.rgb888p_size[0])))):
                 continue
-            self.hand_rec.config_preprocess(det_box)
-            text=self.hand_rec.run(input_np)
             hand_det_res.append(det_box)
-            hand_rec_res.append(text)
+        # 对所有手掌批量执行手势识别
+        if hand_det_res:
+            hand_rec_res=self.hand_rec.run_batch(input_np,hand_det_res)
         return hand_det_res,hand_rec_res
 
+    # 切换sensor给到AI的图像分辨率，手掌检测的预处理由ResolutionController预先build并切换
+    def set_rgb888p_size(self,rgb888p_size):
+        self.rgb888p_size=rgb888p_size
+        self.hand_rec.rgb888p_size=rgb888p_size
+        self.hand_rec.batch.set_input_size(rgb888p_size)
+
     # 绘制效果，绘制识别结果和检测框
     def draw_result(self,pl,hand_det_res,hand_rec_res):
         pl.osd_img.clear()
@@ -257,20 +299,18 @@ class HandRecognition:
                 pl.osd_img.draw_string_advanced( x_det, y_det-50, 32,hand_rec_res[k], color=(255,0, 255, 0))
 
 
-if __name__=="__main__":
-    fpioa = FPIOA()
-    button0 = Button(fpioa, 34, 0)
+# 例程需要的AI输入分辨率，由宿主或run_standalone设置sensor通道2的输出尺寸
+RGB888P_SIZE = [1280, 960]
 
-    # 显示模式，默认"lcd"
-    display_mode="lcd"
-    display_size=[640,480]
+# 例程入口：在已创建的PipeLine上初始化模型，返回HostedDemo，由AI Hub宿主或run_standalone运行和释放
+def start(pl):
+    display_size = pl.display_size
     # 手掌检测模型路径
     hand_det_kmodel_path="/sdcard/examples/kmodel/hand_det.kmodel"
     # 手势识别模型路径
     hand_rec_kmodel_path="/sdcard/examples/kmodel/hand_reco.kmodel"
     # 其它参数
     anchors_path="/sdcard/examples/utils/prior_data_320.bin"
-    rgb888p_size=[1280,960]
     hand_det_input_size=[512,512]
     hand_rec_input_size=[224,224]
     confidence_threshold=0.2
@@ -278,39 +318,20 @@ if __name__=="__main__":
     labels=["gun","other","yeah","five"]
     anchors = [26,27, 53,52, 75,71, 80,99, 106,82, 99,134, 140,113, 161,172, 245,276]
 
-    # 初始化PipeLine，只关注传给AI的图像分辨率，显示的分辨率
-    sensor = Sensor(width=1280, height=960) # 构建摄像头对象
-    pl = PipeLine(rgb888p_size=rgb888p_size, display_size=display_size, display_mode=display_mode)
-    pl.create(sensor=sensor)  # 创建PipeLine实例
-    hr=HandRecognition(hand_det_kmodel_path,hand_rec_kmodel_path,det_input_size=hand_det_input_size,kp_input_size=hand_rec_input_size,labels=labels,anchors=anchors,confidence_threshold=confidence_threshold,nms_threshold=nms_threshold,nms_option=False,strides=[8,16,32],rgb888p_size=rgb888p_size,display_size=display_size)
-    try:
-        while True:
-            os.exitpoint()
-            with ScopedTiming("total",1):
-                img=pl.get_frame()                              # 获取当前帧
-                hand_det_res,hand_rec_res=hr.run(img)           # 推理当前帧
-#                print(hand_det_res,  hand_rec_res)              # 打印结果
-                hr.draw_result(pl,hand_det_res,hand_rec_res)    # 绘制推理结果
-                pl.show_image()                                 # 展示推理结果
-                gc.collect()
-            if button0.is_pressing():
-                try:
-                    with open("/sdcard/main.py", "rb") as f:
-                        os.remove("/sdcard/main.py")
-                except Exception as e:
-                    pass
-                with open("/sdcard/CanMV Sample/main.py", "rb") as f:
-                    code_src = f.read()
-                with open("/sdcard/main.py", "wb") as f:
-                    f.write(code_src)
-                machine.reset()
-    except Exception as e:
-        sys.print_exception(e)
-    finally:
+    hr=HandRecognition(hand_det_kmodel_path,hand_rec_kmodel_path,det_input_size=hand_det_input_size,kp_input_size=hand_rec_input_size,labels=labels,anchors=anchors,confidence_threshold=confidence_threshold,nms_threshold=nms_threshold,nms_option=False,strides=[8,16,32],rgb888p_size=RGB888P_SIZE,display_size=display_size)
+    # 自适应分辨率：手掌变多导致帧耗时超过目标时降低AI输入分辨率，余量充足时再升回
+    controller=ResolutionController(pl,[[1280,960],[960,720],[640,480]],target_fps=25)
+    controller.add_stage(hr.hand_det)
+    controller.add_listener(hr.set_rgb888p_size)
+    # 流水线运行器，pipeline_mode为False时按原例程的串行方式运行
+    pipeline_mode=True
+    runner=PipelineRunner(pl,hr,infer_func=hr.run,render_func=lambda res:hr.draw_result(pl,res[0],res[1]),controller=controller)
+
+    def release():
         hr.hand_det.deinit()
         hr.hand_rec.deinit()
-        pl.destroy()
-
-
 
+    return HostedDemo(pl, release, runner=runner, pipelined=pipeline_mode)
 
+if __name__=="__main__":
+    run_standalone(start, RGB888P_SIZE)
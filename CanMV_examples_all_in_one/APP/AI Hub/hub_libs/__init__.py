@@ -0,0 +1,9 @@
+#####################################################################################################
+# @file         __init__.py
+# @author       正点原子团队(ALIENTEK)
+# @version      V1.0
+# @date         2026-10-19
+# @brief        AI Hub公共模块
+#   @note       供AI Hub各例程共用的运行框架和工具，使用前需将"/sdcard/CanMV Sample/APP/AI Hub"加入sys.path
+# @license      Copyright (c) 2020-2032, 广州市星翼电子科技有限公司
+#####################################################################################################
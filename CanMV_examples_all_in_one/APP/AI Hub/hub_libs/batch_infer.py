@@ -0,0 +1,150 @@
+#####################################################################################################
+# @file         batch_infer.py
+# @author       正点原子团队(ALIENTEK)
+# @version      V1.0
+# @date         2026-10-19
+# @brief        二级模型批量推理
+#   @note       手势识别、手掌关键点、人脸关键点、人脸姿态等二级模型需要对每个检测框单独做预处理和推理，
+#               本模块将一帧内所有检测框的预处理和推理合并处理：
+#               (1) 每帧只从sensor帧创建一次输入tensor，所有检测框共用
+#               (2) 预处理builder按量化后的裁剪/仿射参数缓存，检测框基本不动时无需重新build
+#               (3) 预处理输出写入固定的槽位tensor，不再为每个检测框分配新的tensor
+#               (4) kmodel编译为batch>1时，一次KPU调用推理一整批；batch=1时逐槽位推理
+#               (5) 模型输出按检测框顺序堆叠为(N,...)数组，便于后处理对整批做向量运算
+# @license      Copyright (c) 2020-2032, 广州市星翼电子科技有限公司
+#####################################################################################################
+
+from libs.PipeLine import ScopedTiming
+import nncase_runtime as nn
+import ulab.numpy as np
+
+# 将坐标量化到step的整数倍，检测框轻微抖动时得到相同的预处理参数，从而命中builder缓存
+def quantize(v, step):
+    return int(v) // step * step
+
+# 量化裁剪参数[x, y, w, h]，并保证裁剪区域不超出图像范围
+def quantize_crop(crop, step, frame_w, frame_h):
+    x = quantize(crop[0], step)
+    y = quantize(crop[1], step)
+    w = min(quantize(crop[2] + step - 1, step), frame_w - x)
+    h = min(quantize(crop[3] + step - 1, step), frame_h - y)
+    return [x, y, w, h]
+
+class BatchSecondStage:
+    def __init__(self, kpu, rgb888p_size, model_input_size, batch_size=1, cache_size=16, debug_mode=0):
+        # 二级模型的KPU实例，一般为AIBase中的self.kpu
+        self.kpu = kpu
+        # ai2d输入输出shape
+        self.input_shape = [1, 3, rgb888p_size[1], rgb888p_size[0]]
+        self.output_shape = [1, 3, model_input_size[1], model_input_size[0]]
+        # kmodel输入的batch维度，标准kmodel为1
+        self.batch_size = batch_size
+        # 预处理builder缓存的最大条目数
+        self.cache_size = cache_size
+        self.debug_mode = debug_mode
+        # builder缓存：key -> (ai2d, builder)，cache_keys按最近使用顺序排列
+        self.cache = {}
+        self.cache_keys = []
+        self.cache_hits = 0
+        self.cache_misses = 0
+        # 槽位tensor，每个槽位存放一个检测框的预处理结果，跨帧复用
+        self.slot_np = [np.zeros(self.output_shape, dtype=np.uint8) for i in range(batch_size)]
+        self.slot_tensors = [nn.from_numpy(a) for a in self.slot_np]
+        # batch>1时用于拼接整批输入的缓冲区
+        if batch_size > 1:
+            self.batch_np = np.zeros([batch_size] + self.output_shape[1:], dtype=np.uint8)
+        self.items = []
+
+    # 切换输入分辨率，旧分辨率下build的预处理全部失效
+    def set_input_size(self, rgb888p_size):
+        self.input_shape = [1, 3, rgb888p_size[1], rgb888p_size[0]]
+        self.cache = {}
+        self.cache_keys = []
+
+    # 开始新的一帧
+    def begin(self):
+        self.items = []
+
+    # 添加一个检测框，key为量化后的预处理参数，config_func(ai2d)负责设置该检测框的crop/resize/affine等参数
+    def add(self, key, config_func):
+        self.items.append((key, config_func))
+
+    def __len__(self):
+        return len(self.items)
+
+    # 从缓存获取预处理builder，未命中时创建并淘汰最久未使用的条目
+    def _get_builder(self, key, config_func):
+        if key in self.cache:
+            self.cache_hits += 1
+            self.cache_keys.remove(key)
+            self.cache_keys.append(key)
+            return self.cache[key][1]
+        self.cache_misses += 1
+        with ScopedTiming("batch build", self.debug_mode > 1):
+            ai2d = nn.ai2d()
+            ai2d.set_dtype(nn.ai2d_format.NCHW_FMT, nn.ai2d_format.NCHW_FMT, np.uint8, np.uint8)
+            config_func(ai2d)
+            builder = ai2d.build(self.input_shape, self.output_shape)
+        self.cache[key] = (ai2d, builder)
+        self.cache_keys.append(key)
+        if len(self.cache_keys) > self.cache_size:
+            del self.cache[self.cache_keys.pop(0)]
+        return builder
+
+    # 执行一次KPU推理，返回各输出的numpy数组
+    def _kpu_run(self, input_tensor):
+        self.kpu.set_input_tensor(0, input_tensor)
+        self.kpu.run()
+        outputs = []
+        for i in range(self.kpu.outputs_size()):
+            output_tensor = self.kpu.get_output_tensor(i)
+            outputs.append(output_tensor.to_numpy())
+            del output_tensor
+        return outputs
+
+    # 对本帧添加的所有检测框做预处理和推理，返回每个输出按检测框堆叠的(N,...)数组列表
+    def run(self, input_np):
+        if not self.items:
+            return []
+        with ScopedTiming("batch second stage", self.debug_mode > 0):
+            # 整帧输入tensor只创建一次
+            input_tensor = nn.from_numpy(input_np)
+            rows = []
+            for start in range(0, len(self.items), self.batch_size):
+                chunk = self.items[start:start + self.batch_size]
+                for i in range(len(chunk)):
+                    key, config_func = chunk[i]
+                    self._get_builder(key, config_func).run(input_tensor, self.slot_tensors[i])
+                if self.batch_size == 1:
+                    rows.append(self._kpu_run(self.slot_tensors[0]))
+                    continue
+                # batch>1：拼接整批输入，一次KPU调用
+                for i in range(len(chunk)):
+                    self.batch_np[i] = self.slot_tensors[i].to_numpy()[0]
+                outputs = self._kpu_run(nn.from_numpy(self.batch_np))
+                for i in range(len(chunk)):
+                    rows.append([out[i:i + 1] for out in outputs])
+            del input_tensor
+            # 按输出分别堆叠
+            stacked = []
+            for j in range(len(rows[0])):
+                if len(rows) == 1:
+                    stacked.append(rows[0][j])
+                else:
+                    stacked.append(np.concatenate(tuple([r[j] for r in rows]), axis=0))
+            return stacked
+
+    # builder缓存命中率
+    def hit_rate(self):
+        total = self.cache_hits + self.cache_misses
+        return self.cache_hits / total if total > 0 else 0
+
+    # 释放builder缓存和槽位tensor，并解除对KPU的引用，须在AIBase.deinit之前调用
+    def deinit(self):
+        self.items = []
+        self.cache = {}
+        self.cache_keys = []
+        self.slot_tensors = []
+        self.slot_np = []
+        self.batch_np = None
+        self.kpu = None
@@ -0,0 +1,261 @@
+#####################################################################################################
+# @file         demo_host.py
+# @author       正点原子团队(ALIENTEK)
+# @version      V1.0
+# @date         2026-10-19
+# @brief        AI Hub例程宿主
+#   @note       在同一进程内以模块方式运行AI Hub例程，不再把例程复制为/sdcard/main.py后重启：
+#               宿主只创建一次PipeLine，显示、MediaManager和sensor在例程之间保持运行，切换例程时只重新设置sensor通道2的输出尺寸。
+#               通道2的帧缓存在创建PipeLine时按max_ai_size分配，RGB888P_SIZE超过该尺寸的例程不在宿主中运行，由调用者改用重启方式运行。
+#               例程模块需提供RGB888P_SIZE和start(pl)，start创建模型等资源并返回HostedDemo，
+#               HostedDemo.stop按固定顺序停止推理线程、反初始化KPU和Ai2d，并回收内存池，保证下一个例程开始前资源已全部释放。
+#               例程单独运行(作为/sdcard/main.py)时通过run_standalone保持原有的按键返回桌面行为
+# @license      Copyright (c) 2020-2032, 广州市星翼电子科技有限公司
+#####################################################################################################
+
+from libs.PipeLine import PipeLine, ScopedTiming
+from media.sensor import *
+from machine import Pin
+from machine import FPIOA
+from hub_libs.model_cache import MODEL_CACHE
+from hub_libs.resolution import set_ai_framesize
+import nncase_runtime as nn
+import machine
+import time
+import gc
+import os
+import sys
+
+LAUNCHER_PATH = "/sdcard/CanMV Sample/boot_main.py"     # 桌面程序启动脚本，经字节码缓存加载main.py
+
+class Button():
+    def __init__(self, fpioa, pinx, valid=0):
+        fpioa.set_function(pinx, fpioa.GPIO0 + pinx)
+
+        pull = Pin.PULL_UP if valid == 0 else Pin.PULL_DOWN
+        self.pin = Pin(pinx, Pin.IN, pull=pull, drive=7)
+        self.valid = valid
+
+    def is_pressing(self):
+        return True if self.pin.value() == self.valid else False
+
+# 一个正在运行的例程，runner为PipelineRunner(流水线例程)，frame_func为逐帧处理函数(串行循环例程)，二者取其一
+class HostedDemo:
+    def __init__(self, pl, release, runner=None, frame_func=None, pipelined=True, timing=True):
+        self.pl = pl
+        # 释放例程资源(模型反初始化等)的函数
+        self.release = release
+        self.runner = runner
+        self.frame_func = frame_func
+        # runner的运行方式，False时按串行方式运行
+        self.pipelined = pipelined
+        # 串行循环是否打印每帧总耗时，与原例程一致
+        self.timing = timing
+        # 第一帧显示后的回调，用于统计切换耗时
+        self.first_frame_cb = None
+        self.released = False
+
+    def _first_frame(self):
+        if self.first_frame_cb is not None:
+            self.first_frame_cb()
+            self.first_frame_cb = None
+
+    # 运行例程，stop_check返回True时退出
+    def run(self, stop_check):
+        if self.runner is not None:
+            self.runner.first_frame_cb = self._first_frame
+            if self.pipelined:
+                self.runner.run(stop_check=stop_check)
+            else:
+                self.runner.run_serial(stop_check=stop_check)
+            return
+        while True:
+            os.exitpoint()
+            with ScopedTiming("total", self.timing):
+                img = self.pl.get_frame()               # 获取当前帧
+                self.frame_func(img)                    # 推理并绘制结果
+                self.pl.show_image()                    # 展示推理效果
+                self._first_frame()
+                gc.collect()
+            if stop_check():
+                break
+
+    # 停止例程并释放资源，可重复调用
+    def stop(self):
+        if self.released:
+            return
+        self.released = True
+        if self.runner is not None:
+            self.runner.stop()                          # 先等推理线程退出，KPU才能安全地反初始化
+        self.release()
+        gc.collect()
+        nn.shrink_memory_pool()                         # 归还Ai2d等占用的内存池，模型由MODEL_CACHE决定是否常驻
+        self.pl.osd_img.clear()
+        self.pl.show_image()
+
+# 同一进程内依次运行多个例程的宿主
+class DemoHost:
+    def __init__(self, display_size=[640,480], display_mode="lcd", sensor_size=[1280,960], max_ai_size=[1280,960], debug_mode=0):
+        self.display_size = display_size
+        self.display_mode = display_mode
+        self.sensor_size = sensor_size
+        # 通道2帧缓存按该尺寸分配，各例程的RGB888P_SIZE均不能超过它
+        self.max_ai_size = max_ai_size
+        self.debug_mode = debug_mode
+        self.pl = None
+        self.demo = None
+        self.switch_start = 0
+        self.exit_ms = 0
+        self.last_stop_ms = 0
+        # 各次切换耗时(ms)，[(例程名, 停止耗时, 启动耗时, 首帧耗时)]
+        self.switch_log = []
+
+    # 创建PipeLine，整个宿主生命周期内只创建一次；通道2按max_ai_size分配帧缓存，再切到第一个例程的尺寸
+    def open(self):
+        with ScopedTiming("host open", self.debug_mode > 0):
+            sensor = Sensor(width=self.sensor_size[0], height=self.sensor_size[1])
+            self.pl = PipeLine(rgb888p_size=self.max_ai_size, display_size=self.display_size, display_mode=self.display_mode)
+            self.pl.create(sensor=sensor)
+            self.pl.ai_buffer_size = list(self.max_ai_size)
+
+    # 只修改sensor送给AI的通道2输出尺寸，显示通道不受影响；尺寸超过已分配的帧缓存或设置失败时抛出异常
+    def _set_ai_size(self, size):
+        set_ai_framesize(self.pl, size)
+
+    # 导入例程模块，不支持宿主运行的例程(无start)返回None
+    def load(self, script_path):
+        folder, name = script_path.rsplit("/", 1)
+        name = name[:-3] if name.endswith(".py") else name
+        if folder not in sys.path:
+            sys.path.append(folder)
+        module = __import__(name)
+        if not hasattr(module, "start"):
+            self.unload(name)
+            return None
+        return module
+
+    def unload(self, name):
+        if name in sys.modules:
+            del sys.modules[name]
+        gc.collect()
+
+    def _first_frame(self):
+        first_ms = time.ticks_diff(time.ticks_ms(), self.switch_start)
+        name, stop_ms, start_ms, _ = self.switch_log[-1]
+        self.switch_log[-1] = (name, stop_ms, start_ms, first_ms)
+        print("[host] {}: stop {}ms, start {}ms, first frame {}ms".format(name, stop_ms, start_ms, first_ms))
+
+    # 停止当前例程，返回耗时(ms)
+    def stop(self):
+        if self.demo is None:
+            return 0
+        t0 = time.ticks_ms()
+        demo, module_name = self.demo
+        self.demo = None
+        try:
+            demo.stop()
+        finally:
+            self.unload(module_name)
+        return time.ticks_diff(time.ticks_ms(), t0)
+
+    # 切换到script_path对应的例程并运行，stop_check返回True时停止例程并返回；例程不支持宿主运行(无start或RGB888P_SIZE超过通道2帧缓存)时返回False
+    # t0为发起切换的时刻(ticks_ms)，切换耗时从该时刻算到新例程第一帧显示
+    def switch(self, script_path, stop_check, t0=None):
+        self.switch_start = t0 if t0 is not None else time.ticks_ms()
+        module = self.load(script_path)
+        if module is None:
+            return False
+        name = module.__name__
+        if self.pl is None:
+            self.open()
+        try:
+            self._set_ai_size(module.RGB888P_SIZE)
+        except Exception as e:
+            print("[host] {}: cannot set AI size {}: {}".format(name, module.RGB888P_SIZE, e))
+            self.unload(name)
+            return False
+        demo = module.start(self.pl)
+        self.demo = (demo, name)
+        start_ms = time.ticks_diff(time.ticks_ms(), self.switch_start)
+        self.switch_log.append((name, self.last_stop_ms, start_ms, 0))
+        demo.first_frame_cb = self._first_frame
+        try:
+            demo.run(stop_check)
+        finally:
+            self.exit_ms = time.ticks_ms()
+            self.last_stop_ms = self.stop()
+        return True
+
+    # 依次运行playlist中的例程，从index开始；按键next_btn/prev_btn切换例程，back返回
+    # 第一个例程不支持宿主运行时返回False，由调用者改用重启方式运行；之后切换时跳过不支持的例程
+    def run(self, playlist, index, back, next_btn=None, prev_btn=None, t0=None):
+        buttons = [b for b in (back, next_btn, prev_btn) if b is not None]
+        stop_check = lambda: any(b.is_pressing() for b in buttons)
+        step = 0
+        skipped = 0
+        while True:
+            if not self.switch(playlist[index], stop_check, t0):
+                skipped += 1
+                if step == 0 or skipped >= len(playlist):
+                    return step != 0
+                index = (index + step) % len(playlist)
+                continue
+            skipped = 0
+            t0 = self.exit_ms
+            if next_btn is not None and next_btn.is_pressing():
+                step = 1
+            elif prev_btn is not None and prev_btn.is_pressing():
+                step = -1
+            else:
+                break
+            index = (index + step) % len(playlist)
+            # 等待按键松开，避免一次按下连续切换
+            while any(b.is_pressing() for b in buttons):
+                time.sleep_ms(10)
+        while back.is_pressing():
+            time.sleep_ms(10)
+        return True
+
+    # 切换耗时及模型缓存命中情况汇总
+    def report(self):
+        for name, stop_ms, start_ms, first_ms in self.switch_log:
+            print("[host] {:<24} stop {:>5}ms, start {:>5}ms, first frame {:>5}ms".format(name, stop_ms, start_ms, first_ms))
+        MODEL_CACHE.report()
+
+    # 释放PipeLine和常驻的模型，之后显示和MediaManager由调用者重新初始化
+    def close(self):
+        self.stop()
+        MODEL_CACHE.clear()                             # 离开宿主后不再需要常驻模型，归还给桌面程序
+        if self.pl is not None:
+            self.pl.destroy()
+            self.pl = None
+        gc.collect()
+
+# 例程作为/sdcard/main.py单独运行：按下按键0时恢复桌面程序并重启
+def run_standalone(start, rgb888p_size, display_size=[640,480], display_mode="lcd"):
+    fpioa = FPIOA()
+    button0 = Button(fpioa, 34, 0)
+    sensor = Sensor(width=1280, height=960) # 构建摄像头对象
+    pl = PipeLine(rgb888p_size=rgb888p_size, display_size=display_size, display_mode=display_mode)
+    pl.create(sensor=sensor)  # 创建PipeLine实例
+    demo = None
+    try:
+        demo = start(pl)
+        demo.first_frame_cb = lambda: print("[demo] first frame: {}ms since power on".format(time.ticks_ms()))
+        demo.run(button0.is_pressing)          # 按下按键0时退出
+        try:
+            with open("/sdcard/main.py", "rb") as f:
+                os.remove("/sdcard/main.py")
+        except Exception as e:
+            pass
+        with open(LAUNCHER_PATH, "rb") as f:
+            code_src = f.read()
+        with open("/sdcard/main.py", "wb") as f:
+            f.write(code_src)
+        machine.reset()
+    except Exception as e:
+        sys.print_exception(e)                  # 打印异常信息
+    finally:
+        if demo is not None:
+            demo.stop()                         # 反初始化
+        pl.destroy()                            # 销毁PipeLine实例
@@ -0,0 +1,121 @@
+#####################################################################################################
+# @file         gesture.py
+# @author       正点原子团队(ALIENTEK)
+# @version      V1.0
+# @date         2026-10-19
+# @brief        基于手指弯曲角度的静态手势分类
+#   @note       手掌关键点分类、猜拳、动态手势例程共用。所有手掌的5个手指角度用数组运算一次算出，
+#               手势由规则表描述：每条规则给出5个手指角度的下限和上限(均不含)，
+#               整批角度与全部规则比较得到(手掌数, 规则数)的布尔矩阵，按行取第一条满足的规则(argmax)，
+#               规则的先后顺序即原elif判断链的优先级，新增手势只需在规则表中加一行。
+#               数组运算的固定开销较大，手掌数不超过SCALAR_MAX_HANDS(通常情况)时逐个手掌计算角度并逐条比较规则，结果与数组运算相同。
+#               不依赖硬件，可在PC上配合tools/bench_gesture.py做耗时对比和与原判断链的一致性检查
+# @license      Copyright (c) 2020-2032, 广州市星翼电子科技有限公司
+#####################################################################################################
+
+import math
+try:
+    import ulab.numpy as np
+except ImportError:
+    import numpy as np
+
+THR_ANGLE = 65.             # 手指弯曲
+THR_ANGLE_THUMB = 53.       # 拇指弯曲
+THR_ANGLE_S = 49.           # 手指伸直
+NO_LIMIT_LOW = -1.
+NO_LIMIT_HIGH = 1000.
+SCALAR_MAX_HANDS = 2        # 手掌数不超过该值时不用数组运算
+
+# 手势规则表：(手势, 拇指到小指的角度下限, 角度上限)，按优先级排列
+GESTURE_RULES = [
+    ("fist",    [THR_ANGLE_THUMB, THR_ANGLE, THR_ANGLE, THR_ANGLE, THR_ANGLE], [NO_LIMIT_HIGH] * 5),
+    ("five",    [NO_LIMIT_LOW] * 5, [THR_ANGLE_S] * 5),
+    ("gun",     [NO_LIMIT_LOW, NO_LIMIT_LOW, THR_ANGLE, THR_ANGLE, THR_ANGLE], [THR_ANGLE_S, THR_ANGLE_S, NO_LIMIT_HIGH, NO_LIMIT_HIGH, NO_LIMIT_HIGH]),
+    ("love",    [NO_LIMIT_LOW, NO_LIMIT_LOW, THR_ANGLE, THR_ANGLE, NO_LIMIT_LOW], [THR_ANGLE_S, THR_ANGLE_S, NO_LIMIT_HIGH, NO_LIMIT_HIGH, THR_ANGLE_S]),
+    ("one",     [5., NO_LIMIT_LOW, THR_ANGLE, THR_ANGLE, THR_ANGLE], [NO_LIMIT_HIGH, THR_ANGLE_S, NO_LIMIT_HIGH, NO_LIMIT_HIGH, NO_LIMIT_HIGH]),
+    ("six",     [NO_LIMIT_LOW, THR_ANGLE, THR_ANGLE, THR_ANGLE, NO_LIMIT_LOW], [THR_ANGLE_S, NO_LIMIT_HIGH, NO_LIMIT_HIGH, NO_LIMIT_HIGH, THR_ANGLE_S]),
+    ("three",   [THR_ANGLE_THUMB, NO_LIMIT_LOW, NO_LIMIT_LOW, NO_LIMIT_LOW, THR_ANGLE], [NO_LIMIT_HIGH, THR_ANGLE_S, THR_ANGLE_S, THR_ANGLE_S, NO_LIMIT_HIGH]),
+    ("thumbUp", [NO_LIMIT_LOW, THR_ANGLE, THR_ANGLE, THR_ANGLE, THR_ANGLE], [THR_ANGLE_S, NO_LIMIT_HIGH, NO_LIMIT_HIGH, NO_LIMIT_HIGH, NO_LIMIT_HIGH]),
+    ("yeah",    [THR_ANGLE_THUMB, NO_LIMIT_LOW, NO_LIMIT_LOW, THR_ANGLE, THR_ANGLE], [NO_LIMIT_HIGH, THR_ANGLE_S, THR_ANGLE_S, NO_LIMIT_HIGH, NO_LIMIT_HIGH]),
+]
+
+# 求两个向量之间的夹角(度)
+def vector_2d_angle(v1, v2):
+    v1_norm = math.sqrt(v1[0] * v1[0] + v1[1] * v1[1])
+    v2_norm = math.sqrt(v2[0] * v2[0] + v2[1] * v2[1])
+    if v1_norm == 0 or v2_norm == 0:
+        return float("nan")
+    cos_angle = (v1[0] * v2[0] + v1[1] * v2[1]) / (v1_norm * v2_norm)
+    # 与原例程一样不截断余弦值，舍入误差使其超出[-1, 1]时得到nan，不判为任何手势
+    if cos_angle < -1 or cos_angle > 1:
+        return float("nan")
+    return math.acos(cos_angle) * 180 / math.pi
+
+# 计算单个手掌5个手指的弯曲角度，kp为42个关键点坐标(x0,y0,x1,y1,...)，与finger_angles的一行相同；
+# 只取用到的坐标转为float，坐标为整数时运算结果与原例程完全一致
+def hand_angles(kp):
+    x0, y0 = float(kp[0]), float(kp[1])
+    angles = []
+    for j in range(4, 41, 8):
+        angles.append(vector_2d_angle([x0 - float(kp[j]), y0 - float(kp[j+1])], [float(kp[j+2]) - float(kp[j+4]), float(kp[j+3]) - float(kp[j+5])]))
+    return angles
+
+# 计算所有手掌5个手指的弯曲角度，keypoints为(手掌数, 42)的关键点数组(x0,y0,x1,y1,...)
+# 每个手指的角度为手腕->指根向量与指尖两节关键点向量的夹角，返回(手掌数, 5)的角度数组
+# 与原例程一样不截断余弦值，舍入误差使其略超出[-1, 1]时角度为nan，该手掌不判为任何手势
+def finger_angles(keypoints):
+    kp = keypoints * 1.0
+    v1_x = kp[:, 0:1] - kp[:, 4::8]
+    v1_y = kp[:, 1:2] - kp[:, 5::8]
+    v2_x = kp[:, 6::8] - kp[:, 8::8]
+    v2_y = kp[:, 7::8] - kp[:, 9::8]
+    # 与原例程相同的运算顺序(两个模长分别开方后相乘)，保证舍入结果一致
+    norm = np.sqrt(v1_x * v1_x + v1_y * v1_y) * np.sqrt(v2_x * v2_x + v2_y * v2_y)
+    cos_angle = (v1_x * v2_x + v1_y * v2_y) / norm
+    return np.acos(cos_angle) * 180 / np.pi
+
+class GestureClassifier:
+    def __init__(self, rules=GESTURE_RULES):
+        self.rules = rules
+        self.names = [rule[0] for rule in rules]
+        count = len(rules)
+        # 规则下限、上限展开为一行(规则数*5)，与按规则重复展开后的角度逐列比较
+        self.low = np.array([v for rule in rules for v in rule[1]])
+        self.high = np.array([v for rule in rules for v in rule[2]])
+        # 角度展开矩阵(5, 规则数*5)：angles·expand把每个手掌的5个角度重复规则数次
+        self.expand = np.zeros((5, count * 5))
+        for r in range(count):
+            for f in range(5):
+                self.expand[f, r * 5 + f] = 1.
+
+    # 按角度分类，angles为(手掌数, 5)的角度数组，返回手势名称列表，不满足任何规则的为None
+    def classify_angles(self, angles):
+        n = angles.shape[0]
+        count = len(self.names)
+        repeated = np.dot(angles, self.expand)
+        ok = (repeated > self.low) * (repeated < self.high) * 1
+        # (手掌数, 规则数)的布尔矩阵，某条规则5个手指都满足时为真
+        matched = np.sum(ok.reshape((n * count, 5)), axis=1).reshape((n, count)) == 5
+        first = np.argmax(matched * 1, axis=1)
+        return [self.names[int(first[i])] if matched[i, int(first[i])] else None for i in range(n)]
+
+    # 按单个手掌的5个角度逐条比较规则，返回第一条满足的手势名称，不满足任何规则时返回None
+    def classify_one(self, angles):
+        for name, low, high in self.rules:
+            for f in range(5):
+                if not (low[f] < angles[f] < high[f]):
+                    break
+            else:
+                return name
+        return None
+
+    # 按关键点分类，keypoints为(手掌数, 42)或单个手掌(42,)的关键点数组
+    def classify(self, keypoints):
+        if len(keypoints.shape) == 1:
+            keypoints = keypoints.reshape((1, keypoints.shape[0]))
+        n = keypoints.shape[0]
+        if n <= SCALAR_MAX_HANDS:
+            return [self.classify_one(hand_angles(keypoints[i])) for i in range(n)]
+        return self.classify_angles(finger_angles(keypoints))
+
+GESTURE_CLASSIFIER = GestureClassifier()
@@ -0,0 +1,174 @@
+#####################################################################################################
+# @file         model_cache.py
+# @author       正点原子团队(ALIENTEK)
+# @version      V1.0
+# @date         2026-10-19
+# @brief        kmodel常驻缓存
+#   @note       同一进程内加载过的kmodel按内容哈希缓存，多个应用使用同一个模型(如手掌检测、人脸检测)时共享同一个KPU实例，
+#               配合AI Hub例程宿主切换例程时无需再从SD卡重新加载。应用deinit时只归还引用，模型仍然常驻；
+#               常驻模型总大小超过预算时按最近最少使用的顺序释放没有被引用的模型。
+#               内容哈希按(路径, 文件大小, 修改时间)记忆，同一文件只在第一次加载时计算一次
+# @license      Copyright (c) 2020-2032, 广州市星翼电子科技有限公司
+#####################################################################################################
+
+from libs.PipeLine import ScopedTiming
+from libs.AIBase import AIBase
+import nncase_runtime as nn
+import time
+import gc
+import os
+try:
+    import uhashlib as hashlib
+except ImportError:
+    import hashlib
+
+def align_up(x, align):
+    return (x + align - 1) // align * align
+
+# 单个常驻模型
+class CachedModel:
+    def __init__(self, key, path, kpu, size, load_ms):
+        self.key = key              # 内容哈希
+        self.path = path            # 第一次加载时的路径
+        self.kpu = kpu
+        self.size = size            # 按kmodel文件大小估算的内存占用(字节)
+        self.load_ms = load_ms      # 加载耗时
+        self.refs = 0               # 正在使用该模型的应用数
+        self.last_use = 0           # 最近一次被获取的序号，用于LRU
+
+class ModelCache:
+    def __init__(self, budget=16*1024*1024, chunk_size=64*1024, debug_mode=0):
+        # 常驻模型总大小预算(字节)，正在被引用的模型不受预算限制
+        self.budget = budget
+        self.chunk_size = chunk_size
+        self.debug_mode = debug_mode
+        self.models = {}            # 内容哈希 -> CachedModel
+        self.hash_memo = {}         # 路径 -> (文件大小, 修改时间, 内容哈希)
+        self.use_count = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.load_ms = 0
+        self.hash_ms = 0
+
+    # 计算文件内容哈希，文件未变化时直接返回上次的结果
+    def content_key(self, path):
+        st = os.stat(path)
+        size, mtime = st[6], st[8]
+        memo = self.hash_memo.get(path)
+        if memo is not None and memo[0] == size and memo[1] == mtime:
+            return memo[2], size
+        t0 = time.ticks_ms()
+        h = hashlib.sha256()
+        buf = bytearray(self.chunk_size)
+        with open(path, "rb") as f:
+            while True:
+                n = f.readinto(buf)
+                if not n:
+                    break
+                h.update(buf[:n] if n < len(buf) else buf)
+        key = h.digest()
+        self.hash_ms += time.ticks_diff(time.ticks_ms(), t0)
+        self.hash_memo[path] = (size, mtime, key)
+        return key, size
+
+    def resident_size(self):
+        return sum(m.size for m in self.models.values())
+
+    # 释放未被引用的模型，直到常驻大小加上extra不超过预算
+    def _evict(self, extra=0):
+        freed = False
+        while self.resident_size() + extra > self.budget:
+            idle = [m for m in self.models.values() if m.refs == 0]
+            if not idle:
+                break
+            victim = min(idle, key=lambda m: m.last_use)
+            del self.models[victim.key]
+            victim.kpu = None
+            self.evictions += 1
+            freed = True
+            if self.debug_mode > 0:
+                print("[model] evict {} ({}KB)".format(victim.path, victim.size // 1024))
+        if freed:
+            gc.collect()
+            nn.shrink_memory_pool()
+
+    # 获取path对应的KPU实例，已常驻时直接共享，否则加载；用完后需调用release
+    def acquire(self, path):
+        key, size = self.content_key(path)
+        self.use_count += 1
+        model = self.models.get(key)
+        if model is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+            self._evict(size)
+            t0 = time.ticks_ms()
+            with ScopedTiming("load " + path, self.debug_mode > 0):
+                kpu = nn.kpu()
+                kpu.load_kmodel(path)
+            load_ms = time.ticks_diff(time.ticks_ms(), t0)
+            self.load_ms += load_ms
+            model = CachedModel(key, path, kpu, size, load_ms)
+            self.models[key] = model
+        model.refs += 1
+        model.last_use = self.use_count
+        return model.kpu
+
+    # 归还KPU实例，模型保持常驻，超出预算时再按LRU释放
+    def release(self, kpu):
+        for model in self.models.values():
+            if model.kpu is kpu:
+                model.refs -= 1
+                break
+        self._evict()
+
+    # 释放所有未被引用的模型
+    def clear(self):
+        budget = self.budget
+        self.budget = 0
+        self._evict()
+        self.budget = budget
+
+    def hit_rate(self):
+        return self.hits / self.use_count if self.use_count > 0 else 0
+
+    def report(self):
+        print("[model] hits {}/{} ({:.1f}%), loads {} ({}ms), hash {}ms, resident {} models {}KB / {}KB, evictions {}".format(
+            self.hits, self.use_count, self.hit_rate() * 100, self.misses, self.load_ms, self.hash_ms,
+            len(self.models), self.resident_size() // 1024, self.budget // 1024, self.evictions))
+        for model in sorted(self.models.values(), key=lambda m: -m.last_use):
+            print("[model]   {:<48} {:>6}KB load {:>5}ms refs {}".format(model.path, model.size // 1024, model.load_ms, model.refs))
+
+# 进程内共享的模型缓存
+MODEL_CACHE = ModelCache()
+
+# 从MODEL_CACHE获取KPU的AIBase，除KPU来源和deinit外与AIBase一致
+class CachedAIBase(AIBase):
+    # AIBase.__init__总是自己创建KPU并加载kmodel，没有可替换的加载入口，因此不调用它：
+    # 先按AIBase.__init__设置同样的成员(init_base)，不加载模型，再把缓存中的KPU赋给self.kpu
+    def __init__(self, kmodel_path, model_input_size, rgb888p_size=[1920,1080], debug_mode=0):
+        self.init_base(kmodel_path, model_input_size, rgb888p_size, debug_mode)
+        self.kpu = MODEL_CACHE.acquire(kmodel_path)
+
+    # 与AIBase.__init__中除KPU创建和kmodel加载外的部分一致
+    def init_base(self, kmodel_path, model_input_size, rgb888p_size, debug_mode):
+        self.kmodel_path = kmodel_path
+        self.model_input_size = model_input_size
+        self.rgb888p_size = [align_up(rgb888p_size[0], 16), rgb888p_size[1]]
+        self.debug_mode = debug_mode
+        self.kpu = None
+        self.cur_img = None
+        self.tensors = []
+        self.results = []
+        self.ai2d = None
+
+    # 归还KPU，不再释放模型本身；内存池的回收由MODEL_CACHE在淘汰模型时完成
+    def deinit(self):
+        with ScopedTiming("deinit", self.debug_mode > 0):
+            MODEL_CACHE.release(self.kpu)
+            self.kpu = None
+            self.ai2d = None
+            self.tensors.clear()
+            self.results = []
+            gc.collect()
@@ -0,0 +1,237 @@
+#####################################################################################################
+# @file         pipeline_runner.py
+# @author       正点原子团队(ALIENTEK)
+# @version      V1.0
+# @date         2026-10-19
+# @brief        AI Hub流水线运行器
+#   @note       推理线程负责取帧和KPU推理，主线程负责后处理、绘制和显示，二者交错执行：
+#               第N帧在主线程后处理绘制的同时，推理线程已经在获取并推理第N+1帧；
+#               OSD图像采用双缓冲，绘制下一帧时不会改写正在送显的那一帧；
+#               可选接入ResolutionController，分辨率切换总在两帧之间、没有帧正在推理或绘制时进行
+# @license      Copyright (c) 2020-2032, 广州市星翼电子科技有限公司
+#####################################################################################################
+
+import _thread
+import time
+import gc
+import os
+import image
+
+# 单个阶段的耗时统计
+class StageStats:
+    def __init__(self, name):
+        self.name = name
+        self.reset()
+
+    def reset(self):
+        self.count = 0      # 执行次数
+        self.busy_us = 0    # 累计忙碌时间
+        self.max_us = 0     # 单次最大耗时
+
+    def add(self, elapsed_us):
+        self.count += 1
+        self.busy_us += elapsed_us
+        if elapsed_us > self.max_us:
+            self.max_us = elapsed_us
+
+    # 阶段占用率，即忙碌时间占统计窗口时间的百分比
+    def occupancy(self, wall_us):
+        return self.busy_us * 100 / wall_us if wall_us > 0 else 0
+
+    # 单次平均耗时(ms)
+    def avg_ms(self):
+        return self.busy_us / self.count / 1000 if self.count > 0 else 0
+
+class PipelineRunner:
+    def __init__(self, pl, app, infer_func=None, render_func=None, report_interval=100, controller=None):
+        self.pl = pl
+        self.app = app
+        # 推理阶段：输入当前帧，返回可跨线程传递的推理结果，默认取AIBase的预处理+KPU推理
+        self.infer_func = infer_func if infer_func else self._default_infer
+        # 渲染阶段：输入推理结果，完成后处理并绘制到pl.osd_img，默认取AIBase的后处理+draw_result
+        self.render_func = render_func if render_func else self._default_render
+        # 每隔多少帧打印一次统计信息，0表示不打印
+        self.report_interval = report_interval
+        # 自适应分辨率控制器(hub_libs.resolution.ResolutionController)，None表示固定分辨率
+        self.controller = controller
+        # 双缓冲OSD图像，front为正在送显的图像，绘制总在另一块上进行
+        self.osd_imgs = [pl.osd_img, image.Image(pl.display_size[0], pl.display_size[1], image.ARGB8888)]
+        self.front = 0
+        # 推理线程和渲染线程之间的单槽邮箱，槽满时推理线程等待，最多领先渲染线程一帧
+        self.lock = _thread.allocate_lock()
+        self.slot = None
+        # 主线程是否正在绘制已取走的一帧
+        self.rendering = False
+        self.last_render_us = 0
+        # 上一帧开始取帧的时刻，用于计算帧间隔
+        self.last_t0 = None
+        self.running = False
+        self.worker_alive = False
+        self.worker_error = None
+        self.stats = {
+            "capture": StageStats("capture"),
+            "infer": StageStats("infer"),
+            "render": StageStats("render"),
+        }
+        self.frames = 0
+        self.window_start = time.ticks_us()
+        # 第一帧显示后调用一次的回调，用于统计例程启动耗时
+        self.first_frame_cb = None
+
+    # AIBase默认推理阶段：预处理+KPU推理，输出为to_numpy拷贝，不再引用sensor帧缓存
+    def _default_infer(self, img):
+        return self.app.inference(self.app.preprocess(img))
+
+    # AIBase默认渲染阶段：后处理+绘制
+    def _default_render(self, raw):
+        self.app.draw_result(self.pl, self.app.postprocess(raw))
+
+    def reset_stats(self):
+        for s in self.stats.values():
+            s.reset()
+        self.frames = 0
+        self.window_start = time.ticks_us()
+
+    # 打印当前统计窗口内的帧率和各阶段占用率
+    def report(self):
+        wall_us = time.ticks_diff(time.ticks_us(), self.window_start)
+        fps = self.frames * 1000000 / wall_us if wall_us > 0 else 0
+        msg = "[{}] fps: {:.2f}".format("pipelined" if self.running else "serial", fps)
+        for s in self.stats.values():
+            msg += ", {}: {:.2f}ms {:.1f}%".format(s.name, s.avg_ms(), s.occupancy(wall_us))
+        if self.controller:
+            size = self.controller.size()
+            msg += ", res: {}x{}".format(size[0], size[1])
+        print(msg)
+        return fps
+
+    def _frame_done(self):
+        self.frames += 1
+        if self.report_interval > 0 and self.frames >= self.report_interval:
+            self.report()
+            self.reset_stats()
+
+    # 向分辨率控制器提交一帧的耗时，返回是否需要切换分辨率
+    def _control(self, t0, infer_us, pipelined):
+        if self.controller is None:
+            return False
+        period_us = time.ticks_diff(t0, self.last_t0) if self.last_t0 is not None else 0
+        self.last_t0 = t0
+        if period_us == 0:
+            return False
+        # 流水线模式下帧耗时取推理与绘制中较慢的一方，串行模式下为二者之和
+        busy_us = max(infer_us, self.last_render_us) if pipelined else infer_us + self.last_render_us
+        return self.controller.update(period_us, busy_us)
+
+    # 流水线模式下等待主线程取走并绘制完上一帧后再切换分辨率
+    def _switch_resolution(self):
+        while self.running:
+            with self.lock:
+                if self.slot is None and not self.rendering:
+                    break
+            time.sleep_ms(1)
+        self.controller.apply()
+        self.last_t0 = None
+
+    # 推理线程：取帧、推理，结果放入邮箱
+    def _infer_worker(self):
+        switch = False
+        try:
+            while self.running:
+                if switch:
+                    self._switch_resolution()
+                t0 = time.ticks_us()
+                img = self.pl.get_frame()
+                t1 = time.ticks_us()
+                raw = self.infer_func(img)
+                t2 = time.ticks_us()
+                self.stats["capture"].add(time.ticks_diff(t1, t0))
+                self.stats["infer"].add(time.ticks_diff(t2, t1))
+                switch = self._control(t0, time.ticks_diff(t2, t1), True)
+                # 等待渲染线程取走上一帧结果
+                while self.running and self.slot is not None:
+                    time.sleep_ms(1)
+                with self.lock:
+                    self.slot = raw
+        except Exception as e:
+            self.worker_error = e
+        finally:
+            self.worker_alive = False
+
+    def _take(self):
+        with self.lock:
+            raw = self.slot
+            self.slot = None
+            if raw is not None:
+                self.rendering = True
+        return raw
+
+    def _render(self, raw):
+        t0 = time.ticks_us()
+        # 切换到后台缓冲绘制，显示后该缓冲成为前台
+        back = 1 - self.front
+        self.pl.osd_img = self.osd_imgs[back]
+        self.render_func(raw)
+        self.pl.show_image()
+        self.front = back
+        if self.first_frame_cb is not None:
+            cb = self.first_frame_cb
+            self.first_frame_cb = None
+            cb()
+        gc.collect()
+        self.last_render_us = time.ticks_diff(time.ticks_us(), t0)
+        self.rendering = False
+        self.stats["render"].add(self.last_render_us)
+        self._frame_done()
+
+    # 流水线运行，stop_check返回True时退出
+    def run(self, stop_check=None):
+        self.reset_stats()
+        self.running = True
+        self.worker_error = None
+        self.worker_alive = True
+        self.last_t0 = None
+        _thread.start_new_thread(self._infer_worker, ())
+        try:
+            while True:
+                os.exitpoint()
+                if self.worker_error is not None:
+                    raise self.worker_error
+                if stop_check and stop_check():
+                    break
+                raw = self._take()
+                if raw is None:
+                    time.sleep_ms(1)
+                    continue
+                self._render(raw)
+        finally:
+            self.stop()
+
+    # 串行运行，与原例程的循环相同，用于和流水线模式对比帧率及各阶段占用率
+    def run_serial(self, stop_check=None):
+        self.reset_stats()
+        self.last_t0 = None
+        while True:
+            os.exitpoint()
+            if stop_check and stop_check():
+                break
+            t0 = time.ticks_us()
+            img = self.pl.get_frame()
+            t1 = time.ticks_us()
+            raw = self.infer_func(img)
+            t2 = time.ticks_us()
+            self.stats["capture"].add(time.ticks_diff(t1, t0))
+            self.stats["infer"].add(time.ticks_diff(t2, t1))
+            self._render(raw)
+            if self._control(t0, time.ticks_diff(t2, t1), False):
+                self.controller.apply()
+                self.last_t0 = None
+
+    # 停止推理线程并等待其退出，退出后KPU才能安全地反初始化
+    def stop(self):
+        self.running = False
+        while self.worker_alive:
+            time.sleep_ms(1)
+        self.slot = None
+        self.rendering = False
+        self.pl.osd_img = self.osd_imgs[0]
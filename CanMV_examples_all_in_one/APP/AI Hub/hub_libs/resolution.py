@@ -0,0 +1,171 @@
+#####################################################################################################
+# @file         resolution.py
+# @author       正点原子团队(ALIENTEK)
+# @version      V1.0
+# @date         2026-10-19
+# @brief        自适应AI输入分辨率
+#   @note       在几档预先配置好的rgb888p_size之间切换，使每帧耗时保持在目标帧率以内：
+#               二级模型负载上升(画面中手掌/人脸变多)导致超时则降一档，余量充足时升一档。
+#               每档的Ai2d预处理在初始化时全部build好，切换时只需替换引用并重新设置sensor通道2的输出尺寸；
+#               通道2的帧缓存在MediaManager.init()时按当时的输出尺寸分配，候选分辨率不能超过该尺寸，超过的档位在初始化时剔除；
+#               降档只需一个统计窗口超时，升档需要连续多个窗口预测不超时，切换后还有冷却窗口，避免来回振荡
+# @license      Copyright (c) 2020-2032, 广州市星翼电子科技有限公司
+#####################################################################################################
+
+from libs.PipeLine import ScopedTiming
+from libs.AI2D import Ai2d
+from media.sensor import CAM_CHN_ID_2
+import nncase_runtime as nn
+import ulab.numpy as np
+
+# sensor通道2已分配帧缓存的尺寸：宿主在pl上记录为ai_buffer_size，单独运行时为创建PipeLine时的rgb888p_size
+def ai_buffer_size(pl):
+    if not hasattr(pl, "ai_buffer_size"):
+        pl.ai_buffer_size = list(pl.rgb888p_size)
+    return pl.ai_buffer_size
+
+# 重新设置sensor送给AI的通道2输出尺寸，尺寸超过已分配的帧缓存时抛出ValueError，不重启sensor。
+# sensor停止期间所有通道(包括显示通道)都会暂停，调用者须保证此时没有帧正在推理或绘制(流水线已暂停)；
+# 设置失败时恢复原尺寸、重新启动sensor后抛出异常
+def set_ai_framesize(pl, size):
+    limit = ai_buffer_size(pl)
+    if size[0] > limit[0] or size[1] > limit[1]:
+        raise ValueError("AI frame size {}x{} exceeds the {}x{} buffers allocated at init".format(size[0], size[1], limit[0], limit[1]))
+    if list(size) == list(pl.rgb888p_size):
+        return
+    old = pl.rgb888p_size
+    sensor = pl.sensor
+    sensor.stop()
+    try:
+        sensor.set_framesize(width=size[0], height=size[1], chn=CAM_CHN_ID_2)
+    except Exception:
+        sensor.set_framesize(width=old[0], height=old[1], chn=CAM_CHN_ID_2)
+        raise
+    finally:
+        sensor.run()
+    pl.rgb888p_size = size
+
+class ResolutionController:
+    def __init__(self, pl, sizes, target_fps=25, level=0, window=30, high=1.0, low=0.8, up_windows=3, cooldown=2, debug_mode=0):
+        self.pl = pl
+        # 候选分辨率，从大到小排列，宽度需16对齐，宽高比应与sensor一致；超过通道2帧缓存尺寸的档位不可用
+        limit = ai_buffer_size(pl)
+        self.sizes = [size for size in sizes if size[0] <= limit[0] and size[1] <= limit[1]]
+        if len(self.sizes) < len(sizes):
+            print("[res] drop sizes larger than the {}x{} AI buffers".format(limit[0], limit[1]))
+        if not self.sizes:
+            raise ValueError("no candidate size fits the {}x{} AI buffers".format(limit[0], limit[1]))
+        level = min(level, len(self.sizes) - 1)
+        self.target_ms = 1000 / target_fps
+        self.level = level
+        # 每个统计窗口的帧数
+        self.window = window
+        # 窗口平均耗时超过target_ms*high时降档
+        self.high = high
+        # 按像素数折算的上一档预测耗时低于target_ms*low时才允许升档
+        self.low = low
+        # 升档需要连续满足条件的窗口数
+        self.up_windows = up_windows
+        # 切换后跳过的窗口数，等待新分辨率下的耗时稳定
+        self.cooldown = cooldown
+        self.debug_mode = debug_mode
+        # 一级模型及其每档预先build好的Ai2d
+        self.stages = []
+        # 切换分辨率后的回调，参数为新的rgb888p_size，用于更新二级模型等依赖分辨率的状态
+        self.listeners = []
+        self.pending = None
+        self.up_count = 0
+        self.cooldown_left = 0
+        self.switches = 0
+        self._reset_window()
+
+    def _reset_window(self):
+        self.frames = 0
+        self.period_us = 0
+        self.busy_us = 0
+
+    # 当前分辨率
+    def size(self):
+        return self.sizes[self.level]
+
+    # 添加一级模型(对整帧做预处理的AIBase应用)，为每一档分辨率build一份Ai2d预处理
+    def add_stage(self, app):
+        ai2ds = []
+        with ScopedTiming("prebuild ai2d", self.debug_mode > 0):
+            for size in self.sizes:
+                app.rgb888p_size = size
+                app.ai2d = Ai2d(app.debug_mode)
+                app.ai2d.set_ai2d_dtype(nn.ai2d_format.NCHW_FMT, nn.ai2d_format.NCHW_FMT, np.uint8, np.uint8)
+                app.config_preprocess()
+                ai2ds.append(app.ai2d)
+        self.stages.append((app, ai2ds))
+        self._apply_stage(app, ai2ds)
+
+    def add_listener(self, func):
+        self.listeners.append(func)
+        func(self.size())
+
+    def _apply_stage(self, app, ai2ds):
+        app.rgb888p_size = self.size()
+        app.ai2d = ai2ds[self.level]
+
+    # 每帧调用一次，period_us为两帧间隔，busy_us为本帧的计算耗时；需要切换时返回True，由调用者在帧间调用apply
+    def update(self, period_us, busy_us):
+        self.frames += 1
+        self.period_us += period_us
+        self.busy_us += busy_us
+        if self.frames < self.window:
+            return self.pending is not None
+        busy_ms = self.busy_us / self.frames / 1000
+        fps = self.frames * 1000000 / self.period_us if self.period_us > 0 else 0
+        self._reset_window()
+        if self.debug_mode > 0:
+            print("[res] {}x{}, busy: {:.2f}ms, fps: {:.2f}".format(self.size()[0], self.size()[1], busy_ms, fps))
+        if self.cooldown_left > 0:
+            self.cooldown_left -= 1
+            return self.pending is not None
+        target = self.level
+        if busy_ms > self.target_ms * self.high:
+            self.up_count = 0
+            if self.level < len(self.sizes) - 1:
+                target = self.level + 1
+        elif self.level > 0:
+            cur, up = self.sizes[self.level], self.sizes[self.level - 1]
+            predicted_ms = busy_ms * (up[0] * up[1]) / (cur[0] * cur[1])
+            if predicted_ms < self.target_ms * self.low:
+                self.up_count += 1
+                if self.up_count >= self.up_windows:
+                    target = self.level - 1
+            else:
+                self.up_count = 0
+        if target != self.level:
+            old = self.size()
+            new = self.sizes[target]
+            print("[res] {}x{} -> {}x{}, busy: {:.2f}ms, fps: {:.2f}, target: {:.2f}ms".format(old[0], old[1], new[0], new[1], busy_ms, fps, self.target_ms))
+            self.pending = target
+        return self.pending is not None
+
+    # 执行切换，须在没有帧正在推理或绘制时调用(PipelineRunner在推理线程中等渲染空闲后调用)；
+    # 设置sensor失败时保持原分辨率，冷却后再尝试
+    def apply(self):
+        if self.pending is None:
+            return
+        with ScopedTiming("switch resolution", self.debug_mode > 0):
+            target = self.pending
+            self.pending = None
+            size = self.sizes[target]
+            try:
+                set_ai_framesize(self.pl, size)
+            except Exception as e:
+                print("[res] switch to {}x{} failed: {}".format(size[0], size[1], e))
+                self.up_count = 0
+                self.cooldown_left = self.cooldown
+                return
+            self.level = target
+            for app, ai2ds in self.stages:
+                self._apply_stage(app, ai2ds)
+            for func in self.listeners:
+                func(size)
+        self.up_count = 0
+        self.cooldown_left = self.cooldown
+        self.switches += 1
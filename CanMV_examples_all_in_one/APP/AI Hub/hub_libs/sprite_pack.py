@@ -0,0 +1,110 @@
+#####################################################################################################
+# @file         sprite_pack.py
+# @author       正点原子团队(ALIENTEK)
+# @version      V1.0
+# @date         2026-10-19
+# @brief        AI Hub贴图资源包
+#   @note       把例程使用的ARGB贴图(动态手势的方向标志、猜拳的石头剪刀布等)打包为一个文件，由tools/build_sprite_pack.py生成。
+#               资源包在一次会话内只读入一次，未压缩的贴图直接返回指向资源包数据的数组视图(不复制)，
+#               压缩的贴图第一次使用时解码一次，之后各例程共享解码结果。资源包不存在或缺少某个贴图时，从原来的单独bin文件读取。
+#               文件格式(小端)：
+#                   文件头   magic "SPAK", u16 版本, u16 贴图数, u32 数据起始偏移
+#                   索引项   u16 名称长度, 名称(utf-8), u16 宽, u16 高, u8 编码(0:原始ARGB, 1:透明像素游程编码), u8 保留, u32 数据偏移, u32 数据长度
+#                   数据     每个贴图连续存放，按16字节对齐
+#               游程编码的数据为u32 段数, 段数*(u32 起始像素, u32 像素数), 之后依次为各段的ARGB像素，段外的像素全部透明(0)
+# @license      Copyright (c) 2020-2032, 广州市星翼电子科技有限公司
+#####################################################################################################
+
+import struct
+import time
+import os
+import ulab.numpy as np
+
+MAGIC = b"SPAK"
+ENCODING_RAW = 0
+ENCODING_RLE = 1
+SPRITE_PACK_PATH = "/sdcard/CanMV Sample/APP/AI Hub/sprites.pak"
+
+class SpritePack:
+    def __init__(self, path):
+        self.path = path
+        self.data = None
+        self.index = {}             # 名称 -> (宽, 高, 编码, 数据偏移, 数据长度)
+        self.decoded = {}           # 名称 -> 数组，同一会话内的各例程共享
+        self.loaded = False
+        self.load_ms = 0
+
+    # 读入整个资源包并解析索引，只在第一次调用时读取
+    def load(self):
+        if self.loaded:
+            return self.data is not None
+        self.loaded = True
+        start = time.ticks_ms()
+        try:
+            size = os.stat(self.path)[6]
+            self.data = bytearray(size)
+            with open(self.path, "rb") as f:
+                f.readinto(self.data)
+        except OSError:
+            self.data = None
+            print("[sprite] {} not found, load sprites from bin files".format(self.path))
+            return False
+        magic, version, count, data_offset = struct.unpack_from("<4sHHI", self.data, 0)
+        if magic != MAGIC:
+            self.data = None
+            return False
+        pos = 12
+        for i in range(count):
+            name_len = struct.unpack_from("<H", self.data, pos)[0]
+            name = str(self.data[pos + 2:pos + 2 + name_len], "utf-8")
+            pos += 2 + name_len
+            width, height, encoding, _, offset, size = struct.unpack_from("<HHBBII", self.data, pos)
+            pos += 14
+            self.index[name] = (width, height, encoding, data_offset + offset, size)
+        self.load_ms = time.ticks_diff(time.ticks_ms(), start)
+        print("[sprite] load {} sprites: {}ms, {} bytes".format(count, self.load_ms, len(self.data)))
+        return True
+
+    # 解码游程编码的贴图
+    def _decode_rle(self, width, height, offset):
+        out = bytearray(width * height * 4)
+        count = struct.unpack_from("<I", self.data, offset)[0]
+        mv = memoryview(self.data)
+        pos = offset + 4 + count * 8
+        for i in range(count):
+            start, length = struct.unpack_from("<II", self.data, offset + 4 + i * 8)
+            out[start * 4:(start + length) * 4] = mv[pos:pos + length * 4]
+            pos += length * 4
+        return out
+
+    # 获取贴图，返回(高, 宽, 4)的uint8数组；shape和fallback_path用于资源包中没有该贴图时从单独的bin文件读取
+    def get(self, name, shape, fallback_path):
+        sprite = self.decoded.get(name)
+        if sprite is not None:
+            return sprite
+        self.load()
+        entry = self.index.get(name)
+        if entry is None:
+            sprite = np.fromfile(fallback_path, dtype=np.uint8).reshape(shape)
+        else:
+            width, height, encoding, offset, size = entry
+            if encoding == ENCODING_RLE:
+                sprite = np.frombuffer(self._decode_rle(width, height, offset), dtype=np.uint8).reshape((height, width, 4))
+            else:
+                sprite = np.frombuffer(self.data, dtype=np.uint8, count=size, offset=offset).reshape((height, width, 4))
+        self.decoded[name] = sprite
+        return sprite
+
+    # 例程启动时批量获取贴图并打印耗时，sprites为{名称: (shape, 单独bin文件路径)}，返回{名称: 数组}
+    def load_sprites(self, owner, sprites):
+        start = time.ticks_ms()
+        cached = sum(1 for name in sprites if name in self.decoded)
+        result = {}
+        for name in sprites:
+            shape, fallback_path = sprites[name]
+            result[name] = self.get(name, shape, fallback_path)
+        print("[sprite] {}: {} sprites ({} shared) in {}ms".format(owner, len(sprites), cached, time.ticks_diff(time.ticks_ms(), start)))
+        return result
+
+# 进程内共享的贴图资源包
+SPRITE_PACK = SpritePack(SPRITE_PACK_PATH)
@@ -0,0 +1,246 @@
+#####################################################################################################
+# @file         tracker.py
+# @author       正点原子团队(ALIENTEK)
+# @version      V1.0
+# @date         2026-10-19
+# @brief        间隔检测+轻量跟踪
+#   @note       检测模型只在每N帧或画面运动较大时运行，其余帧用匀速卡尔曼滤波预测目标框位置，
+#               检测帧通过IoU关联更新轨迹并分配稳定的轨迹ID；N根据实测的检测帧和跟踪帧耗时自适应调整。
+#               Tracker部分不依赖硬件，可在PC上配合tools/track_eval.py对录制的检测序列做精度评估
+# @license      Copyright (c) 2020-2032, 广州市星翼电子科技有限公司
+#####################################################################################################
+
+import time
+import math
+try:
+    import ujson as json
+except ImportError:
+    import json
+
+# 计算两个框[x1, y1, x2, y2]的交并比
+def iou(a, b):
+    iw = min(a[2], b[2]) - max(a[0], b[0])
+    ih = min(a[3], b[3]) - max(a[1], b[1])
+    if iw <= 0 or ih <= 0:
+        return 0.0
+    inter = iw * ih
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+# 按IoU从大到小贪心匹配，返回[(i, j)]匹配对以及未匹配的a、b下标
+def greedy_match(boxes_a, boxes_b, iou_threshold):
+    pairs = []
+    for i in range(len(boxes_a)):
+        for j in range(len(boxes_b)):
+            v = iou(boxes_a[i], boxes_b[j])
+            if v >= iou_threshold:
+                pairs.append((v, i, j))
+    pairs.sort(key=lambda p: p[0], reverse=True)
+    used_a = set()
+    used_b = set()
+    matches = []
+    for v, i, j in pairs:
+        if i in used_a or j in used_b:
+            continue
+        used_a.add(i)
+        used_b.add(j)
+        matches.append((i, j))
+    unmatched_a = [i for i in range(len(boxes_a)) if i not in used_a]
+    unmatched_b = [j for j in range(len(boxes_b)) if j not in used_b]
+    return matches, unmatched_a, unmatched_b
+
+# 单个坐标的匀速卡尔曼滤波，状态为[位置, 速度]
+class Kalman1D:
+    def __init__(self, pos, q=1.0, r=16.0):
+        self.x = pos            # 位置
+        self.v = 0.0            # 速度(像素/帧)
+        # 协方差矩阵[[p00, p01], [p01, p11]]，初始速度未知，速度方差取大值
+        self.p00 = r
+        self.p01 = 0.0
+        self.p11 = 100.0
+        self.q = q              # 过程噪声
+        self.r = r              # 观测噪声
+
+    def predict(self):
+        self.x += self.v
+        self.p00 += 2 * self.p01 + self.p11 + self.q
+        self.p01 += self.p11
+        self.p11 += self.q
+        return self.x
+
+    def update(self, z):
+        s = self.p00 + self.r
+        k0 = self.p00 / s
+        k1 = self.p01 / s
+        y = z - self.x
+        self.x += k0 * y
+        self.v += k1 * y
+        p00, p01, p11 = self.p00, self.p01, self.p11
+        self.p00 = (1 - k0) * p00
+        self.p01 = (1 - k0) * p01
+        self.p11 = p11 - k1 * p01
+
+# 单条轨迹，分别对中心点和宽高做滤波
+class Track:
+    def __init__(self, track_id, box, score, cls):
+        cx, cy, w, h = (box[0] + box[2]) / 2, (box[1] + box[3]) / 2, box[2] - box[0], box[3] - box[1]
+        self.id = track_id
+        self.filters = [Kalman1D(cx), Kalman1D(cy), Kalman1D(w, q=0.5), Kalman1D(h, q=0.5)]
+        self.score = score
+        self.cls = cls
+        self.hits = 1           # 累计被检测结果命中的次数
+        self.misses = 0         # 连续未被检测结果命中的检测轮数
+
+    def box(self):
+        cx, cy, w, h = [f.x for f in self.filters]
+        w = max(w, 1.0)
+        h = max(h, 1.0)
+        return [cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2]
+
+    # 中心点速度大小(像素/帧)
+    def speed(self):
+        return math.sqrt(self.filters[0].v ** 2 + self.filters[1].v ** 2)
+
+    def predict(self):
+        for f in self.filters:
+            f.predict()
+
+    def update(self, box, score, cls):
+        z = [(box[0] + box[2]) / 2, (box[1] + box[3]) / 2, box[2] - box[0], box[3] - box[1]]
+        for i in range(4):
+            self.filters[i].update(z[i])
+        self.score = score
+        self.cls = cls
+        self.hits += 1
+        self.misses = 0
+
+# 多目标跟踪器，检测框统一为[x1, y1, x2, y2, score, cls]
+class Tracker:
+    def __init__(self, iou_threshold=0.3, max_misses=2):
+        self.iou_threshold = iou_threshold
+        # 连续多少个检测轮次未匹配则删除轨迹
+        self.max_misses = max_misses
+        self.tracks = []
+        self.next_id = 1
+
+    # 无检测结果的帧，只做预测
+    def predict(self):
+        for t in self.tracks:
+            t.predict()
+
+    # 检测帧，先预测，再与检测结果关联
+    def update(self, dets):
+        self.predict()
+        matches, unmatched_tracks, unmatched_dets = greedy_match([t.box() for t in self.tracks], dets, self.iou_threshold)
+        for i, j in matches:
+            self.tracks[i].update(dets[j], dets[j][4], dets[j][5])
+        for i in unmatched_tracks:
+            self.tracks[i].misses += 1
+        self.tracks = [t for t in self.tracks if t.misses <= self.max_misses]
+        for j in unmatched_dets:
+            self.tracks.append(Track(self.next_id, dets[j], dets[j][4], dets[j][5]))
+            self.next_id += 1
+
+    # 当前所有轨迹的输出，[x1, y1, x2, y2, score, cls, track_id]，本轮未匹配上的轨迹不输出
+    def results(self):
+        return [t.box() + [t.score, t.cls, t.id] for t in self.tracks if t.misses == 0]
+
+    def max_speed(self):
+        return max([t.speed() for t in self.tracks]) if self.tracks else 0.0
+
+# 帧间运动量估计，对降采样后的单通道图像求平均绝对差
+class MotionProbe:
+    def __init__(self, step=16):
+        import ulab.numpy as np
+        self.np = np
+        self.step = step
+        self.prev = None
+
+    # frame为PipeLine.get_frame()得到的CHW格式uint8数组，返回0~255的平均差值
+    def measure(self, frame):
+        np = self.np
+        cur = np.array(frame[1, ::self.step, ::self.step], dtype=np.int16)
+        if self.prev is None:
+            self.prev = cur
+            return 0.0
+        diff = np.mean(abs(cur - self.prev))
+        self.prev = cur
+        return diff
+
+# 包装AIBase检测应用，按自适应间隔运行检测，其余帧用跟踪结果代替
+class TrackedDetector:
+    def __init__(self, app, to_xyxy, from_xyxy, target_fps=30, n_min=1, n_max=8, motion_threshold=12.0, speed_threshold=40.0, record_path=None, debug_mode=0):
+        self.app = app
+        # 应用检测结果与[x1, y1, x2, y2, score, cls]之间的互相转换函数
+        self.to_xyxy = to_xyxy
+        self.from_xyxy = from_xyxy
+        self.target_ms = 1000 / target_fps
+        self.n_min = n_min
+        self.n_max = n_max
+        # 画面运动超过该阈值时立即重新检测
+        self.motion_threshold = motion_threshold
+        # 轨迹速度(像素/帧)超过该阈值时立即重新检测
+        self.speed_threshold = speed_threshold
+        self.debug_mode = debug_mode
+        self.tracker = Tracker()
+        self.motion = MotionProbe()
+        self.n = n_min
+        self.since_det = 0
+        # 检测帧和跟踪帧耗时的滑动平均(ms)
+        self.det_ms = 0.0
+        self.trk_ms = 0.0
+        self.det_frames = 0
+        self.frames = 0
+        # 录制模式：每帧都运行检测，并把检测结果逐行写入文件，用于PC端精度评估
+        self.record_file = open(record_path, "w") if record_path else None
+
+    def _ema(self, avg, value):
+        return value if avg == 0 else avg * 0.9 + value * 0.1
+
+    # 根据检测帧和跟踪帧的耗时选择检测间隔，使平均帧耗时不超过目标值
+    def _adapt(self):
+        if self.det_ms <= self.target_ms or self.trk_ms == 0:
+            n = self.n_min
+        elif self.trk_ms >= self.target_ms:
+            n = self.n_max
+        else:
+            n = math.ceil((self.det_ms - self.trk_ms) / (self.target_ms - self.trk_ms))
+        self.n = max(self.n_min, min(self.n_max, n))
+
+    def run(self, img):
+        t0 = time.ticks_us()
+        self.frames += 1
+        motion = self.motion.measure(img)
+        detect = (self.record_file is not None
+                  or self.since_det + 1 >= self.n
+                  or not self.tracker.tracks and self.since_det + 1 >= self.n_min
+                  or motion > self.motion_threshold
+                  or self.tracker.max_speed() > self.speed_threshold)
+        if detect:
+            dets = [self.to_xyxy(d) for d in self.app.run(img)]
+            self.tracker.update(dets)
+            self.since_det = 0
+            self.det_frames += 1
+            if self.record_file is not None:
+                self.record_file.write(json.dumps({"frame": self.frames, "boxes": dets}) + "\n")
+        else:
+            self.tracker.predict()
+            self.since_det += 1
+        elapsed_ms = time.ticks_diff(time.ticks_us(), t0) / 1000
+        if detect:
+            self.det_ms = self._ema(self.det_ms, elapsed_ms)
+        else:
+            self.trk_ms = self._ema(self.trk_ms, elapsed_ms)
+        self._adapt()
+        if self.debug_mode > 0:
+            print("[track] {} n: {}, motion: {:.1f}, tracks: {}, {:.2f}ms".format("det" if detect else "trk", self.n, motion, len(self.tracker.tracks), elapsed_ms))
+        return [self.from_xyxy(r) for r in self.tracker.results()]
+
+    # KPU占空比：运行检测的帧占全部帧的比例
+    def duty(self):
+        return self.det_frames / self.frames if self.frames > 0 else 0
+
+    def deinit(self):
+        if self.record_file is not None:
+            self.record_file.close()
+            self.record_file = None
@@ -161,7 +161,7 @@ if __name__ == "__main__":
                         os.remove("/sdcard/main.py")
                 except Exception as e:
                     pass
-                with open("/sdcard/CanMV Sample/main.py", "rb") as f:
+                with open("/sdcard/CanMV Sample/boot_main.py", "rb") as f:
                     code_src = f.read()
                 with open("/sdcard/main.py", "wb") as f:
                     f.write(code_src)
@@ -36,19 +36,12 @@ import machine
 from machine import Pin
 from machine import FPIOA
 
-class Button():
-    def __init__(self, fpioa, pinx, valid=0):
-        fpioa.set_function(pinx, fpioa.GPIO0 + pinx)
-
-        pull = Pin.PULL_UP if valid == 0 else Pin.PULL_DOWN
-        self.pin = Pin(pinx, Pin.IN, pull=pull, drive=7)
-        self.valid = valid
-
-    def is_pressing(self):
-        return True if self.pin.value() == self.valid else False
+sys.path.append("/sdcard/CanMV Sample/APP/AI Hub")  # AI Hub公共模块所在目录
+from hub_libs.demo_host import HostedDemo, run_standalone
+from hub_libs.model_cache import CachedAIBase
 
 # 自定义车牌检测类
-class LicenceDetectionApp(AIBase):
+class LicenceDetectionApp(CachedAIBase):
     # 初始化函数，设置车牌检测应用的参数
     def __init__(self, kmodel_path, model_input_size, confidence_threshold=0.5, nms_threshold=0.2, rgb888p_size=[224,224], display_size=[1920,1080], debug_mode=0):
         super().__init__(kmodel_path, model_input_size, rgb888p_size, debug_mode)  # 调用基类的初始化函数
@@ -84,7 +77,7 @@ class LicenceDetectionApp(AIBase):
             return det_res
 
 # 自定义车牌识别任务类
-class LicenceRecognitionApp(AIBase):
+class LicenceRecognitionApp(CachedAIBase):
     def __init__(self,kmodel_path,model_input_size,rgb888p_size=[1920,1080],display_size=[1920,1080],debug_mode=0):
         super().__init__(kmodel_path,model_input_size,rgb888p_size,debug_mode)
         # kmodel路径
@@ -180,54 +173,35 @@ class LicenceRec:
                 pl.osd_img.draw_string_advanced( point_8[4], point_8[5] - 42, 40,rec_res[det_index] , color=(255,255,153,18))
 
 
-if __name__=="__main__":
-    fpioa = FPIOA()
-    button0 = Button(fpioa, 34, 0)
+# 例程需要的AI输入分辨率，由宿主或run_standalone设置sensor通道2的输出尺寸
+RGB888P_SIZE = [640, 360]
 
-    # 显示模式，默认"lcd"
-    display_mode="lcd"
-    display_size=[640,480]
+# 例程入口：在已创建的PipeLine上初始化模型，返回HostedDemo，由AI Hub宿主或run_standalone运行和释放
+def start(pl):
+    display_size = pl.display_size
     # 车牌检测模型路径
     licence_det_kmodel_path="/sdcard/examples/kmodel/LPD_640.kmodel"
     # 车牌识别模型路径
     licence_rec_kmodel_path="/sdcard/examples/kmodel/licence_reco.kmodel"
     # 其它参数
-    rgb888p_size=[640,360]
     licence_det_input_size=[640,640]
     licence_rec_input_size=[220,32]
     confidence_threshold=0.2
     nms_threshold=0.2
 
-    # 初始化PipeLine，只关注传给AI的图像分辨率，显示的分辨率
-    sensor = Sensor(width=1280, height=960) # 构建摄像头对象
-    pl = PipeLine(rgb888p_size=rgb888p_size, display_size=display_size, display_mode=display_mode)
-    pl.create(sensor=sensor)  # 创建PipeLine实例
-    lr=LicenceRec(licence_det_kmodel_path,licence_rec_kmodel_path,det_input_size=licence_det_input_size,rec_input_size=licence_rec_input_size,confidence_threshold=confidence_threshold,nms_threshold=nms_threshold,rgb888p_size=rgb888p_size,display_size=display_size)
-    try:
-        while True:
-            os.exitpoint()
-            with ScopedTiming("total",1):
-                img=pl.get_frame()                  # 获取当前帧
-                det_res,rec_res=lr.run(img)         # 推理当前帧
-#                print(det_res, rec_res)             # 打印结果
-                lr.draw_result(pl,det_res,rec_res)  # 绘制当前帧推理结果
-                pl.show_image()                     # 展示推理结果
-                gc.collect()
-            if button0.is_pressing():
-                try:
-                    with open("/sdcard/main.py", "rb") as f:
-                        os.remove("/sdcard/main.py")
-                except Exception as e:
-                    pass
-                with open("/sdcard/CanMV Sample/main.py", "rb") as f:
-                    code_src = f.read()
-                with open("/sdcard/main.py", "wb") as f:
-                    f.write(code_src)
-                machine.reset()
-    except Exception as e:
-        sys.print_exception(e)
-    finally:
+    lr=LicenceRec(licence_det_kmodel_path,licence_rec_kmodel_path,det_input_size=licence_det_input_size,rec_input_size=licence_rec_input_size,confidence_threshold=confidence_threshold,nms_threshold=nms_threshold,rgb888p_size=RGB888P_SIZE,display_size=display_size)
+
+    # 逐帧处理：推理并绘制结果，取帧和送显由HostedDemo完成
+    def frame(img):
+        det_res,rec_res=lr.run(img)         # 推理当前帧
+#        print(det_res, rec_res)             # 打印结果
+        lr.draw_result(pl,det_res,rec_res)  # 绘制当前帧推理结果
+
+    def release():
         lr.licence_det.deinit()
         lr.licence_rec.deinit()
-        pl.destroy()
 
+    return HostedDemo(pl, release, frame_func=frame)
+
+if __name__=="__main__":
+    run_standalone(start, RGB888P_SIZE)
@@ -37,19 +37,12 @@ import machine
 from machine import Pin
 from machine import FPIOA
 
-class Button():
-    def __init__(self, fpioa, pinx, valid=0):
-        fpioa.set_function(pinx, fpioa.GPIO0 + pinx)
-
-        pull = Pin.PULL_UP if valid == 0 else Pin.PULL_DOWN
-        self.pin = Pin(pinx, Pin.IN, pull=pull, drive=7)
-        self.valid = valid
-
-    def is_pressing(self):
-        return True if self.pin.value() == self.valid else False
+sys.path.append("/sdcard/CanMV Sample/APP/AI Hub")  # AI Hub公共模块所在目录
+from hub_libs.demo_host import HostedDemo, run_standalone
+from hub_libs.model_cache import CachedAIBase
 
 # 自定义YOLOv8检测类
-class ObjectDetectionApp(AIBase):
+class ObjectDetectionApp(CachedAIBase):
     def __init__(self,kmodel_path,labels,model_input_size,max_boxes_num,confidence_threshold=0.5,nms_threshold=0.2,rgb888p_size=[224,224],display_size=[1920,1080],debug_mode=0):
         super().__init__(kmodel_path,model_input_size,rgb888p_size,debug_mode)
         self.kmodel_path=kmodel_path
@@ -99,7 +92,7 @@ class ObjectDetectionApp(AIBase):
             inds_ori = np.argmax(scores_ori,axis=-1)
             boxes,scores,inds = [],[],[]
             for i in range(len(boxes_ori)):
-                if confs_ori[i] > confidence_threshold:
+                if confs_ori[i] > self.confidence_threshold:
                     scores.append(confs_ori[i])
                     inds.append(inds_ori[i])
                     x = boxes_ori[i,0]
@@ -117,7 +110,7 @@ class ObjectDetectionApp(AIBase):
             scores = np.array(scores)
             inds = np.array(inds)
             # NMS过程
-            keep = self.nms(boxes,scores,nms_threshold)
+            keep = self.nms(boxes,scores,self.nms_threshold)
             dets = np.concatenate((boxes, scores.reshape((len(boxes),1)), inds.reshape((len(boxes),1))), axis=1)
             dets_out = []
             for keep_i in keep:
@@ -186,13 +179,12 @@ class ObjectDetectionApp(AIBase):
         return self.color_four[idx]
 
 
-if __name__=="__main__":
-    fpioa = FPIOA()
-    button0 = Button(fpioa, 34, 0)
+# 例程需要的AI输入分辨率，由宿主或run_standalone设置sensor通道2的输出尺寸
+RGB888P_SIZE = [320, 320]
 
-    # 显示模式，默认"lcd"
-    display_mode="lcd"
-    display_size=[640,480]
+# 例程入口：在已创建的PipeLine上初始化模型，返回HostedDemo，由AI Hub宿主或run_standalone运行和释放
+def start(pl):
+    display_size = pl.display_size
     # 模型路径
     kmodel_path="/sdcard/examples/kmodel/yolov8n_320.kmodel"
     labels = ["person", "bicycle", "car", "motorcycle", "airplane", "bus", "train", "truck", "boat", "traffic light", "fire hydrant", "stop sign", "parking meter", "bench", "bird", "cat", "dog", "horse", "sheep", "cow", "elephant", "bear", "zebra", "giraffe", "backpack", "umbrella", "handbag", "tie", "suitcase", "frisbee", "skis", "snowboard", "sports ball", "kite", "baseball bat", "baseball glove", "skateboard", "surfboard", "tennis racket", "bottle", "wine glass", "cup", "fork", "knife", "spoon", "bowl", "banana", "apple", "sandwich", "orange", "broccoli", "carrot", "hot dog", "pizza", "donut", "cake", "chair", "couch", "potted plant", "bed", "dining table", "toilet", "tv", "laptop", "mouse", "remote", "keyboard", "cell phone", "microwave", "oven", "toaster", "sink", "refrigerator", "book", "clock", "vase", "scissors", "teddy bear", "hair drier", "toothbrush"]
@@ -200,44 +192,24 @@ if __name__=="__main__":
     confidence_threshold = 0.2
     nms_threshold = 0.2
     max_boxes_num = 50
-    rgb888p_size=[320,320]
 
-    # 初始化PipeLine
-    sensor = Sensor(width=1280, height=960) # 构建摄像头对象
-    pl = PipeLine(rgb888p_size=rgb888p_size, display_size=display_size, display_mode=display_mode)
-    pl.create(sensor=sensor)  # 创建PipeLine实例
     # 初始化自定义目标检测实例
-    ob_det=ObjectDetectionApp(kmodel_path,labels=labels,model_input_size=[320,320],max_boxes_num=max_boxes_num,confidence_threshold=confidence_threshold,nms_threshold=nms_threshold,rgb888p_size=rgb888p_size,display_size=display_size,debug_mode=0)
+    ob_det=ObjectDetectionApp(kmodel_path,labels=labels,model_input_size=[320,320],max_boxes_num=max_boxes_num,confidence_threshold=confidence_threshold,nms_threshold=nms_threshold,rgb888p_size=RGB888P_SIZE,display_size=display_size,debug_mode=0)
     ob_det.config_preprocess()
-    try:
-        while True:
-            os.exitpoint()
-            with ScopedTiming("total",1):
-                # 获取当前帧数据
-                img=pl.get_frame()
-                # 推理当前帧
-                res=ob_det.run(img)
-                # 打印结果
-#                print(res)
-                # 绘制结果到PipeLine的osd图像
-                ob_det.draw_result(pl,res)
-                # 显示当前的绘制结果
-                pl.show_image()
-                gc.collect()
-            if button0.is_pressing():
-                try:
-                    with open("/sdcard/main.py", "rb") as f:
-                        os.remove("/sdcard/main.py")
-                except Exception as e:
-                    pass
-                with open("/sdcard/CanMV Sample/main.py", "rb") as f:
-                    code_src = f.read()
-                with open("/sdcard/main.py", "wb") as f:
-                    f.write(code_src)
-                machine.reset()
-    except Exception as e:
-        sys.print_exception(e)
-    finally:
+
+    # 逐帧处理：推理并绘制结果，取帧和送显由HostedDemo完成
+    def frame(img):
+        # 推理当前帧
+        res=ob_det.run(img)
+        # 打印结果
+#        print(res)
+        # 绘制结果到PipeLine的osd图像
+        ob_det.draw_result(pl,res)
+
+    def release():
         ob_det.deinit()
-        pl.destroy()
 
+    return HostedDemo(pl, release, frame_func=frame)
+
+if __name__=="__main__":
+    run_standalone(start, RGB888P_SIZE)
@@ -39,16 +39,9 @@ import machine
 from machine import Pin
 from machine import FPIOA
 
-class Button():
-    def __init__(self, fpioa, pinx, valid=0):
-        fpioa.set_function(pinx, fpioa.GPIO0 + pinx)
-
-        pull = Pin.PULL_UP if valid == 0 else Pin.PULL_DOWN
-        self.pin = Pin(pinx, Pin.IN, pull=pull, drive=7)
-        self.valid = valid
-
-    def is_pressing(self):
-        return True if self.pin.value() == self.valid else False
+sys.path.append("/sdcard/CanMV Sample/APP/AI Hub")  # AI Hub公共模块所在目录
+from hub_libs.demo_host import HostedDemo, run_standalone
+from hub_libs.model_cache import CachedAIBase
 
 # 将GPIO0配置为普通GPIO模式
 fpioa = FPIOA()
@@ -57,7 +50,7 @@ key1 = Pin(35, Pin.IN, pull=Pin.PULL_UP,drive=7) #构建key1对象
 key_node = 0 #按键标志位
 
 # 自定义自学习类
-class SelfLearningApp(AIBase):
+class SelfLearningApp(CachedAIBase):
     def __init__(self,kmodel_path,model_input_size,labels,top_k,threshold,database_path,rgb888p_size=[224,224],display_size=[1920,1080],debug_mode=0):
         super().__init__(kmodel_path,model_input_size,rgb888p_size,debug_mode)
         self.kmodel_path=kmodel_path
@@ -194,67 +187,44 @@ class SelfLearningApp(AIBase):
         return tmp / (mold_out * mold_save)
 
 
-if __name__=="__main__":
-    fpioa = FPIOA()
-    button0 = Button(fpioa, 34, 0)
+# 例程需要的AI输入分辨率，由宿主或run_standalone设置sensor通道2的输出尺寸
+RGB888P_SIZE = [1280, 960]
 
-    # 显示模式，默认"lcd"
-    display_mode="lcd"
-    display_size=[640,480]
+# 例程入口：在已创建的PipeLine上初始化模型，返回HostedDemo，由AI Hub宿主或run_standalone运行和释放
+def start(pl):
+    display_size = pl.display_size
     # 模型路径
     kmodel_path="/sdcard/examples/kmodel/recognition.kmodel"
     database_path="/sdcard/examples/utils/features/"
     # 其它参数设置
-    rgb888p_size=[1280,960]
     model_input_size=[224,224]
     labels=["苹果","香蕉","梨"]
     top_k=3
     threshold=0.5
 
-    # 初始化PipeLine
-    sensor = Sensor(width=1280, height=960) # 构建摄像头对象
-    pl = PipeLine(rgb888p_size=rgb888p_size, display_size=display_size, display_mode=display_mode)
-    pl.create(sensor=sensor)  # 创建PipeLine实例
     # 初始化自学习实例
-    sl=SelfLearningApp(kmodel_path,model_input_size=model_input_size,labels=labels,top_k=top_k,threshold=threshold,database_path=database_path,rgb888p_size=rgb888p_size,display_size=display_size,debug_mode=0)
+    sl=SelfLearningApp(kmodel_path,model_input_size=model_input_size,labels=labels,top_k=top_k,threshold=threshold,database_path=database_path,rgb888p_size=RGB888P_SIZE,display_size=display_size,debug_mode=0)
     sl.config_preprocess()
-    try:
-        while True:
-            os.exitpoint()
-            with ScopedTiming("total",1):
-                #检测按键
-                if key1.value()==0:   # 按键被按下
-                    time.sleep_ms(10) # 消除抖动
-                    if key1.value()==0: # 确认按键被按下
-                        print('key1被按下')
-                        key_node = 1
-                        while not key1.value(): #检测按键是否松开
-                            pass
-                # 获取当前帧数据
-                img=pl.get_frame()
-                # 推理当前帧
-                res=sl.run(img)
-                # 打印结果
-                # print(res)
-                # 绘制结果到PipeLine的osd图像
-                sl.draw_result(pl,res)
-                # 显示当前的绘制结果
-                pl.show_image()
-                gc.collect()
-            if button0.is_pressing():
-                try:
-                    with open("/sdcard/main.py", "rb") as f:
-                        os.remove("/sdcard/main.py")
-                except Exception as e:
+
+    # 逐帧处理：推理并绘制结果，取帧和送显由HostedDemo完成
+    def frame(img):
+        global key_node
+        #检测按键
+        if key1.value()==0:   # 按键被按下
+            time.sleep_ms(10) # 消除抖动
+            if key1.value()==0: # 确认按键被按下
+                print('key1被按下')
+                key_node = 1
+                while not key1.value(): #检测按键是否松开
                     pass
-                with open("/sdcard/CanMV Sample/main.py", "rb") as f:
-                    code_src = f.read()
-                with open("/sdcard/main.py", "wb") as f:
-                    f.write(code_src)
-                machine.reset()
-    except Exception as e:
-        sys.print_exception(e)
-    finally:
+        # 推理当前帧
+        res=sl.run(img)
+        # 打印结果
+        # print(res)
+        # 绘制结果到PipeLine的osd图像
+        sl.draw_result(pl,res)
+
+    def release():
         # 删除features文件夹
         stat_info = os.stat(database_path)
         if (stat_info[0] & 0x4000):
@@ -263,5 +233,8 @@ if __name__=="__main__":
                 os.remove(database_path + l)
         os.rmdir(database_path)
         sl.deinit()
-        pl.destroy()
 
+    return HostedDemo(pl, release, frame_func=frame)
+
+if __name__=="__main__":
+    run_standalone(start, RGB888P_SIZE)
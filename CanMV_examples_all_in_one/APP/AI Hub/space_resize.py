@@ -37,19 +37,12 @@ import machine
 from machine import Pin
 from machine import FPIOA
 
-class Button():
-    def __init__(self, fpioa, pinx, valid=0):
-        fpioa.set_function(pinx, fpioa.GPIO0 + pinx)
-
-        pull = Pin.PULL_UP if valid == 0 else Pin.PULL_DOWN
-        self.pin = Pin(pinx, Pin.IN, pull=pull, drive=7)
-        self.valid = valid
-
-    def is_pressing(self):
-        return True if self.pin.value() == self.valid else False
+sys.path.append("/sdcard/CanMV Sample/APP/AI Hub")  # AI Hub公共模块所在目录
+from hub_libs.demo_host import HostedDemo, run_standalone
+from hub_libs.model_cache import CachedAIBase
 
 # 自定义手掌检测任务类
-class HandDetApp(AIBase):
+class HandDetApp(CachedAIBase):
     def __init__(self,kmodel_path,labels,model_input_size,anchors,confidence_threshold=0.2,nms_threshold=0.5,nms_option=False, strides=[8,16,32],rgb888p_size=[1920,1080],display_size=[1920,1080],debug_mode=0):
         super().__init__(kmodel_path,model_input_size,rgb888p_size,debug_mode)
         # kmodel路径
@@ -119,7 +112,7 @@ class HandDetApp(AIBase):
         return top, bottom, left, right
 
 # 自定义手势关键点分类任务类
-class HandKPClassApp(AIBase):
+class HandKPClassApp(CachedAIBase):
     def __init__(self,kmodel_path,model_input_size,rgb888p_size=[1920,1080],display_size=[1920,1080],debug_mode=0):
         super().__init__(kmodel_path,model_input_size,rgb888p_size,debug_mode)
         # kmodel路径
@@ -216,8 +209,16 @@ class SpaceResize:
         self.crop_area = 0                                                   # 剪切区域
         self.rect_frame_x = 0                                                # osd绘画起始点 x
         self.rect_frame_y = 0                                                # osd绘画起始点 y
-        self.masks = np.zeros((self.display_size[1],self.display_size[0],4),dtype=np.uint8)
-        self.mask_img=image.Image(self.display_size[0], self.display_size[1], image.ARGB8888,alloc=image.ALLOC_REF,data=self.masks)
+        # 放大图直接写入OSD，不再使用整屏的中间图层：只清除上一帧放大图的区域并写入新区域，其余像素保持透明
+        self.osd_np = None                                                   # OSD图像的numpy视图
+        self.patch = None                                                    # 本帧待显示的放大图(区域[x,y,w,h], 图像数据)
+        self.patch_rect = None                                               # OSD上当前显示的放大图区域[x,y,w,h]
+        self.show_tip = False                                                # OSD上当前是否显示提示文字
+        # 帧耗时和OSD写入量统计
+        self.report_interval = 100                                           # 每多少帧打印一次统计
+        self.frame_count = 0
+        self.frame_ms = 0
+        self.osd_bytes = 0
         self.hand_det=HandDetApp(self.hand_det_kmodel,self.labels,model_input_size=self.det_input_size,anchors=self.anchors,confidence_threshold=self.confidence_threshold,nms_threshold=self.nms_threshold,nms_option=self.nms_option,strides=self.strides,rgb888p_size=self.rgb888p_size,display_size=self.display_size,debug_mode=0)
         self.hand_kp=HandKPClassApp(self.hand_kp_kmodel,model_input_size=self.kp_input_size,rgb888p_size=self.rgb888p_size,display_size=self.display_size)
         self.ai2d=Ai2d(debug_mode)
@@ -260,7 +261,6 @@ class SpaceResize:
                     self.two_point_mean_h = np.sqrt(pow(two_point[0] - two_point[2],2) + pow(two_point[1] - two_point[3],2))*0.8
                     self.first_start = False
             else:
-                self.mask_img.clear()
                 self.two_point_left_x = int(max((two_point[0] + two_point[2]) / 2 - self.two_point_mean_w / 2, 0))
                 self.two_point_top_y = int(max((two_point[1] + two_point[3]) / 2 - self.two_point_mean_h / 2, 0))
                 self.two_point_crop_w = int(min(min((two_point[0] + two_point[2]) / 2 - self.two_point_mean_w / 2 + self.two_point_mean_w , self.two_point_mean_w), self.rgb888p_size[0] - ((two_point[0] + two_point[2]) / 2 - self.two_point_mean_w / 2)))
@@ -273,33 +273,70 @@ class SpaceResize:
                 self.draw_w = min(self.new_resize_w,self.display_size[0]-self.rect_frame_x-1)
                 self.draw_h = min(self.new_resize_h,self.display_size[1]-self.rect_frame_y-1)
                 space_np_out = self.imgprocess(input_np, self.two_point_left_x, self.two_point_top_y, self.two_point_crop_w, self.two_point_crop_h, self.new_resize_w, self.new_resize_h)      # 运行 隔空缩放检测 ai2d
-                self.masks[self.rect_frame_y:self.rect_frame_y + self.draw_h,self.rect_frame_x:self.rect_frame_x + self.draw_w,0] = 255
-                self.masks[self.rect_frame_y:self.rect_frame_y + self.draw_h,self.rect_frame_x:self.rect_frame_x + self.draw_w,1:4] = space_np_out[0][0:self.draw_h,0:self.draw_w,:]
+                self.patch = ([self.rect_frame_x, self.rect_frame_y, self.draw_w, self.draw_h], space_np_out[0])
         return det_res
 
+    # 整屏清除OSD
+    def clear_osd(self,pl):
+        pl.osd_img.clear()
+        self.osd_bytes += self.display_size[0] * self.display_size[1] * 4
+        self.patch_rect = None
+
+    # 清除旧放大图区域并写入新放大图，清除和写入的范围即新旧两个区域的并集
+    def update_patch(self,rect,data):
+        x, y, w, h = rect
+        if self.patch_rect is not None:
+            old_x, old_y, old_w, old_h = self.patch_rect
+            self.osd_np[old_y:old_y + old_h, old_x:old_x + old_w, :] = 0
+            self.osd_bytes += old_w * old_h * 4
+        self.osd_np[y:y + h, x:x + w, 0] = 255
+        self.osd_np[y:y + h, x:x + w, 1:4] = data[0:h, 0:w, :]
+        self.osd_bytes += w * h * 4
+        self.patch_rect = rect
+
     # 绘制效果
     def draw_result(self,pl,det_res):
-        pl.osd_img.clear()
+        if self.osd_np is None:
+            self.clear_osd(pl)
+            self.osd_np = pl.osd_img.to_numpy_ref()
         if len(det_res)==1:
-            pl.osd_img.copy_from(self.mask_img)
-        else:
+            if self.show_tip:
+                self.clear_osd(pl)
+                self.show_tip = False
+            if self.patch is not None:
+                self.update_patch(self.patch[0], self.patch[1])
+                self.patch = None
+        elif not self.show_tip:
+            # 提示文字不变，只在切换时绘制一次
+            self.clear_osd(pl)
             pl.osd_img.draw_string_advanced((self.display_size[0]//2),(self.display_size[1]//2),32,"请保证一只手入镜!",color=(255,0,0))
+            self.show_tip = True
 
+    # 统计一帧的耗时，每report_interval帧打印平均帧耗时和OSD写入量
+    def count_frame(self,frame_ms):
+        self.frame_count += 1
+        self.frame_ms += frame_ms
+        if self.frame_count == self.report_interval:
+            full_bytes = self.display_size[0] * self.display_size[1] * 4 * 2
+            print("[space_resize] frame {:.1f}ms, osd write {}KB/frame (full clear+copy {}KB/frame)".format(
+                self.frame_ms / self.frame_count, self.osd_bytes // self.frame_count // 1024, full_bytes // 1024))
+            self.frame_count = 0
+            self.frame_ms = 0
+            self.osd_bytes = 0
 
 
-if __name__=="__main__":
-    fpioa = FPIOA()
-    button0 = Button(fpioa, 34, 0)
 
-    # 显示模式，默认"lcd"
-    display_mode="lcd"
-    display_size=[640,480]
+# 例程需要的AI输入分辨率，由宿主或run_standalone设置sensor通道2的输出尺寸
+RGB888P_SIZE = [1024, 768]
+
+# 例程入口：在已创建的PipeLine上初始化模型，返回HostedDemo，由AI Hub宿主或run_standalone运行和释放
+def start(pl):
+    display_size = pl.display_size
     # 手掌检测模型路径
     hand_det_kmodel_path="/sdcard/examples/kmodel/hand_det.kmodel"
     # 手掌关键点模型路径
     hand_kp_kmodel_path="/sdcard/examples/kmodel/handkp_det.kmodel"
     anchors_path="/sdcard/examples/utils/prior_data_320.bin"
-    rgb888p_size=[1024,768]
     hand_det_input_size=[512,512]
     hand_kp_input_size=[256,256]
     confidence_threshold=0.2
@@ -307,35 +344,20 @@ if __name__=="__main__":
     labels=["hand"]
     anchors = [26,27, 53,52, 75,71, 80,99, 106,82, 99,134, 140,113, 161,172, 245,276]
 
-    # 初始化PipeLine，只关注传给AI的图像分辨率，显示的分辨率
-    sensor = Sensor(width=1280, height=960) # 构建摄像头对象
-    pl = PipeLine(rgb888p_size=rgb888p_size, display_size=display_size, display_mode=display_mode)
-    pl.create(sensor=sensor)  # 创建PipeLine实例
-    sr=SpaceResize(hand_det_kmodel_path,hand_kp_kmodel_path,det_input_size=hand_det_input_size,kp_input_size=hand_kp_input_size,labels=labels,anchors=anchors,confidence_threshold=confidence_threshold,nms_threshold=nms_threshold,nms_option=False,strides=[8,16,32],rgb888p_size=rgb888p_size,display_size=display_size)
-    try:
-        while True:
-            os.exitpoint()
-            with ScopedTiming("total",1):
-                img=pl.get_frame()          # 获取当前帧
-                det_res=sr.run(img)         # 推理当前帧
-                sr.draw_result(pl,det_res)  # 绘制当前帧推理结果
-                pl.show_image()             # 展示当前帧
-                gc.collect()
-            if button0.is_pressing():
-                try:
-                    with open("/sdcard/main.py", "rb") as f:
-                        os.remove("/sdcard/main.py")
-                except Exception as e:
-                    pass
-                with open("/sdcard/CanMV Sample/main.py", "rb") as f:
-                    code_src = f.read()
-                with open("/sdcard/main.py", "wb") as f:
-                    f.write(code_src)
-                machine.reset()
-    except Exception as e:
-        sys.print_exception(e)
-    finally:
+    sr=SpaceResize(hand_det_kmodel_path,hand_kp_kmodel_path,det_input_size=hand_det_input_size,kp_input_size=hand_kp_input_size,labels=labels,anchors=anchors,confidence_threshold=confidence_threshold,nms_threshold=nms_threshold,nms_option=False,strides=[8,16,32],rgb888p_size=RGB888P_SIZE,display_size=display_size)
+
+    # 逐帧处理：推理并绘制结果，取帧和送显由HostedDemo完成
+    def frame(img):
+        t0=time.ticks_ms()
+        det_res=sr.run(img)         # 推理当前帧
+        sr.draw_result(pl,det_res)  # 绘制当前帧推理结果
+        sr.count_frame(time.ticks_diff(time.ticks_ms(),t0))
+
+    def release():
         sr.hand_det.deinit()
         sr.hand_kp.deinit()
-        pl.destroy()
 
+    return HostedDemo(pl, release, frame_func=frame)
+
+if __name__=="__main__":
+    run_standalone(start, RGB888P_SIZE)
@@ -0,0 +1,16 @@
+#####################################################################################################
+# @file         boot_main.py
+# @author       正点原子团队(ALIENTEK)
+# @version      V1.0
+# @date         2026-10-19
+# @brief        桌面程序启动脚本
+#   @note       复制为/sdcard/main.py后开机运行，经mpy_loader加载桌面程序main.py：
+#               mpy_cache中的字节码与源文件哈希一致时直接加载字节码，否则回退为从源码编译
+# @license      Copyright (c) 2020-2032, 广州市星翼电子科技有限公司
+#####################################################################################################
+
+import sys
+sys.path.append("/sdcard/CanMV Sample")
+import mpy_loader
+
+mpy_loader.run("/sdcard/CanMV Sample/main.py")
@@ -11,14 +11,23 @@ import gc
 import time
 import lvgl as lv
 import math
+import _thread
+import struct
 
 DISPLAY_WIDTH = 640
 DISPLAY_HEIGHT = 480
 
 RESOURCES_PATH = "/sdcard/CanMV Sample/"
+USE_ICON_ATLAS = True
+USE_DEMO_HOST = True
+USE_MPY_CACHE = True
+FREEFORM_TRACE_BENCH = False
 
 class LCD():
     def __init__(self, width=640, height=480, to_ide=False, fpioa=None, bl_pinx=5, bl_valid=1):
+        self.width = width
+        self.height = height
+        self.to_ide = to_ide
         self.display = Display()
         self.display.init(Display.ST7701, width, height, to_ide=to_ide, quality=100)
         MediaManager.init()
@@ -27,6 +36,7 @@ class LCD():
         pull = Pin.PULL_UP if bl_valid == 0 else Pin.PULL_DOWN
         self.bl = Pin(bl_pinx, Pin.OUT, pull=pull, drive=7)
         self.bl_valid = bl_valid
+        self.frame_cb = None
         self.on()
 
     def __del__(self):
@@ -42,27 +52,78 @@ class LCD():
     def off(self):
         self.bl.value(1 - self.bl_valid)
 
+    def suspend(self):
+        self.display.deinit()
+        MediaManager.deinit()
+
+    def resume(self):
+        self.display.init(Display.ST7701, self.width, self.height, to_ide=self.to_ide, quality=100)
+        MediaManager.init()
+        lv.obj.invalidate(lv.scr_act())
+
     def lvgl_flush_cb(self, disp, area, px_map):
+        if self.partial == True:
+            self.flush_area(area, px_map)
         if disp.flush_is_last() == True:
-            if self.draw_buf_1.virtaddr() == uctypes.addressof(px_map.__dereference__()):
+            # show_image每次都推送整帧，局部刷新只节省了帧缓存的内存，推送到显示的数据量与整帧刷新相同
+            if self.partial == True:
+                self.display.show_image(self.frame)
+            elif self.draw_buf_1.virtaddr() == uctypes.addressof(px_map.__dereference__()):
                 self.display.show_image(self.draw_buf_1)
             else:
                 self.display.show_image(self.draw_buf_2)
+            self.frame_count += 1
+            self.flush_bytes += self.frame_bytes
+            if self.frame_cb is not None:
+                self.frame_cb()
 
         disp.flush_ready()
 
-    def lvgl_init(self, width, height):
-        self.draw_buf_1 = image.Image(width, height, image.BGRA8888)
-        self.draw_buf_2 = image.Image(width, height, image.BGRA8888)
+    def flush_area(self, area, px_map):
+        line_bytes = (area.x2 - area.x1 + 1) * 4
+        height = area.y2 - area.y1 + 1
+        src = px_map.__dereference__(line_bytes * height)
+        offset = area.y1 * self.frame_stride + area.x1 * 4
+        for y in range(height):
+            self.frame_data[offset:offset + line_bytes] = src[y * line_bytes:(y + 1) * line_bytes]
+            offset += self.frame_stride
+        self.copy_bytes += line_bytes * height
+
+    def lvgl_init(self, width, height, partial=True, strip_lines=48):
+        self.partial = partial
+        self.frame_count = 0
+        self.flush_bytes = 0    # 推送到显示的字节数(每帧整帧)
+        self.copy_bytes = 0     # 局部刷新时从条带缓存复制到整帧的字节数
+        self.frame_bytes = width * height * 4
 
         self.disp = lv.disp_create(width, height)
         self.disp.set_flush_cb(self.lvgl_flush_cb)
-        self.disp.set_draw_buffers(self.draw_buf_1.bytearray(), self.draw_buf_2.bytearray(), self.draw_buf_1.size(), lv.DISP_RENDER_MODE.DIRECT)
+        if partial == True:
+            self.frame = image.Image(width, height, image.BGRA8888)
+            self.frame_data = self.frame.bytearray()
+            self.frame_stride = width * 4
+            self.draw_buf_1 = bytearray(width * strip_lines * 4)
+            self.draw_buf_2 = bytearray(width * strip_lines * 4)
+            self.disp.set_draw_buffers(self.draw_buf_1, self.draw_buf_2, len(self.draw_buf_1), lv.DISP_RENDER_MODE.PARTIAL)
+        else:
+            self.draw_buf_1 = image.Image(width, height, image.BGRA8888)
+            self.draw_buf_2 = image.Image(width, height, image.BGRA8888)
+            self.disp.set_draw_buffers(self.draw_buf_1.bytearray(), self.draw_buf_2.bytearray(), self.draw_buf_1.size(), lv.DISP_RENDER_MODE.DIRECT)
+
+    def take_stats(self):
+        stats = (self.frame_count, self.flush_bytes, self.copy_bytes)
+        self.frame_count = 0
+        self.flush_bytes = 0
+        self.copy_bytes = 0
+        return stats
 
     def lvgl_deinit(self):
         del self.disp
         del self.draw_buf_1
         del self.draw_buf_2
+        if self.partial == True:
+            del self.frame_data
+            del self.frame
 
 class Touch():
     def __init__(self):
@@ -133,6 +194,19 @@ class Button():
     def is_pressing(self):
         return True if self.pin.value() == self.valid else False
 
+    def enable_event(self):
+        self.pressed_event = False
+        self.pin.irq(self.pin_irq_cb, Pin.IRQ_FALLING if self.valid == 0 else Pin.IRQ_RISING)
+
+    def pin_irq_cb(self, pin):
+        self.pressed_event = True
+
+    def take_event(self):
+        if self.pressed_event == True:
+            self.pressed_event = False
+            return True
+        return False
+
 class Buzzer():
     def __init__(self, fpioa, pinx, valid=0, pwm_ch=-1):
         self.valid = valid
@@ -167,12 +241,285 @@ class ClockManager():
     def get_time(self):
         return self.rtc.datetime()
 
+class FontManager():
+    def __init__(self, font_dir):
+        self.font_dir = font_dir
+        self.fonts = {}
+        self.scope = None
+
+    # scope为拥有者(APP)的字体列表，用于APP加载完成后才按需获取的字体：已记录在其中的不重复计数，关闭APP时统一释放
+    def get(self, name, scope=None):
+        if scope is not None and name in scope:
+            return self.fonts[name][0]
+        entry = self.fonts.get(name)
+        if entry is None:
+            path = self.font_dir + name
+            start = time.ticks_ms()
+            font = lv.font_load("A:" + path)
+            load_ms = time.ticks_diff(time.ticks_ms(), start)
+            entry = [font, 0, load_ms, os.stat(path)[6]]
+            self.fonts[name] = entry
+            print(f"[font] load {name}: {load_ms}ms, {entry[3]} bytes")
+        entry[1] += 1
+        if scope is not None:
+            scope.append(name)
+        elif self.scope is not None:
+            self.scope.append(name)
+        return entry[0]
+
+    def release(self, name):
+        entry = self.fonts.get(name)
+        if entry is None:
+            return
+        entry[1] -= 1
+        if entry[1] <= 0:
+            lv.font_free(entry[0])
+            del self.fonts[name]
+
+    def begin_scope(self):
+        self.scope = []
+
+    def end_scope(self):
+        scope = self.scope
+        self.scope = None
+        return scope if scope is not None else []
+
+    def release_scope(self, scope):
+        for name in scope:
+            self.release(name)
+
+    def free_all(self):
+        for entry in self.fonts.values():
+            lv.font_free(entry[0])
+        self.fonts = {}
+
+    def report(self):
+        total_ms = 0
+        total_bytes = 0
+        for name, entry in self.fonts.items():
+            print(f"[font] {name}: refs {entry[1]}, load {entry[2]}ms, {entry[3]} bytes")
+            total_ms += entry[2]
+            total_bytes += entry[3]
+        print(f"[font] {len(self.fonts)} fonts, load {total_ms}ms, {total_bytes} bytes")
+
+FONT_MANAGER = FontManager(RESOURCES_PATH + "Fonts/")
+
+class IconAtlas():
+    def __init__(self, path, root):
+        self.path = path
+        self.root = root
+        self.data = None
+        self.index = {}
+        self.dsc_dict = {}
+
+    def load(self):
+        start = time.ticks_ms()
+        try:
+            with open(self.path, 'rb') as f:
+                self.data = f.read()
+        except OSError:
+            print(f"[atlas] {self.path} not found, load icons from png files")
+            return False
+        magic, version, count, data_offset = struct.unpack_from("<4sHHI", self.data, 0)
+        if magic != b"ICAT":
+            self.data = None
+            return False
+        pos = 12
+        for i in range(count):
+            name_len = struct.unpack_from("<H", self.data, pos)[0]
+            name = str(self.data[pos + 2:pos + 2 + name_len], 'utf-8')
+            pos += 2 + name_len
+            width, height, offset, size = struct.unpack_from("<HHII", self.data, pos)
+            pos += 12
+            self.index[name] = (width, height, data_offset + offset, size)
+        print(f"[atlas] load {count} icons: {time.ticks_diff(time.ticks_ms(), start)}ms, {len(self.data)} bytes")
+        return True
+
+    def img_dsc(self, path):
+        img_dsc = self.dsc_dict.get(path)
+        if img_dsc is not None:
+            return img_dsc
+        entry = self.index.get(path[len(self.root):] if path.startswith(self.root) else path)
+        if entry is None:
+            with open(path, 'rb') as f:
+                icon_data = f.read()
+            return lv.img_dsc_t({
+                'data_size': len(icon_data),
+                'data': icon_data
+            })
+        width, height, offset, size = entry
+        img_dsc = lv.img_dsc_t({
+            'header': {'w': width, 'h': height, 'cf': lv.COLOR_FORMAT.ARGB8888},
+            'data_size': size,
+            'data': memoryview(self.data)[offset:offset + size]
+        })
+        self.dsc_dict[path] = img_dsc
+        return img_dsc
+
+ICON_ATLAS = IconAtlas(RESOURCES_PATH + "APP/icon_atlas.bin", RESOURCES_PATH)
+
+def run_demo_by_reboot(demo_script_path):
+    print(f"[host] reboot to run {demo_script_path} at {time.ticks_ms()}ms")
+    try:
+        with open("/sdcard/main.py", "rb") as f:
+            os.remove("/sdcard/main.py")
+    except Exception as e:
+        pass
+    with open(demo_script_path, "rb") as f:
+        code_src = f.read()
+    with open("/sdcard/main.py", "wb") as f:
+        f.write(code_src)
+    machine.reset()
+
+class DemoLauncher():
+    def __init__(self, hub_path):
+        self.hub_path = hub_path
+        self.demo_script_path = None
+        self.playlist = []
+        self.request_ms = 0
+
+    def request(self, demo_script_path, playlist):
+        self.demo_script_path = demo_script_path
+        self.playlist = playlist if demo_script_path in playlist else [demo_script_path]
+        self.request_ms = time.ticks_ms()
+
+    def pending(self):
+        return self.demo_script_path is not None
+
+    def run(self, lcd, back_button, next_button):
+        import sys
+        demo_script_path = self.demo_script_path
+        self.demo_script_path = None
+        if self.hub_path not in sys.path:
+            sys.path.append(self.hub_path)
+        if USE_MPY_CACHE:
+            if RESOURCES_PATH not in sys.path:
+                sys.path.append(RESOURCES_PATH)
+            import mpy_loader
+            mpy_loader.activate(self.hub_path)
+        from hub_libs.demo_host import DemoHost
+        hosted = True
+        lcd.suspend()
+        host = DemoHost(display_size=[lcd.width, lcd.height])
+        try:
+            hosted = host.run(self.playlist, self.playlist.index(demo_script_path), back_button, next_btn=next_button, t0=self.request_ms)
+        except Exception as e:
+            sys.print_exception(e)
+        finally:
+            start = time.ticks_ms()
+            host.close()
+            lcd.resume()
+            print(f"[host] back to launcher: {time.ticks_diff(time.ticks_ms(), start)}ms")
+        host.report()
+        del host
+        gc.collect()
+        if not hosted:
+            run_demo_by_reboot(demo_script_path)
+
+DEMO_LAUNCHER = DemoLauncher(RESOURCES_PATH + "APP/AI Hub")
+
+class LoopScheduler():
+    def __init__(self, lcd=None, max_sleep_ms=30, gc_threshold=256 * 1024, gc_low_water=512 * 1024, gc_idle_interval_ms=1000, gc_idle_window_ms=10, report_interval_ms=5000):
+        self.max_sleep_ms = max_sleep_ms
+        self.gc_low_water = gc_low_water
+        self.gc_idle_interval_ms = gc_idle_interval_ms
+        self.gc_idle_window_ms = gc_idle_window_ms
+        self.report_interval_ms = report_interval_ms
+        self.lcd = lcd
+        gc.threshold(gc_threshold)
+        self.last_gc = time.ticks_ms()
+        self.last_frame = None
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.window_start = time.ticks_us()
+        self.busy_us = 0
+        self.gc_count = 0
+        self.gc_us = 0
+        self.frame_us_list = []
+
+    def frame_cb(self):
+        now = time.ticks_us()
+        if self.last_frame is not None:
+            frame_us = time.ticks_diff(now, self.last_frame)
+            if frame_us < 200000:
+                self.frame_us_list.append(frame_us)
+        self.last_frame = now
+
+    def collect(self):
+        start = time.ticks_us()
+        gc.collect()
+        self.gc_us += time.ticks_diff(time.ticks_us(), start)
+        self.gc_count += 1
+        self.last_gc = time.ticks_ms()
+
+    def run_once(self):
+        start = time.ticks_us()
+        next_ms = lv.task_handler()
+        # next_ms从task_handler返回时算起，只需扣除其后GC等占用的时间
+        handler_end = time.ticks_us()
+        if next_ms is None or next_ms > self.max_sleep_ms:
+            next_ms = self.max_sleep_ms
+        if gc.mem_free() < self.gc_low_water:
+            self.collect()
+        elif next_ms >= self.gc_idle_window_ms and time.ticks_diff(time.ticks_ms(), self.last_gc) >= self.gc_idle_interval_ms:
+            self.collect()
+        end = time.ticks_us()
+        self.busy_us += time.ticks_diff(end, start)
+        sleep_ms = next_ms - time.ticks_diff(end, handler_end) // 1000
+        if sleep_ms > 0:
+            time.sleep_ms(sleep_ms)
+        if time.ticks_diff(time.ticks_us(), self.window_start) >= self.report_interval_ms * 1000:
+            self.report()
+            self.reset_stats()
+
+    def report(self):
+        wall_us = time.ticks_diff(time.ticks_us(), self.window_start)
+        frame_us_list = sorted(self.frame_us_list)
+        count = len(frame_us_list)
+        msg = f"[loop] duty {self.busy_us * 100 / wall_us:.1f}%, gc {self.gc_count} ({self.gc_us / 1000:.1f}ms), frames {count}"
+        if count > 0:
+            msg += f", frame p50 {frame_us_list[count // 2] / 1000:.1f}ms, p90 {frame_us_list[count * 9 // 10] / 1000:.1f}ms, p99 {frame_us_list[count * 99 // 100] / 1000:.1f}ms"
+        if self.lcd is not None:
+            frame_count, flush_bytes, copy_bytes = self.lcd.take_stats()
+            msg += f", flushed {frame_count} frames {flush_bytes // 1024}KB ({flush_bytes * 1000 // wall_us}KB/s), copied {copy_bytes // 1024}KB"
+        print(msg)
+
+class StartupProfiler():
+    def __init__(self, log_path):
+        self.log_path = log_path
+        self.start = time.ticks_ms()
+        self.record_list = []
+
+    def run(self, name, func):
+        start = time.ticks_ms()
+        mem_alloc = gc.mem_alloc()
+        result = func()
+        self.record_list.append((name, time.ticks_diff(start, self.start), time.ticks_diff(time.ticks_ms(), start), gc.mem_alloc() - mem_alloc, gc.mem_free()))
+        return result
+
+    def mark(self, name):
+        self.record_list.append((name, time.ticks_diff(time.ticks_ms(), self.start), 0, 0, gc.mem_free()))
+
+    def write(self):
+        line_list = ["{:<28} {:>8} {:>8} {:>10} {:>10}".format("step", "at(ms)", "cost(ms)", "heap(B)", "free(B)")]
+        for name, at_ms, cost_ms, heap_delta, mem_free in self.record_list:
+            line_list.append("{:<28} {:>8} {:>8} {:>10} {:>10}".format(name, at_ms, cost_ms, heap_delta, mem_free))
+        for line in line_list:
+            print("[startup] " + line)
+        try:
+            with open(self.log_path, "w") as f:
+                f.write("\n".join(line_list) + "\n")
+        except OSError as e:
+            print(f"[startup] write {self.log_path} failed: {e}")
+
 def lvgl_init(lcd, touch):
     lv.init()
     lcd.lvgl_init(DISPLAY_WIDTH, DISPLAY_HEIGHT)
     touch.lvgl_init()
 
 def lvgl_deinit(lcd, touch):
+    FONT_MANAGER.free_all()
     lcd.lvgl_deinit()
     touch.lvgl_deinit()
     lv.deinit()
@@ -189,7 +536,7 @@ class GUI():
                 self.home_bar.set_style_bg_color(bar_color, 0)
                 self.home_bar.clear_flag(lv.obj.FLAG.SCROLLABLE)
 
-                self.lv_font_lock_screen_home_bar_label = lv.font_load("A:" + RESOURCES_PATH + "Fonts/lv_font_lock_screen_home_bar_label_size30_bpp4.bin")
+                self.lv_font_lock_screen_home_bar_label = FONT_MANAGER.get("lv_font_lock_screen_home_bar_label_size30_bpp4.bin")
 
                 self.bar_label = lv.label(screen)
                 self.bar_label.set_style_text_font(self.lv_font_lock_screen_home_bar_label, 0)
@@ -299,7 +646,7 @@ class GUI():
 
         class ClockTime():
             def __init__(self, screen, hour, minute):
-                self.lv_font_lock_screen_clock_time = lv.font_load("A:" + RESOURCES_PATH + "Fonts/lv_font_lock_screen_clock_time_size150_bpp4.bin")
+                self.lv_font_lock_screen_clock_time = FONT_MANAGER.get("lv_font_lock_screen_clock_time_size150_bpp4.bin")
 
                 self.clock_time = lv.label(screen)
                 self.clock_time.set_style_text_font(self.lv_font_lock_screen_clock_time, 0)
@@ -558,6 +905,7 @@ class GUI():
                     self.close_cb = close_cb
                     self.is_full_screen = False
                     self.timer_list = []
+                    self.font_scope = []
 
                     self.conv = lv.obj(masker)
                     self.conv.set_size(screen.get_width(), screen.get_height())
@@ -583,6 +931,8 @@ class GUI():
                             self.timer_list[i].pause()
                             self.timer_list[i]._del()
                     self.conv.delete()
+                    FONT_MANAGER.release_scope(self.font_scope)
+                    self.font_scope = []
                     self.status_bar.light_mode()
                     if self.is_full_screen == True:
                         self.is_full_screen = False
@@ -622,24 +972,18 @@ class GUI():
                 class RebootConfirmer():
                     class DemoScriptRunner():
                         def __init__(self):
-                            pass
+                            self.playlist = []
 
                         def run(self, demo_script_path):
                             print(demo_script_path)
-                            try:
-                                with open("/sdcard/main.py", "rb") as f:
-                                    os.remove("/sdcard/main.py")
-                            except Exception as e:
-                                pass
-                            with open(demo_script_path, "rb") as f:
-                                code_src = f.read()
-                            with open("/sdcard/main.py", "wb") as f:
-                                f.write(code_src)
-                            machine.reset()
+                            if USE_DEMO_HOST:
+                                DEMO_LAUNCHER.request(demo_script_path, self.playlist)
+                            else:
+                                run_demo_by_reboot(demo_script_path)
 
                     def __init__(self, screen):
-                        self.lv_font_normal_size25 = lv.font_load("A:" + RESOURCES_PATH + "Fonts/lv_font_normal_size25_bpp4.bin")
-                        self.lv_font_normal_size20 = lv.font_load("A:" + RESOURCES_PATH + "Fonts/lv_font_normal_size20_bpp4.bin")
+                        self.lv_font_normal_size25 = FONT_MANAGER.get("lv_font_normal_size25_bpp4.bin")
+                        self.lv_font_normal_size20 = FONT_MANAGER.get("lv_font_normal_size20_bpp4.bin")
 
                         self.demo_script_runner = self.DemoScriptRunner()
 
@@ -666,7 +1010,10 @@ class GUI():
                         self.msg = lv.label(self.conv)
                         self.msg.set_style_text_font(self.lv_font_normal_size20, 0)
                         self.msg.set_width(lv.pct(90))
-                        self.msg.set_text("Confirm to restart the device to run the Demo?\n\nPress and hold key0 to return.")
+                        if USE_DEMO_HOST:
+                            self.msg.set_text("Confirm to run the Demo?\n\nPress key2 for the next Demo.\nPress and hold key0 to return.")
+                        else:
+                            self.msg.set_text("Confirm to restart the device to run the Demo?\n\nPress and hold key0 to return.")
                         self.msg.align(lv.ALIGN.TOP_MID, 20, 30)
                         self.msg.set_style_text_color(lv.color_hex(0x000000), 0)
 
@@ -716,15 +1063,16 @@ class GUI():
                             if btn == self.cancel_btn:
                                 self.hide()
                             elif btn == self.confirm_btn:
+                                self.hide()
                                 self.demo_script_runner.run(self.demo_script_path)
 
                 class DemoManager():
                     def __init__(self, side_bar, demo_show_func):
                         self.demo_show_func = demo_show_func
 
-                        self.lv_font_normal_bold_size40 = lv.font_load("A:" + RESOURCES_PATH + "Fonts/lv_font_normal_bold_size40_bpp4.bin")
-                        self.lv_font_normal_size25 = lv.font_load("A:" + RESOURCES_PATH + "Fonts/lv_font_normal_size25_bpp4.bin")
-                        self.lv_font_app_ai_hub_demo_commit_bold_size20 = lv.font_load("A:" + RESOURCES_PATH + "Fonts/lv_font_app_ai_hub_demo_commit_bold_size20_bpp4.bin")
+                        self.lv_font_normal_bold_size40 = FONT_MANAGER.get("lv_font_normal_bold_size40_bpp4.bin")
+                        self.lv_font_normal_size25 = FONT_MANAGER.get("lv_font_normal_size25_bpp4.bin")
+                        self.lv_font_app_ai_hub_demo_commit_bold_size20 = FONT_MANAGER.get("lv_font_app_ai_hub_demo_commit_bold_size20_bpp4.bin")
 
                         self.list_title = lv.label(side_bar)
                         self.list_title.set_style_text_font(self.lv_font_normal_bold_size40, 0)
@@ -794,14 +1142,8 @@ class GUI():
                             blank.set_style_bg_opa(255, 0)
                             blank.clear_flag(lv.obj.FLAG.SCROLLABLE)
 
-                        with open(icon_path, 'rb') as f:
-                            icon_data = f.read()
-                        icon_dsc = lv.img_dsc_t({
-                            'data_size': len(icon_data),
-                            'data': icon_data
-                        })
                         icon = lv.img(item_conv)
-                        icon.set_src(icon_dsc)
+                        icon.set_src(ICON_ATLAS.img_dsc(icon_path))
                         icon.align(lv.ALIGN.LEFT_MID, 5, 0)
 
                         label = lv.label(item_conv)
@@ -861,12 +1203,12 @@ class GUI():
                                 self.demo_show_func(self.demo_name_list[index], self.demo_commit_list[index], self.demo_show_path_list[index], self.demo_script_path_list[index])
 
                 def __init__(self, icon_area, masker, screen, status_bar, hw_resources):
-                    super().__init__(icon_area, masker, screen, status_bar, hw_resources)
+                    super().__init__(icon_area, masker, screen, status_bar, hw_resources, self.base_close_cb)
                     self.conv.set_style_bg_color(lv.color_hex(0xF3F2F7), 0)
 
-                    self.lv_font_normal_size20 = lv.font_load("A:" + RESOURCES_PATH + "Fonts/lv_font_normal_size20_bpp4.bin")
-                    self.lv_font_app_ai_hub_demo_commit_bold_size20 = lv.font_load("A:" + RESOURCES_PATH + "Fonts/lv_font_app_ai_hub_demo_commit_bold_size20_bpp4.bin")
-                    self.lv_font_normal_bold_size25 = lv.font_load("A:" + RESOURCES_PATH + "Fonts/lv_font_normal_bold_size25_bpp4.bin")
+                    self.lv_font_normal_size20 = FONT_MANAGER.get("lv_font_normal_size20_bpp4.bin")
+                    self.lv_font_app_ai_hub_demo_commit_bold_size20 = FONT_MANAGER.get("lv_font_app_ai_hub_demo_commit_bold_size20_bpp4.bin")
+                    self.lv_font_normal_bold_size25 = FONT_MANAGER.get("lv_font_normal_bold_size25_bpp4.bin")
 
                     self.side_bar = lv.obj(self.conv)
                     self.side_bar.set_size(lv.pct(45), lv.pct(100))
@@ -993,7 +1335,7 @@ class GUI():
                         "Segmentation",
                         "物体分割",
                         RESOURCES_PATH + "APP/AI Hub/segmentation_show.png",
-                        RESOURCES_PATH + "APP/AI Hub/segmentation.py",
+                        RESOURCES_PATH + "APP/AI Hub/segment_yolov8n.py",
                     )
                     self.demo_manager.add(
                         RESOURCES_PATH + "APP/AI Hub/app_icon_72x72_intelligence.png",
@@ -1030,6 +1372,7 @@ class GUI():
                         None,
                         None,
                     )
+                    self.reboot_confirmer.demo_script_runner.playlist = [path for path in self.demo_manager.demo_script_path_list if path is not None]
 
                     self.set_home_bar_color(lv.color_hex(0x000000))
                     self.set_home_bar_top()
@@ -1093,7 +1436,7 @@ class GUI():
 
                     btn_label = lv.label(btn)
                     btn_label.set_style_text_font(self.lv_font_normal_size20, 0)
-                    btn_label.set_text("Reboot to Run")
+                    btn_label.set_text("Run" if USE_DEMO_HOST else "Reboot to Run")
                     btn_label.center()
                     btn_label.set_style_text_color(lv.color_hex(0xFFFFFF), 0)
 
@@ -1101,13 +1444,16 @@ class GUI():
                     if self.demo_script_path is not None:
                         self.reboot_confirmer.show(self.demo_script_path)
 
+                def base_close_cb(self):
+                    self.reboot_confirmer.masker.delete()
+
             class AppCalculator(AppBase):
                 class Keyboard():
                     def __init__(self, conv, show_conv):
                         self.show_label = show_conv.get_child(0)
                         self.history_label = show_conv.get_child(1)
 
-                        self.lv_font_app_calculator_keyboard = lv.font_load("A:" + RESOURCES_PATH + "Fonts/lv_font_app_calculator_keyboard_size30_bpp4.bin")
+                        self.lv_font_app_calculator_keyboard = FONT_MANAGER.get("lv_font_app_calculator_keyboard_size30_bpp4.bin")
 
                         btn_bg_color_list = [0x211924, 0x211924, 0x211924, 0x584B5E, 0xF99429,
                                              0x211924, 0x211924, 0x211924, 0x584B5E, 0xF99429,
@@ -1302,8 +1648,8 @@ class GUI():
                     self.conv.set_style_bg_color(lv.color_hex(0x000000), 0)
                     self.status_bar.dark_mode()
 
-                    self.lv_font_app_calculator_show_main = lv.font_load("A:" + RESOURCES_PATH + "Fonts/lv_font_app_calculator_show_main_size60_bpp4.bin")
-                    self.lv_font_app_calculator_show_history = lv.font_load("A:" + RESOURCES_PATH + "Fonts/lv_font_app_calculator_show_history_size30_bpp4.bin")
+                    self.lv_font_app_calculator_show_main = FONT_MANAGER.get("lv_font_app_calculator_show_main_size60_bpp4.bin")
+                    self.lv_font_app_calculator_show_history = FONT_MANAGER.get("lv_font_app_calculator_show_history_size30_bpp4.bin")
 
                     self.show_conv = lv.obj(self.conv)
                     self.show_conv.set_size(lv.pct(95), lv.pct(25))
@@ -1348,6 +1694,138 @@ class GUI():
                     self.set_home_bar_top()
 
             class AppPhotos(AppBase):
+                class PhotoCache():
+                    PLACEHOLDER = lv.SYMBOL.IMAGE   # 无法解码的图片显示为图片符号
+
+                    def __init__(self, paths, budget_bytes=8 * 1024 * 1024, radius=2):
+                        self.paths = paths
+                        self.budget_bytes = budget_bytes
+                        self.radius = radius
+                        # 预取顺序：当前图片，然后由近到远左右交替，0, +1, -1, ..., +radius, -radius
+                        self.prefetch_offsets = [0]
+                        for distance in range(1, radius + 1):
+                            self.prefetch_offsets.append(distance)
+                            self.prefetch_offsets.append(-distance)
+                        self.entries = {}
+                        self.lru_list = []
+                        self.bytes = 0
+                        self.center = 0
+                        self.failed_list = []
+                        self.hits = 0
+                        self.misses = 0
+                        self.latency_list = []
+                        self.lock = _thread.allocate_lock()
+                        self.running = True
+                        self.worker_alive = True
+                        _thread.start_new_thread(self.worker, ())
+
+                    # 解码图片，可在预取线程中调用；缓存项为[image.Image, lv.img_dsc_t, 字节数]，img_dsc在LVGL线程中首次显示时创建
+                    def decode(self, index):
+                        src = image.Image(self.paths[index])
+                        img = image.Image(src.width(), src.height(), image.BGRA8888)
+                        img.draw_image(src, 0, 0)
+                        del src
+                        return [img, None, img.size()]
+
+                    # img_dsc引用img的数据，img由缓存项持有，缓存项被淘汰前不会被回收
+                    def img_dsc(self, entry):
+                        if entry[1] is None:
+                            img = entry[0]
+                            data = img.bytearray()
+                            entry[1] = lv.img_dsc_t({
+                                'header': {'w': img.width(), 'h': img.height(), 'cf': lv.COLOR_FORMAT.ARGB8888},
+                                'data_size': len(data),
+                                'data': data
+                            })
+                        return entry[1]
+
+                    # 插入缓存项，index已在缓存中时保留原有的项；返回缓存中的项
+                    def insert(self, index, entry):
+                        with self.lock:
+                            if index in self.entries:
+                                return self.entries[index]
+                            self.entries[index] = entry
+                            self.lru_list.append(index)
+                            self.bytes += entry[2]
+                            i = 0
+                            while self.bytes > self.budget_bytes and i < len(self.lru_list):
+                                if abs(self.lru_list[i] - self.center) <= self.radius:
+                                    i += 1
+                                    continue
+                                self.bytes -= self.entries.pop(self.lru_list.pop(i))[2]
+                            return entry
+
+                    def set_center(self, index):
+                        self.center = index
+
+                    # 在LVGL线程中调用，返回图片的img_dsc；图片无法解码时返回占位符号
+                    def get(self, index):
+                        with self.lock:
+                            entry = self.entries.get(index)
+                            if entry is not None:
+                                self.lru_list.remove(index)
+                                self.lru_list.append(index)
+                                self.hits += 1
+                                return self.img_dsc(entry)
+                            self.misses += 1
+                            if index in self.failed_list:
+                                return self.PLACEHOLDER
+                        try:
+                            entry = self.decode(index)
+                        except Exception as e:
+                            print(f"[photos] decode {self.paths[index]} failed: {e}")
+                            with self.lock:
+                                self.failed_list.append(index)
+                            return self.PLACEHOLDER
+                        entry = self.insert(index, entry)
+                        with self.lock:
+                            return self.img_dsc(entry)
+
+                    def next_prefetch_index(self):
+                        for offset in self.prefetch_offsets:
+                            index = self.center + offset
+                            if 0 <= index < len(self.paths) and index not in self.entries and index not in self.failed_list:
+                                return index
+                        return None
+
+                    def worker(self):
+                        try:
+                            while self.running:
+                                with self.lock:
+                                    index = self.next_prefetch_index()
+                                if index is None:
+                                    time.sleep_ms(10)
+                                    continue
+                                try:
+                                    self.insert(index, self.decode(index))
+                                except Exception as e:
+                                    with self.lock:
+                                        self.failed_list.append(index)
+                        finally:
+                            self.worker_alive = False
+
+                    def record_latency(self, latency_us):
+                        self.latency_list.append(latency_us)
+                        if len(self.latency_list) >= 10:
+                            self.report()
+                            self.latency_list = []
+
+                    def report(self):
+                        latency_list = sorted(self.latency_list)
+                        count = len(latency_list)
+                        if count == 0:
+                            return
+                        total = self.hits + self.misses
+                        print(f"[photos] {len(self.paths)} photos, swipe p50 {latency_list[count // 2] / 1000:.2f}ms, p90 {latency_list[count * 9 // 10] / 1000:.2f}ms, max {latency_list[-1] / 1000:.2f}ms, hit rate {self.hits * 100 // total if total else 0}%, cached {len(self.entries)} / {self.bytes} bytes")
+
+                    def stop(self):
+                        self.running = False
+                        while self.worker_alive:
+                            time.sleep_ms(1)
+                        self.entries = {}
+                        self.lru_list = []
+                        self.bytes = 0
+
 #                class PhotoList():
 #                    def __init__(self, conv):
 #                        self.is_full_screen = False
@@ -1439,7 +1917,7 @@ class GUI():
 #                            lv.anim_t.start(self.list_conv_x_anim)
 
                 def __init__(self, icon_area, masker, screen, status_bar, hw_resources):
-                    super().__init__(icon_area, masker, screen, status_bar, hw_resources)
+                    super().__init__(icon_area, masker, screen, status_bar, hw_resources, self.base_close_cb)
                     self.conv.set_style_bg_color(lv.color_hex(0x000000), 0)
                     self.status_bar.dark_mode()
 
@@ -1450,6 +1928,7 @@ class GUI():
                         if not os.stat(self.photos_path + item)[0] & 0x4000 and item.endswith(".png")
                     ]
                     self.photo_show_index = 0
+                    self.photo_cache = self.PhotoCache([self.photos_path + item for item in self.photos_files])
 
                     self.img_conv = lv.obj(self.conv)
                     self.img_conv.set_size(lv.pct(100), lv.pct(100))
@@ -1514,33 +1993,16 @@ class GUI():
 
                 def show_img(self, index_inc):
                     self.photo_show_index = self.photo_show_index + index_inc
+                    self.photo_cache.set_center(self.photo_show_index)
 
                     if index_inc == 0:
-                        with open(self.photos_path + self.photos_files[self.photo_show_index], 'rb') as f:
-                            img_data = f.read()
-                        img_dsc = lv.img_dsc_t({
-                            'data_size': len(img_data),
-                            'data': img_data
-                        })
-                        self.img_show_conv_list[0].get_child(0).set_src(img_dsc)
+                        self.img_show_conv_list[0].get_child(0).set_src(self.photo_cache.get(self.photo_show_index))
 
                     if (index_inc == 0 or index_inc == -1) and self.photo_show_index != 0:
-                        with open(self.photos_path + self.photos_files[self.photo_show_index - 1], 'rb') as f:
-                            img_data = f.read()
-                        img_dsc = lv.img_dsc_t({
-                            'data_size': len(img_data),
-                            'data': img_data
-                        })
-                        self.img_show_conv_list[1].get_child(0).set_src(img_dsc)
+                        self.img_show_conv_list[1].get_child(0).set_src(self.photo_cache.get(self.photo_show_index - 1))
 
                     if (index_inc == 0 or index_inc == 1) and self.photo_show_index != len(self.photos_files) - 1:
-                        with open(self.photos_path + self.photos_files[self.photo_show_index + 1], 'rb') as f:
-                            img_data = f.read()
-                        img_dsc = lv.img_dsc_t({
-                            'data_size': len(img_data),
-                            'data': img_data
-                        })
-                        self.img_show_conv_list[2].get_child(0).set_src(img_dsc)
+                        self.img_show_conv_list[2].get_child(0).set_src(self.photo_cache.get(self.photo_show_index + 1))
 
                     if self.photo_show_index == 0:
                         self.img_conv.set_scroll_dir(lv.DIR.BOTTOM)
@@ -1562,6 +2024,7 @@ class GUI():
                         elif self.is_img_conv_scroll_auto == False:
                             self.is_img_conv_scroll_auto = True
                             if img_conv.get_scroll_y() != 0:
+                                swipe_start = time.ticks_us()
                                 if img_conv.get_scroll_y() > 0:
                                     self.img_show_conv_list[0], self.img_show_conv_list[1], self.img_show_conv_list[2] = self.img_show_conv_list[2], self.img_show_conv_list[0], self.img_show_conv_list[1]
                                     photo_show_index_inc = 1
@@ -1574,6 +2037,11 @@ class GUI():
                                 self.show_img(photo_show_index_inc)
                                 self.is_img_conv_scroll_auto = False
                                 img_conv.scroll_to_y(0, 0)
+                                self.photo_cache.record_latency(time.ticks_diff(time.ticks_us(), swipe_start))
+
+                def base_close_cb(self):
+                    self.photo_cache.report()
+                    self.photo_cache.stop()
 
                 def img_show_conv_event_cb(self, event):
                     code = event.get_code()
@@ -1601,17 +2069,11 @@ class GUI():
                 class SideBar():
                     class Profile():
                         def __init__(self, conv):
-                            self.lv_font_username_bold_size30 = lv.font_load("A:" + RESOURCES_PATH + "Fonts/lv_font_username_bold_size30_bpp4.bin")
-                            self.lv_font_normal_size20 = lv.font_load("A:" + RESOURCES_PATH + "Fonts/lv_font_normal_size20_bpp4.bin")
-
-                            with open(RESOURCES_PATH + "APP/Settings/settings_icon_72x72_profile.png", 'rb') as f:
-                                icon_data = f.read()
-                            icon_dsc = lv.img_dsc_t({
-                                'data_size': len(icon_data),
-                                'data': icon_data
-                            })
+                            self.lv_font_username_bold_size30 = FONT_MANAGER.get("lv_font_username_bold_size30_bpp4.bin")
+                            self.lv_font_normal_size20 = FONT_MANAGER.get("lv_font_normal_size20_bpp4.bin")
+
                             self.icon = lv.img(conv)
-                            self.icon.set_src(icon_dsc)
+                            self.icon.set_src(ICON_ATLAS.img_dsc(RESOURCES_PATH + "APP/Settings/settings_icon_72x72_profile.png"))
                             self.icon.align(lv.ALIGN.LEFT_MID, 10, 0)
 
                             self.label = lv.label(conv)
@@ -1627,22 +2089,17 @@ class GUI():
                             self.commit.set_style_text_color(lv.color_hex(0x7F7F7F), 0)
 
                     class System():
-                        def __init__(self, conv, item_conv, hw_resources, timer_list):
+                        def __init__(self, conv, item_conv, hw_resources, timer_list, font_scope):
                             self.item_conv = item_conv
                             self.hw_resources = hw_resources
                             self.timer_list = timer_list
+                            self.font_scope = font_scope
 
-                            self.lv_font_normal_size25 = lv.font_load("A:" + RESOURCES_PATH + "Fonts/lv_font_normal_size25_bpp4.bin")
-                            self.lv_font_normal_bold_size25 = lv.font_load("A:" + RESOURCES_PATH + "Fonts/lv_font_normal_bold_size25_bpp4.bin")
+                            self.lv_font_normal_size25 = FONT_MANAGER.get("lv_font_normal_size25_bpp4.bin")
+                            self.lv_font_normal_bold_size25 = FONT_MANAGER.get("lv_font_normal_bold_size25_bpp4.bin")
 
-                            with open(RESOURCES_PATH + "APP/Settings/settings_icon_44x44_date_and_time.png", 'rb') as f:
-                                icon_data = f.read()
-                            icon_dsc = lv.img_dsc_t({
-                                'data_size': len(icon_data),
-                                'data': icon_data
-                            })
                             self.icon = lv.img(conv)
-                            self.icon.set_src(icon_dsc)
+                            self.icon.set_src(ICON_ATLAS.img_dsc(RESOURCES_PATH + "APP/Settings/settings_icon_44x44_date_and_time.png"))
                             self.icon.align(lv.ALIGN.LEFT_MID, 10, 0)
                             self.icon.set_style_radius(12, 0)
                             self.icon.set_style_clip_corner(True, 0)
@@ -1674,8 +2131,8 @@ class GUI():
                                 self.load_item_conv()
 
                         def load_item_conv(self):
-                            self.lv_font_normal_size20 = lv.font_load("A:" + RESOURCES_PATH + "Fonts/lv_font_normal_size20_bpp4.bin")
-                            self.lv_font_normal_bold_size25 = lv.font_load("A:" + RESOURCES_PATH + "Fonts/lv_font_normal_bold_size25_bpp4.bin")
+                            self.lv_font_normal_size20 = FONT_MANAGER.get("lv_font_normal_size20_bpp4.bin", self.font_scope)
+                            self.lv_font_normal_bold_size25 = FONT_MANAGER.get("lv_font_normal_bold_size25_bpp4.bin", self.font_scope)
 
                             self.item_conv.clean()
 
@@ -1838,8 +2295,8 @@ class GUI():
                         def time_updater_cb(self, timer):
                             self.update_item_conv()
 
-                    def __init__(self, conv, item_conv, hw_resources, timer_list):
-                        self.lv_font_normal_bold_size40 = lv.font_load("A:" + RESOURCES_PATH + "Fonts/lv_font_normal_bold_size40_bpp4.bin")
+                    def __init__(self, conv, item_conv, hw_resources, timer_list, font_scope):
+                        self.lv_font_normal_bold_size40 = FONT_MANAGER.get("lv_font_normal_bold_size40_bpp4.bin")
 
                         self.title = lv.label(conv)
                         self.title.set_style_text_font(self.lv_font_normal_bold_size40, 0)
@@ -1889,7 +2346,7 @@ class GUI():
                         self.holder.clear_flag(lv.obj.FLAG.SCROLLABLE)
 
                         self.profile = self.Profile(self.profile_conv)
-                        self.system = self.System(self.system_conv, item_conv, hw_resources, timer_list)
+                        self.system = self.System(self.system_conv, item_conv, hw_resources, timer_list, font_scope)
 
                 def __init__(self, icon_area, masker, screen, status_bar, hw_resources):
                     super().__init__(icon_area, masker, screen, status_bar, hw_resources)
@@ -1925,7 +2382,7 @@ class GUI():
                     self.item_conv.set_style_bg_opa(0, 0)
                     self.item_conv.clear_flag(lv.obj.FLAG.SCROLLABLE)
 
-                    self.side_bar = self.SideBar(self.side_bar_conv, self.item_conv, self.hw_resources, self.timer_list)
+                    self.side_bar = self.SideBar(self.side_bar_conv, self.item_conv, self.hw_resources, self.timer_list, self.font_scope)
 
                     self.set_home_bar_color(lv.color_hex(0x000000))
                     self.set_home_bar_top()
@@ -2065,10 +2522,11 @@ class GUI():
                                 self.second_main_points[1].y = line_main_y_end
                                 self.second_main.set_points(self.second_main_points, 2)
 
-                        def __init__(self, show_conv, app_timer, hw_resources):
+                        def __init__(self, show_conv, app_timer, hw_resources, font_scope):
                             self.show_conv = show_conv
                             self.app_timer = app_timer
                             self.clock_manager = hw_resources.get("ClockManager")
+                            self.font_scope = font_scope
 
                         def show(self):
                             self.app_timer.pause()
@@ -2078,8 +2536,8 @@ class GUI():
                             self.app_timer.set_period(1000)
                             self.app_timer.resume()
 
-                            self.lv_font_app_clock_time_size80 = lv.font_load("A:" + RESOURCES_PATH + "Fonts/lv_font_app_clock_time_size80_bpp4.bin")
-                            self.lv_font_normal_size28 = lv.font_load("A:" + RESOURCES_PATH + "Fonts/lv_font_normal_size28_bpp4.bin")
+                            self.lv_font_app_clock_time_size80 = FONT_MANAGER.get("lv_font_app_clock_time_size80_bpp4.bin", self.font_scope)
+                            self.lv_font_normal_size28 = FONT_MANAGER.get("lv_font_normal_size28_bpp4.bin", self.font_scope)
 
                             self.clock_dial = lv.obj(self.show_conv)
                             self.clock_dial.set_size(240, 240)
@@ -2128,13 +2586,14 @@ class GUI():
                             self.update()
 
                     class Stopwatch():
-                        def __init__(self, show_conv, app_timer, hw_resources):
+                        def __init__(self, show_conv, app_timer, hw_resources, font_scope):
                             self.show_conv = show_conv
                             self.app_timer = app_timer
                             self.time_minute = 0
                             self.time_second = 0
                             self.time_microsecond = 0
                             self.hw_resources = hw_resources
+                            self.font_scope = font_scope
 
                         def show(self):
                             self.app_timer.pause()
@@ -2143,8 +2602,8 @@ class GUI():
                             self.app_timer.set_cb(self.app_timer_cb)
                             self.app_timer.set_period(100)
 
-                            self.lv_font_app_clock_time_size80 = lv.font_load("A:" + RESOURCES_PATH + "Fonts/lv_font_app_clock_time_size80_bpp4.bin")
-                            self.lv_font_normal_size20 = lv.font_load("A:" + RESOURCES_PATH + "Fonts/lv_font_normal_size20_bpp4.bin")
+                            self.lv_font_app_clock_time_size80 = FONT_MANAGER.get("lv_font_app_clock_time_size80_bpp4.bin", self.font_scope)
+                            self.lv_font_normal_size20 = FONT_MANAGER.get("lv_font_normal_size20_bpp4.bin", self.font_scope)
 
                             self.time_label = lv.label(self.show_conv)
                             self.time_label.set_style_text_font(self.lv_font_app_clock_time_size80, 0)
@@ -2214,8 +2673,8 @@ class GUI():
                                     self.time_microsecond = 0
                                     self.time_label_update()
 
-                    def __init__(self, conv, show_conv, app_timer, hw_resources):
-                        self.lv_font_normal_size20 = lv.font_load("A:" + RESOURCES_PATH + "Fonts/lv_font_normal_size20_bpp4.bin")
+                    def __init__(self, conv, show_conv, app_timer, hw_resources, font_scope):
+                        self.lv_font_normal_size20 = FONT_MANAGER.get("lv_font_normal_size20_bpp4.bin")
 
                         self.item_conv_list = []
                         self.current_item_conv = None
@@ -2260,8 +2719,8 @@ class GUI():
                         self.item_conv_list.append(self.stopwatch_conv)
                         self.current_item_conv = self.local_clock_conv
 
-                        self.local_clock = self.LocalClock(show_conv, app_timer, hw_resources)
-                        self.stopwatch = self.Stopwatch(show_conv, app_timer, hw_resources)
+                        self.local_clock = self.LocalClock(show_conv, app_timer, hw_resources, font_scope)
+                        self.stopwatch = self.Stopwatch(show_conv, app_timer, hw_resources, font_scope)
 
                         self.local_clock.show()
 
@@ -2314,7 +2773,7 @@ class GUI():
                     self.show_conv.set_style_bg_opa(0, 0)
                     self.show_conv.clear_flag(lv.obj.FLAG.SCROLLABLE)
 
-                    self.top_bar = self.TopBar(self.top_bar_conv, self.show_conv, self.app_timer, self.hw_resources)
+                    self.top_bar = self.TopBar(self.top_bar_conv, self.show_conv, self.app_timer, self.hw_resources, self.font_scope)
 
                     self.set_home_bar_color(lv.color_hex(0xFFFFFF))
                     self.set_home_bar_top()
@@ -2323,13 +2782,205 @@ class GUI():
                     pass
 
             class AppFreeform(AppBase):
+                class StrokeEngine():
+                    def __init__(self, canvas, buffer, width, height):
+                        self.canvas = canvas
+                        self.buf = memoryview(buffer)
+                        self.width = width
+                        self.height = height
+                        self.white_row = memoryview(b"\xff" * (4 * width))
+                        self.points = []
+                        self.next_seg = 0
+                        self.ended = True
+                        self.origin = (0, 0)
+                        self.flush_box = None
+                        self.dirty_box = None
+                        self.point_count = 0
+                        self.flush_count = 0
+                        self.flush_us = 0
+                        self.flush_max_us = 0
+                        self.invalidated_px = 0
+                        self.set_pen([0xFF, 0x00, 0x00], 30)
+
+                    def set_pen(self, color, size):
+                        self.radius = max(1, size // 2)
+                        self.step = max(1, self.radius // 2)
+                        self.spans = [int(math.sqrt(self.radius * self.radius - dy * dy) + 0.5) for dy in range(-self.radius, self.radius + 1)]
+                        self.color_row = memoryview(bytes([color[2], color[1], color[0], 0xFF]) * (2 * self.radius + 1))
+
+                    def begin(self, x, y):
+                        area = lv.area_t()
+                        self.canvas.get_coords(area)
+                        self.origin = (area.x1, area.y1)
+                        self.points = [(x - area.x1, y - area.y1)]
+                        self.next_seg = 0
+                        self.ended = False
+                        self.point_count += 1
+
+                    def add(self, x, y):
+                        x -= self.origin[0]
+                        y -= self.origin[1]
+                        last = self.points[-1]
+                        if abs(x - last[0]) + abs(y - last[1]) < 2:
+                            return
+                        self.points.append((x, y))
+                        self.point_count += 1
+
+                    def end(self):
+                        self.ended = True
+
+                    def pending(self):
+                        n = len(self.points)
+                        return n - self.next_seg > 2 or (self.ended and n > 0)
+
+                    def _stamp(self, cx, cy):
+                        r = self.radius
+                        width = self.width
+                        buf = self.buf
+                        row = self.color_row
+                        spans = self.spans
+                        for y in range(max(cy - r, 0), min(cy + r, self.height - 1) + 1):
+                            half = spans[y - cy + r]
+                            x0 = cx - half
+                            x1 = cx + half + 1
+                            if x0 < 0:
+                                x0 = 0
+                            if x1 > width:
+                                x1 = width
+                            if x0 < x1:
+                                offset = (y * width + x0) * 4
+                                buf[offset:offset + (x1 - x0) * 4] = row[:(x1 - x0) * 4]
+
+                    def _extend_box(self, box, x, y):
+                        r = self.radius
+                        if box is None:
+                            return [x - r, y - r, x + r, y + r]
+                        box[0] = min(box[0], x - r)
+                        box[1] = min(box[1], y - r)
+                        box[2] = max(box[2], x + r)
+                        box[3] = max(box[3], y + r)
+                        return box
+
+                    def _plot(self, x, y):
+                        x = int(x + 0.5)
+                        y = int(y + 0.5)
+                        self._stamp(x, y)
+                        self.flush_box = self._extend_box(self.flush_box, x, y)
+
+                    def _segment(self, p0, p1, p2, p3):
+                        n = max(1, int(math.sqrt((p2[0] - p1[0]) ** 2 + (p2[1] - p1[1]) ** 2)) // self.step)
+                        ax = -p0[0] + 3 * p1[0] - 3 * p2[0] + p3[0]
+                        ay = -p0[1] + 3 * p1[1] - 3 * p2[1] + p3[1]
+                        bx = 2 * p0[0] - 5 * p1[0] + 4 * p2[0] - p3[0]
+                        by = 2 * p0[1] - 5 * p1[1] + 4 * p2[1] - p3[1]
+                        cx = p2[0] - p0[0]
+                        cy = p2[1] - p0[1]
+                        for i in range(1, n + 1):
+                            t = i / n
+                            self._plot(0.5 * (((ax * t + bx) * t + cx) * t) + p1[0], 0.5 * (((ay * t + by) * t + cy) * t) + p1[1])
+
+                    def flush(self):
+                        if not self.pending():
+                            return
+                        start = time.ticks_us()
+                        points = self.points
+                        n = len(points)
+                        if self.next_seg == 0:
+                            self._plot(points[0][0], points[0][1])
+                        last = n - 1 if self.ended else n - 2
+                        i = self.next_seg
+                        while i < last:
+                            self._segment(points[max(i - 1, 0)], points[i], points[i + 1], points[min(i + 2, n - 1)])
+                            i += 1
+                        if self.ended:
+                            self.points = []
+                            self.next_seg = 0
+                        else:
+                            self.points = points[max(i - 1, 0):]
+                            self.next_seg = i - max(i - 1, 0)
+                        box = self._clip(self.flush_box)
+                        self.flush_box = None
+                        if box is not None:
+                            self._invalidate(box)
+                            if self.dirty_box is None:
+                                self.dirty_box = box
+                            else:
+                                self.dirty_box = [min(self.dirty_box[0], box[0]), min(self.dirty_box[1], box[1]), max(self.dirty_box[2], box[2]), max(self.dirty_box[3], box[3])]
+                        elapsed = time.ticks_diff(time.ticks_us(), start)
+                        self.flush_count += 1
+                        self.flush_us += elapsed
+                        self.flush_max_us = max(self.flush_max_us, elapsed)
+
+                    def _clip(self, box):
+                        if box is None:
+                            return None
+                        box = [max(box[0], 0), max(box[1], 0), min(box[2], self.width - 1), min(box[3], self.height - 1)]
+                        return box if box[0] <= box[2] and box[1] <= box[3] else None
+
+                    def _invalidate(self, box):
+                        area = lv.area_t()
+                        area.x1 = box[0] + self.origin[0]
+                        area.y1 = box[1] + self.origin[1]
+                        area.x2 = box[2] + self.origin[0]
+                        area.y2 = box[3] + self.origin[1]
+                        self.canvas.invalidate_area(area)
+                        self.invalidated_px += (box[2] - box[0] + 1) * (box[3] - box[1] + 1)
+
+                    def clear(self):
+                        box = self._clip(self.dirty_box)
+                        self.dirty_box = None
+                        if box is None:
+                            return 0
+                        width = self.width
+                        count = (box[2] - box[0] + 1) * 4
+                        row = self.white_row[:count]
+                        for y in range(box[1], box[3] + 1):
+                            offset = (y * width + box[0]) * 4
+                            self.buf[offset:offset + count] = row
+                        self._invalidate(box)
+                        return (box[2] - box[0] + 1) * (box[3] - box[1] + 1)
+
+                    def reset_stats(self):
+                        self.point_count = 0
+                        self.flush_count = 0
+                        self.flush_us = 0
+                        self.flush_max_us = 0
+                        self.invalidated_px = 0
+
+                    def run_trace(self, trace, points_per_frame=4):
+                        self.reset_stats()
+                        start = time.ticks_us()
+                        self.begin(trace[0][0], trace[0][1])
+                        for i in range(1, len(trace), points_per_frame):
+                            for x, y in trace[i:i + points_per_frame]:
+                                self.add(x, y)
+                            self.flush()
+                        self.end()
+                        self.flush()
+                        total_us = time.ticks_diff(time.ticks_us(), start)
+                        clear_start = time.ticks_us()
+                        cleared_px = self.clear()
+                        clear_us = time.ticks_diff(time.ticks_us(), clear_start)
+                        print(f"[freeform] trace {len(trace)} points, {self.point_count * 1000000 // max(total_us, 1)} points/s")
+                        print(f"[freeform] {self.flush_count} flushes, frame avg {self.flush_us // max(self.flush_count, 1)}us max {self.flush_max_us}us")
+                        print(f"[freeform] invalidated {self.invalidated_px // max(self.flush_count, 1)}px/frame of {self.width * self.height}px, clear {cleared_px}px in {clear_us}us")
+                        self.reset_stats()
+
+                    @staticmethod
+                    def figure_eight(width, height, count=600):
+                        trace = []
+                        for i in range(count):
+                            t = 2 * math.pi * i / count
+                            trace.append((int(width / 2 + width / 3 * math.sin(t)), int(height / 2 + height / 3 * math.sin(2 * t))))
+                        return trace
+
                 def __init__(self, icon_area, masker, screen, status_bar, hw_resources):
-                    self.lv_font_normal_size25 = lv.font_load("A:" + RESOURCES_PATH + "Fonts/lv_font_normal_size25_bpp4.bin")
+                    self.lv_font_normal_size25 = FONT_MANAGER.get("lv_font_normal_size25_bpp4.bin")
 
                     super().__init__(icon_area, masker, screen, status_bar, hw_resources)
 
                     canvas_width, canvas_height = screen.get_width(), screen.get_height()
-                    canvas_buffer = bytearray(4 * canvas_width * canvas_height)
+                    self.canvas_buffer = bytearray(4 * canvas_width * canvas_height)
                     self.board_previous_point = None
                     self.board_current_point = None
                     self.settings_handle_start_x = None
@@ -2344,7 +2995,7 @@ class GUI():
                     self.line_dsc.round_start = 1
 
                     self.board = lv.canvas(self.conv)
-                    self.board.set_buffer(canvas_buffer, canvas_width, canvas_height, lv.COLOR_FORMAT.NATIVE)
+                    self.board.set_buffer(self.canvas_buffer, canvas_width, canvas_height, lv.COLOR_FORMAT.NATIVE)
                     self.board.fill_bg(lv.color_hex3(0xFFF), lv.OPA.COVER)
                     self.board.center()
                     self.board.clear_flag(lv.obj.FLAG.SCROLLABLE)
@@ -2353,6 +3004,11 @@ class GUI():
                     self.board.add_event(self.board_event_cb, lv.EVENT.PRESSING, None)
                     self.board.add_event(self.board_event_cb, lv.EVENT.RELEASED, None)
 
+                    self.stroke = self.StrokeEngine(self.board, self.canvas_buffer, canvas_width, canvas_height)
+                    self.stroke.set_pen(self.pen_color, self.line_dsc.width)
+                    self.stroke_timer = lv.timer_create(self.stroke_timer_cb, 16, None)
+                    self.timer_list.append(self.stroke_timer)
+
                     self.settings_conv = lv.obj(self.conv)
                     self.settings_conv.set_size(260, lv.pct(100))
                     self.settings_conv.align(lv.ALIGN.LEFT_MID, -260, 0)
@@ -2465,11 +3121,17 @@ class GUI():
                     self.set_home_bar_color(lv.color_hex(0x000000))
                     self.set_home_bar_top()
 
+                    if FREEFORM_TRACE_BENCH:
+                        self.stroke.run_trace(self.StrokeEngine.figure_eight(canvas_width, canvas_height))
+
+                def stroke_timer_cb(self, timer):
+                    self.stroke.flush()
+
                 def settings_clean_btn_event_cb(self, event):
                     code = event.get_code()
 
                     if code == lv.EVENT.CLICKED:
-                        self.board.fill_bg(lv.color_hex3(0xFFF), lv.OPA.COVER)
+                        self.stroke.clear()
 
                 def settings_color_slider_event_cb(self, event):
                     code = event.get_code()
@@ -2482,6 +3144,7 @@ class GUI():
 
                         self.settings_pen_show.set_style_bg_color(color, 0)
                         self.line_dsc.color = color
+                        self.stroke.set_pen(self.pen_color, self.line_dsc.width)
 
                 def settings_size_slider_event_cb(self, event):
                     code = event.get_code()
@@ -2490,6 +3153,7 @@ class GUI():
                         size = self.settings_size_slider.get_value()
                         self.settings_pen_show.set_size(size, size)
                         self.line_dsc.width = size
+                        self.stroke.set_pen(self.pen_color, size)
 
                 def settings_conv_x_anim_cb(self, settings_handle, x):
                     self.settings_conv.set_x(x)
@@ -2542,6 +3206,8 @@ class GUI():
                         self.board_previous_point = lv.point_t()
                         indev = lv.indev_get_act()
                         indev.get_point(self.board_previous_point)
+                        self.stroke.flush()
+                        self.stroke.begin(self.board_previous_point.x, self.board_previous_point.y)
 
                         if self.is_settings_opened == True:
                             self.is_settings_opened = False
@@ -2554,10 +3220,11 @@ class GUI():
                         indev = lv.indev_get_act()
                         indev.get_point(self.board_current_point)
 
-                        self.board.draw_line([self.board_previous_point, self.board_current_point], 2, self.line_dsc)
+                        self.stroke.add(self.board_current_point.x, self.board_current_point.y)
 
                         self.board_previous_point = lv.point_t({'x': self.board_current_point.x, 'y': self.board_current_point.y})
                     elif code == lv.EVENT.RELEASED:
+                        self.stroke.end()
                         self.board_previous_point = None
                         self.board_current_point = None
 
@@ -2838,7 +3505,7 @@ class GUI():
 
                 class BuzzerFrequencyCtrl():
                     def __init__(self, slot, buzzer_hw, default_percent=50):
-                        self.lv_font_normal_size30 = lv.font_load("A:" + RESOURCES_PATH + "Fonts/lv_font_normal_size30_bpp4.bin")
+                        self.lv_font_normal_size30 = FONT_MANAGER.get("lv_font_normal_size30_bpp4.bin")
 
                         self.buzzer_hw = buzzer_hw
 
@@ -2978,8 +3645,8 @@ class GUI():
 
             class FullScreenMSG():
                 def __init__(self, screen):
-                    self.lv_font_normal_size25 = lv.font_load("A:" + RESOURCES_PATH + "Fonts/lv_font_normal_size25_bpp4.bin")
-                    self.lv_font_normal_size20 = lv.font_load("A:" + RESOURCES_PATH + "Fonts/lv_font_normal_size20_bpp4.bin")
+                    self.lv_font_normal_size25 = FONT_MANAGER.get("lv_font_normal_size25_bpp4.bin")
+                    self.lv_font_normal_size20 = FONT_MANAGER.get("lv_font_normal_size20_bpp4.bin")
 
                     self.masker = lv.obj(screen)
                     self.masker.set_size(lv.pct(100), lv.pct(100))
@@ -3144,7 +3811,12 @@ class GUI():
                     masker.set_height(height)
 
                 def load_app(self, app_class, icon_area, load_time=200):
-                    self.app = app_class(icon_area, self.masker, self.screen, self.status_bar, self.hw_resources_dict)
+                    FONT_MANAGER.begin_scope()
+                    try:
+                        self.app = app_class(icon_area, self.masker, self.screen, self.status_bar, self.hw_resources_dict)
+                    finally:
+                        font_scope = FONT_MANAGER.end_scope()
+                    self.app.font_scope.extend(font_scope)  # 保持列表对象不变，子控件之后按需获取的字体也记录在其中
 
                     self.masker_x_anim.set_values((icon_area.x1 + icon_area.x2) // 2, 1)
                     self.masker_y_anim.set_values((icon_area.y1 + icon_area.y2) // 2, 1)
@@ -3165,7 +3837,7 @@ class GUI():
                     lv.anim_t.start(self.masker_height_anim)
 
             def __init__(self, screen, status_bar, hw_resources_dict):
-                self.lv_font_normal = lv.font_load("A:" + RESOURCES_PATH + "Fonts/lv_font_normal_size20_bpp4.bin")
+                self.lv_font_normal = FONT_MANAGER.get("lv_font_normal_size20_bpp4.bin")
                 self.app_dict = {
                     "Template": self.AppTemplate,
                     "AI Hub": self.AppAIHub,
@@ -3197,14 +3869,8 @@ class GUI():
                 icon_conv.set_style_bg_opa(0, 0)
                 icon_conv.clear_flag(lv.obj.FLAG.SCROLLABLE)
 
-                with open(icon_path, 'rb') as f:
-                    icon_data = f.read()
-                icon_dsc = lv.img_dsc_t({
-                    'data_size': len(icon_data),
-                    'data': icon_data
-                })
                 icon = lv.img(icon_conv)
-                icon.set_src(icon_dsc)
+                icon.set_src(ICON_ATLAS.img_dsc(icon_path))
                 icon.center()
                 icon.add_flag(lv.obj.FLAG.CLICKABLE)
                 icon.set_user_data(label)
@@ -3250,7 +3916,7 @@ class GUI():
         class StatusBar():
             class ClockTime():
                 def __init__(self, screen, hour, minute):
-                    self.lv_font_normal = lv.font_load("A:" + RESOURCES_PATH + "Fonts/lv_font_normal_size20_bpp4.bin")
+                    self.lv_font_normal = FONT_MANAGER.get("lv_font_normal_size20_bpp4.bin")
 
                     self.clock_time = lv.label(screen)
                     self.clock_time.set_style_text_font(self.lv_font_normal, 0)
@@ -3435,8 +4101,9 @@ class GUI():
             self.dock = self.Dock(self.conv, self.app_manager)
 #            self.wallpaper = self.Wallpaper(self.conv, RESOURCES_PATH + "Wallpapers/home_screen_wallpaper.png")
 
-    def __init__(self, hw_resources_dict):
+    def __init__(self, hw_resources_dict, profiler):
         self.hw_resources_dict = hw_resources_dict
+        self.profiler = profiler
 
         scr = lv.scr_act()
         scr.set_style_bg_color(lv.color_hex(0x000000), 0)
@@ -3451,18 +4118,43 @@ class GUI():
         self.screen.set_style_bg_color(lv.color_hex(0x000000), 0)
         self.screen.clear_flag(lv.obj.FLAG.SCROLLABLE)
 
-        self.home_screen = self.HomeScreen(self.screen, self.hw_resources_dict)
-        self.lock_screen = self.LockScreen(self.screen)
+        self.home_screen = None
+        self.lock_screen = self.profiler.run("lock screen", lambda: self.LockScreen(self.screen))
 
         self.update_time()
 
         self.clock_updater = lv.timer_create(self.clock_updater_cb, 1000, None)
 
+        self.build_step_list = []
+        self.build_timer = None
+
 #        self.lock_screen.hide()
 #        area = lv.area_t()
 #        area.x1, area.y1, area.x2, area.y2 = 1, 1, 101, 101
 #        self.home_screen.app_manager.app_loader.load_app(self.home_screen.app_manager.app_dict.get("Freeform"), area)
 
+    def build_home_screen(self):
+        self.home_screen = self.HomeScreen(self.screen, self.hw_resources_dict)
+        self.lock_screen.conv.move_foreground()
+        self.update_time()
+
+    def add_build_step(self, name, func):
+        self.build_step_list.append((name, func))
+
+    def start_build(self):
+        self.build_timer = lv.timer_create(self.build_timer_cb, 5, None)
+
+    def build_timer_cb(self, timer):
+        if len(self.build_step_list) != 0:
+            name, func = self.build_step_list.pop(0)
+            self.profiler.run(name, func)
+        else:
+            self.build_timer.pause()
+            self.build_timer._del()
+            self.build_timer = None
+            self.profiler.mark("home screen ready")
+            self.profiler.write()
+
     def clock_updater_cb(self, timer):
         self.update_time()
 
@@ -3471,18 +4163,20 @@ class GUI():
         hour = time[4]
         minute = time[5]
         self.lock_screen.clock_time.set_time(hour, minute)
-        self.home_screen.status_bar.clock_time.set_time(hour, minute)
+        if self.home_screen is not None:
+            self.home_screen.status_bar.clock_time.set_time(hour, minute)
 
     def lock(self):
         self.lock_screen.show()
 
 def main():
     os.exitpoint(os.EXITPOINT_ENABLE)
+    profiler = StartupProfiler("/sdcard/startup_profile.log")
     try:
         fpioa = FPIOA()
-        lcd = LCD(640, 480, True, fpioa, 5, 1)
-        touch = Touch()
-        lvgl_init(lcd, touch)
+        lcd = profiler.run("lcd", lambda: LCD(640, 480, True, fpioa, 5, 1))
+        touch = profiler.run("touch", Touch)
+        profiler.run("lvgl init", lambda: lvgl_init(lcd, touch))
         ledr = LED(fpioa, 61, 0, 1)
         ledb = LED(fpioa, 59, 0, 5)
         button0 = Button(fpioa, 34, 0)
@@ -3501,34 +4195,54 @@ def main():
             "ClockManager": clock_manager,
             "ClockManager": clock_manager,
         }
-        gui = GUI(hw_resources_dict)
-
-        gui.home_screen.dock.add_app(RESOURCES_PATH + "APP/icons/app_icon_90x90_settings.png", "Settings", lv.color_hex(0xFFFFFF))
-        gui.home_screen.dock.add_app(RESOURCES_PATH + "APP/icons/app_icon_90x90_clock.png", "Clock", lv.color_hex(0xFFFFFF))
-        gui.home_screen.dock.add_app(RESOURCES_PATH + "APP/icons/app_icon_90x90_calculator.png", "Calculator", lv.color_hex(0xFFFFFF))
-        gui.home_screen.dock.add_app(RESOURCES_PATH + "APP/icons/app_icon_90x90_intelligence.png", "AI Hub", lv.color_hex(0xFFFFFF))
-
-        gui.home_screen.app_conv.add_page()
-        gui.home_screen.app_conv.add_page()
-
-        gui.home_screen.app_conv.add_app(0, RESOURCES_PATH + "APP/icons/app_icon_90x90_photos.png", "Photos", lv.color_hex(0x000000))
-        gui.home_screen.app_conv.add_app(0, RESOURCES_PATH + "APP/icons/app_icon_90x90_freeform.png", "Freeform", lv.color_hex(0x000000))
-        gui.home_screen.app_conv.add_app(0, RESOURCES_PATH + "APP/icons/app_icon_90x90_test_flight.png", "Tester", lv.color_hex(0x000000))
-        gui.home_screen.app_conv.add_app(0, RESOURCES_PATH + "APP/icons/app_icon_90x90_template.png", "Template", lv.color_hex(0x000000))
-        gui.home_screen.app_conv.add_app(1, RESOURCES_PATH + "APP/icons/app_icon_90x90_books.png", "Books", lv.color_hex(0x000000))
-        gui.home_screen.app_conv.add_app(1, RESOURCES_PATH + "APP/icons/app_icon_90x90_files.png", "Files", lv.color_hex(0x000000))
-        gui.home_screen.app_conv.add_app(1, RESOURCES_PATH + "APP/icons/app_icon_90x90_calendar.png", "Calendar", lv.color_hex(0x000000))
-        gui.home_screen.app_conv.add_app(1, RESOURCES_PATH + "APP/icons/app_icon_90x90_health.png", "Health", lv.color_hex(0x000000))
-        gui.home_screen.app_conv.add_app(1, RESOURCES_PATH + "APP/icons/app_icon_90x90_home.png", "Home", lv.color_hex(0xFFFFFF))
-        gui.home_screen.app_conv.add_app(1, RESOURCES_PATH + "APP/icons/app_icon_90x90_music.png", "Music", lv.color_hex(0xFFFFFF))
-        gui.home_screen.app_conv.add_app(1, RESOURCES_PATH + "APP/icons/app_icon_90x90_notes.png", "Notes", lv.color_hex(0xFFFFFF))
-        gui.home_screen.app_conv.add_app(1, RESOURCES_PATH + "APP/icons/app_icon_90x90_weather.png", "Weather", lv.color_hex(0xFFFFFF))
-
+        gui = profiler.run("gui", lambda: GUI(hw_resources_dict, profiler))
+
+        profiler.run("first frame", lv.task_handler)
+        print(f"[boot] first frame: {time.ticks_ms()}ms since power on, {time.ticks_diff(time.ticks_ms(), profiler.start)}ms in main, icon atlas {'on' if USE_ICON_ATLAS else 'off'}")
+
+        dock_app_list = [
+            ("APP/icons/app_icon_90x90_settings.png", "Settings", 0xFFFFFF),
+            ("APP/icons/app_icon_90x90_clock.png", "Clock", 0xFFFFFF),
+            ("APP/icons/app_icon_90x90_calculator.png", "Calculator", 0xFFFFFF),
+            ("APP/icons/app_icon_90x90_intelligence.png", "AI Hub", 0xFFFFFF),
+        ]
+        page_app_list = [
+            (0, "APP/icons/app_icon_90x90_photos.png", "Photos", 0x000000),
+            (0, "APP/icons/app_icon_90x90_freeform.png", "Freeform", 0x000000),
+            (0, "APP/icons/app_icon_90x90_test_flight.png", "Tester", 0x000000),
+            (0, "APP/icons/app_icon_90x90_template.png", "Template", 0x000000),
+            (1, "APP/icons/app_icon_90x90_books.png", "Books", 0x000000),
+            (1, "APP/icons/app_icon_90x90_files.png", "Files", 0x000000),
+            (1, "APP/icons/app_icon_90x90_calendar.png", "Calendar", 0x000000),
+            (1, "APP/icons/app_icon_90x90_health.png", "Health", 0x000000),
+            (1, "APP/icons/app_icon_90x90_home.png", "Home", 0xFFFFFF),
+            (1, "APP/icons/app_icon_90x90_music.png", "Music", 0xFFFFFF),
+            (1, "APP/icons/app_icon_90x90_notes.png", "Notes", 0xFFFFFF),
+            (1, "APP/icons/app_icon_90x90_weather.png", "Weather", 0xFFFFFF),
+        ]
+        if USE_ICON_ATLAS:
+            gui.add_build_step("icon atlas", ICON_ATLAS.load)
+        gui.add_build_step("home screen", gui.build_home_screen)
+        for icon_path, label_text, label_text_color in dock_app_list:
+            gui.add_build_step("dock " + label_text, lambda icon_path=icon_path, label_text=label_text, label_text_color=label_text_color: gui.home_screen.dock.add_app(RESOURCES_PATH + icon_path, label_text, lv.color_hex(label_text_color)))
+        gui.add_build_step("app page 0", lambda: gui.home_screen.app_conv.add_page())
+        gui.add_build_step("app page 1", lambda: gui.home_screen.app_conv.add_page())
+        for app_page_num, icon_path, label_text, label_text_color in page_app_list:
+            gui.add_build_step("app " + label_text, lambda app_page_num=app_page_num, icon_path=icon_path, label_text=label_text, label_text_color=label_text_color: gui.home_screen.app_conv.add_app(app_page_num, RESOURCES_PATH + icon_path, label_text, lv.color_hex(label_text_color)))
+        gui.add_build_step("font report", FONT_MANAGER.report)
+        gui.start_build()
+
+        scheduler = LoopScheduler(lcd)
+        lcd.frame_cb = scheduler.frame_cb
+        button0.enable_event()
         while True:
-            lv.task_handler()
-            gc.collect()
-            if button0.is_pressing():
+            scheduler.run_once()
+            if button0.take_event():
                 gui.lock()
+            if DEMO_LAUNCHER.pending():
+                DEMO_LAUNCHER.run(lcd, button0, button2)
+                button0.take_event()
+                scheduler.reset_stats()
     except BaseException as e:
         import sys
         sys.print_exception(e)
@@ -0,0 +1,149 @@
+#####################################################################################################
+# @file         mpy_loader.py
+# @author       正点原子团队(ALIENTEK)
+# @version      V1.0
+# @date         2026-10-19
+# @brief        字节码缓存加载
+#   @note       tools/build_mpy_cache.py在PC端把脚本预编译为.mpy，放在源文件所在目录的mpy_cache目录下，
+#               manifest.json记录每个源文件的sha256。加载时逐个校验源文件哈希，一致则直接导入字节码，
+#               不一致(源文件被修改过)则删除过期的.mpy，回退为从源码编译，重新运行build_mpy_cache.py后恢复。
+#               bench()用于测量同一脚本从源码编译、执行模块顶层代码以及直接加载字节码各自的耗时，
+#               用法(REPL): import mpy_loader; mpy_loader.bench("/sdcard/CanMV Sample/main.py")
+# @license      Copyright (c) 2020-2032, 广州市星翼电子科技有限公司
+#####################################################################################################
+
+import sys
+import os
+import gc
+import time
+import ujson
+import uhashlib
+import ubinascii
+
+CACHE_DIR = "mpy_cache"
+MANIFEST = "manifest.json"
+
+# 各目录的校验结果，每个目录只校验一次
+_activated = {}
+
+def source_hash(path):
+    h = uhashlib.sha256()
+    buf = bytearray(4096)
+    with open(path, "rb") as f:
+        while True:
+            n = f.readinto(buf)
+            if not n:
+                break
+            h.update(buf[:n] if n < len(buf) else buf)
+    return ubinascii.hexlify(h.digest()).decode()
+
+def _exists(path):
+    try:
+        os.stat(path)
+        return True
+    except OSError:
+        return False
+
+def _read_manifest(src_dir):
+    try:
+        with open(src_dir + "/" + CACHE_DIR + "/" + MANIFEST, "r") as f:
+            return ujson.load(f)
+    except (OSError, ValueError):
+        return None
+
+# 校验src_dir下的字节码缓存，删除过期的.mpy，并把缓存目录放到sys.path最前面
+# 返回{模块名: True/False}，True表示该模块将从字节码加载
+def activate(src_dir):
+    if src_dir in _activated:
+        return _activated[src_dir]
+    start = time.ticks_ms()
+    result = {}
+    manifest = _read_manifest(src_dir)
+    cache_dir = src_dir + "/" + CACHE_DIR
+    if manifest is not None:
+        valid_list = []
+        for entry in manifest["files"]:
+            src = src_dir + "/" + entry["source"]
+            valid_list.append(_exists(cache_dir + "/" + entry["mpy"]) and _exists(src) and source_hash(src) == entry["sha256"])
+        # 包内模块只能从同一个目录导入，包内任一文件过期时整个包都回退为源码
+        stale_packages = set(entry["source"].split("/")[0] for entry, valid in zip(manifest["files"], valid_list) if not valid and "/" in entry["source"])
+        for entry, valid in zip(manifest["files"], valid_list):
+            package = entry["source"].split("/")[0] if "/" in entry["source"] else None
+            valid = valid and package not in stale_packages
+            mpy_path = cache_dir + "/" + entry["mpy"]
+            if not valid and _exists(mpy_path):
+                os.remove(mpy_path)
+            result[entry["module"]] = valid
+        for package in stale_packages:
+            if _exists(cache_dir + "/" + package):
+                os.rmdir(cache_dir + "/" + package)
+        if cache_dir in sys.path:
+            sys.path.remove(cache_dir)
+        sys.path.insert(0, cache_dir)
+    stale = [name for name in result if not result[name]]
+    print("[mpy] {}: {} cached, {} stale, check {}ms".format(src_dir, len(result) - len(stale), len(stale), time.ticks_diff(time.ticks_ms(), start)))
+    if stale:
+        print("[mpy] stale, loading from source:", stale)
+    _activated[src_dir] = result
+    return result
+
+def _module_name(src_path, manifest):
+    name = src_path.rsplit("/", 1)[1]
+    if manifest is not None:
+        for entry in manifest["files"]:
+            if entry["source"] == name:
+                return entry["module"]
+    return name[:-3]
+
+# 加载入口脚本，返回其全局命名空间；字节码有效时导入缓存的模块，否则从源码编译执行
+def load(src_path):
+    src_dir = src_path.rsplit("/", 1)[0]
+    module_name = _module_name(src_path, _read_manifest(src_dir))
+    cached = activate(src_dir).get(module_name, False)
+    start = time.ticks_ms()
+    if cached:
+        namespace = __import__(module_name).__dict__
+    else:
+        namespace = {"__name__": module_name}
+        with open(src_path, "r") as f:
+            exec(f.read(), namespace)
+    print("[mpy] {} from {}: {}ms".format(src_path, "bytecode" if cached else "source", time.ticks_diff(time.ticks_ms(), start)))
+    return namespace
+
+# 加载入口脚本并调用其中的func(默认main)
+def run(src_path, func="main"):
+    namespace = load(src_path)
+    gc.collect()
+    namespace[func]()
+
+# 分别测量源码编译、模块顶层执行和字节码加载的耗时(ms)；模块顶层代码会被执行两次，不要用于有硬件初始化副作用的脚本
+def bench(src_path, repeat=3):
+    src_dir = src_path.rsplit("/", 1)[0]
+    module_name = _module_name(src_path, _read_manifest(src_dir))
+    with open(src_path, "r") as f:
+        source = f.read()
+    compile_ms, exec_ms, mpy_ms = [], [], []
+    for i in range(repeat):
+        gc.collect()
+        t0 = time.ticks_ms()
+        code = compile(source, src_path, "exec")
+        t1 = time.ticks_ms()
+        exec(code, {"__name__": module_name})
+        t2 = time.ticks_ms()
+        compile_ms.append(time.ticks_diff(t1, t0))
+        exec_ms.append(time.ticks_diff(t2, t1))
+        del code
+    if activate(src_dir).get(module_name, False):
+        for i in range(repeat):
+            if module_name in sys.modules:
+                del sys.modules[module_name]
+            gc.collect()
+            t0 = time.ticks_ms()
+            __import__(module_name)
+            mpy_ms.append(time.ticks_diff(time.ticks_ms(), t0))
+    print("[mpy] bench {} ({} bytes)".format(src_path, len(source)))
+    print("[mpy]   source compile: {}ms, init (module top level): {}ms".format(min(compile_ms), min(exec_ms)))
+    if mpy_ms:
+        print("[mpy]   bytecode load + init: {}ms, saved {}ms".format(min(mpy_ms), min(compile_ms) + min(exec_ms) - min(mpy_ms)))
+    else:
+        print("[mpy]   no valid bytecode, run tools/build_mpy_cache.py first")
@@ -0,0 +1,148 @@
+#####################################################################################################
+# @file         bench_gesture.py
+# @author       正点原子团队(ALIENTEK)
+# @version      V1.0
+# @date         2026-10-19
+# @brief        手势分类的一致性检查和耗时对比(PC端运行，需要numpy)
+#   @note       将hub_libs/gesture.py的规则表分类与原例程中逐手指计算角度+elif判断链的实现对比：
+#               1. 角度网格：各手指取阈值附近的角度做全组合，检查数组运算和逐条比较规则两种分类与原判断链完全一致
+#               2. 随机关键点：检查批量计算的手指角度与逐个计算的一致，且数组运算和逐个手掌两种分类结果都一致
+#               3. 不同手掌数下原判断链、逐个手掌分类和数组运算分类每帧的耗时，classify按手掌数选用其中之一
+#               用法: python bench_gesture.py [-n 20000] [--repeat 200]
+# @license      Copyright (c) 2020-2032, 广州市星翼电子科技有限公司
+#####################################################################################################
+
+import argparse
+import itertools
+import math
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "APP", "AI Hub"))
+from hub_libs.gesture import GESTURE_CLASSIFIER, SCALAR_MAX_HANDS, finger_angles, hand_angles
+
+# 原例程的单个向量夹角，零向量和超出acos定义域时与板端一样得到nan
+def legacy_vector_2d_angle(v1, v2):
+    v1_norm = math.sqrt(v1[0] * v1[0] + v1[1] * v1[1])
+    v2_norm = math.sqrt(v2[0] * v2[0] + v2[1] * v2[1])
+    dot_product = v1[0] * v2[0] + v1[1] * v2[1]
+    if v1_norm * v2_norm == 0:
+        return float("nan")
+    cos_angle = dot_product / (v1_norm * v2_norm)
+    return math.acos(cos_angle) * 180 / math.pi if -1 <= cos_angle <= 1 else float("nan")
+
+def legacy_angles(results):
+    angle_list = []
+    for i in range(5):
+        angle = legacy_vector_2d_angle([(results[0]-results[i*8+4]), (results[1]-results[i*8+5])],[(results[i*8+6]-results[i*8+8]),(results[i*8+7]-results[i*8+9])])
+        angle_list.append(angle)
+    return angle_list
+
+# 原例程的elif判断链
+def legacy_gesture(angle_list):
+    thr_angle,thr_angle_thumb,thr_angle_s,gesture_str = 65.,53.,49.,None
+    if 65535. not in angle_list:
+        if (angle_list[0]>thr_angle_thumb)  and (angle_list[1]>thr_angle) and (angle_list[2]>thr_angle) and (angle_list[3]>thr_angle) and (angle_list[4]>thr_angle):
+            gesture_str = "fist"
+        elif (angle_list[0]<thr_angle_s)  and (angle_list[1]<thr_angle_s) and (angle_list[2]<thr_angle_s) and (angle_list[3]<thr_angle_s) and (angle_list[4]<thr_angle_s):
+            gesture_str = "five"
+        elif (angle_list[0]<thr_angle_s)  and (angle_list[1]<thr_angle_s) and (angle_list[2]>thr_angle) and (angle_list[3]>thr_angle) and (angle_list[4]>thr_angle):
+            gesture_str = "gun"
+        elif (angle_list[0]<thr_angle_s)  and (angle_list[1]<thr_angle_s) and (angle_list[2]>thr_angle) and (angle_list[3]>thr_angle) and (angle_list[4]<thr_angle_s):
+            gesture_str = "love"
+        elif (angle_list[0]>5)  and (angle_list[1]<thr_angle_s) and (angle_list[2]>thr_angle) and (angle_list[3]>thr_angle) and (angle_list[4]>thr_angle):
+            gesture_str = "one"
+        elif (angle_list[0]<thr_angle_s)  and (angle_list[1]>thr_angle) and (angle_list[2]>thr_angle) and (angle_list[3]>thr_angle) and (angle_list[4]<thr_angle_s):
+            gesture_str = "six"
+        elif (angle_list[0]>thr_angle_thumb)  and (angle_list[1]<thr_angle_s) and (angle_list[2]<thr_angle_s) and (angle_list[3]<thr_angle_s) and (angle_list[4]>thr_angle):
+            gesture_str = "three"
+        elif (angle_list[0]<thr_angle_s)  and (angle_list[1]>thr_angle) and (angle_list[2]>thr_angle) and (angle_list[3]>thr_angle) and (angle_list[4]>thr_angle):
+            gesture_str = "thumbUp"
+        elif (angle_list[0]>thr_angle_thumb)  and (angle_list[1]<thr_angle_s) and (angle_list[2]<thr_angle_s) and (angle_list[3]>thr_angle) and (angle_list[4]>thr_angle):
+            gesture_str = "yeah"
+    return gesture_str
+
+def check_angle_grid():
+    values = [0., 4.9, 5., 5.1, 30., 48.9, 49., 49.1, 52.9, 53., 53.1, 64.9, 65., 65.1, 120., float("nan")]
+    grid = list(itertools.product(values, repeat=5))
+    got = GESTURE_CLASSIFIER.classify_angles(np.array(grid))
+    legacy = [legacy_gesture(list(angles)) for angles in grid]
+    mismatch = sum(1 for g, l in zip(got, legacy) if g != l)
+    scalar_mismatch = sum(1 for angles, l in zip(grid, legacy) if GESTURE_CLASSIFIER.classify_one(angles) != l)
+    counts = {}
+    for g in got:
+        counts[g] = counts.get(g, 0) + 1
+    print("angle grid: {} cases, {} mismatches (array), {} mismatches (per hand), gestures {}".format(len(grid), mismatch, scalar_mismatch, counts))
+    return mismatch == 0 and scalar_mismatch == 0
+
+# 随机生成手掌关键点：以手腕为原点，各手指随机伸直或弯曲，再加上噪声
+def random_hands(n):
+    hands = np.zeros((n, 42), dtype=np.int16)
+    for k in range(n):
+        cx, cy = random.randint(200, 1000), random.randint(200, 700)
+        kp = [cx, cy]
+        for f in range(5):
+            base = math.radians(-150 + f * 30 + random.uniform(-10, 10))
+            bend = math.radians(random.choice([0, 20, 45, 60, 90, 150]) + random.uniform(-15, 15))
+            for j in range(1, 5):
+                r = 40 * j
+                a = base + (bend if j > 2 else 0)
+                kp += [cx + r * math.cos(a) + random.uniform(-3, 3), cy + r * math.sin(a) + random.uniform(-3, 3)]
+        hands[k] = np.array(kp)
+    return hands
+
+def check_random_hands(n):
+    hands = random_hands(n)
+    angles = finger_angles(hands)
+    legacy = np.array([legacy_angles([int(v) for v in hands[k]]) for k in range(n)])
+    angle_err = np.nanmax(np.abs(angles - legacy))
+    got = GESTURE_CLASSIFIER.classify(hands)
+    mismatch = sum(1 for k in range(n) if legacy_gesture(list(legacy[k])) != got[k])
+    # 单个手掌走逐个手掌的分类
+    single = [GESTURE_CLASSIFIER.classify(hands[k])[0] for k in range(n)]
+    scalar_mismatch = sum(1 for k in range(n) if legacy_gesture(list(legacy[k])) != single[k])
+    print("random hands: {} hands, max angle diff {:.2e} deg, {} mismatches (array), {} mismatches (per hand)".format(
+        n, angle_err, mismatch, scalar_mismatch))
+    return mismatch == 0 and scalar_mismatch == 0
+
+def bench(repeat):
+    for n in (1, 2, 4, 8):
+        hands = random_hands(n)
+        rows = [[int(v) for v in hands[k]] for k in range(n)]
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            [legacy_gesture(legacy_angles(row)) for row in rows]
+        t1 = time.perf_counter()
+        for _ in range(repeat):
+            GESTURE_CLASSIFIER.classify(hands)
+        t2 = time.perf_counter()
+        for _ in range(repeat):
+            [GESTURE_CLASSIFIER.classify_one(hand_angles(row)) for row in rows]
+        t3 = time.perf_counter()
+        for _ in range(repeat):
+            GESTURE_CLASSIFIER.classify_angles(finger_angles(hands))
+        t4 = time.perf_counter()
+        print("{} hands: elif chain {:.1f}us/frame, classify {:.1f}us/frame ({}), per hand {:.1f}us/frame, array {:.1f}us/frame".format(
+            n, (t1 - t0) / repeat * 1e6, (t2 - t1) / repeat * 1e6, "per hand" if n <= SCALAR_MAX_HANDS else "array",
+            (t3 - t2) / repeat * 1e6, (t4 - t3) / repeat * 1e6))
+
+def main():
+    parser = argparse.ArgumentParser(description="check the table-driven gesture classifier against the legacy elif chain and time both")
+    parser.add_argument("-n", type=int, default=20000, help="number of random hands for the equivalence check")
+    parser.add_argument("--repeat", type=int, default=200, help="iterations per timing run")
+    args = parser.parse_args()
+
+    random.seed(0)
+    np.seterr(invalid="ignore", divide="ignore") # 余弦值超出[-1, 1]或零向量时与板端一样得到nan
+    ok = check_angle_grid()
+    ok = check_random_hands(args.n) and ok
+    bench(args.repeat)
+    if not ok:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+#####################################################################################################
+# @file         build_icon_atlas.py
+# @author       正点原子团队(ALIENTEK)
+# @version      V1.0
+# @date         2026-10-19
+# @brief        图标图集生成工具(PC端运行)
+#   @note       将APP/icons、APP/AI Hub、APP/Settings目录下的图标PNG预先解码为LVGL原生的ARGB8888格式(内存顺序B,G,R,A)，
+#               打包成一个带偏移索引的图集文件，开机时一次读入，各图标直接引用图集中的像素数据，无需再逐个读取和解码PNG。
+#               只打包文件名中带"icon"的图片，AI Hub的例程效果图较大且按需显示，仍使用单独的PNG文件。
+#               文件格式(小端)：
+#                   文件头   magic "ICAT", u16 版本, u16 图标数, u32 像素数据起始偏移
+#                   索引项   u16 名称长度, 名称(相对"CanMV Sample/"的路径, utf-8), u16 宽, u16 高, u32 数据偏移, u32 数据长度
+#                   像素数据 每个图标连续存放，按16字节对齐
+#               用法: python build_icon_atlas.py [-o ../APP/icon_atlas.bin]
+# @license      Copyright (c) 2020-2032, 广州市星翼电子科技有限公司
+#####################################################################################################
+
+import argparse
+import os
+import struct
+import zlib
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+ICON_DIRS = ["APP/icons", "APP/AI Hub", "APP/Settings"]
+MAGIC = b"ICAT"
+VERSION = 1
+ALIGN = 16
+
+def paeth(a, b, c):
+    p = a + b - c
+    pa, pb, pc = abs(p - a), abs(p - b), abs(p - c)
+    if pa <= pb and pa <= pc:
+        return a
+    return b if pb <= pc else c
+
+# 解码8位RGB/RGBA、非隔行扫描的PNG，返回(宽, 高, RGBA字节)
+def decode_png(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    if data[:8] != b"\x89PNG\r\n\x1a\n":
+        raise ValueError("not a png file: " + path)
+    pos = 8
+    idat = b""
+    while pos < len(data):
+        length, kind = struct.unpack(">I4s", data[pos:pos + 8])
+        body = data[pos + 8:pos + 8 + length]
+        if kind == b"IHDR":
+            width, height, depth, color_type, _, _, interlace = struct.unpack(">IIBBBBB", body)
+        elif kind == b"IDAT":
+            idat += body
+        elif kind == b"IEND":
+            break
+        pos += 12 + length
+    if depth != 8 or color_type not in (2, 6) or interlace != 0:
+        raise ValueError("unsupported png format: " + path)
+    channels = 4 if color_type == 6 else 3
+    stride = width * channels
+    raw = zlib.decompress(idat)
+    prev = bytearray(stride)
+    out = bytearray()
+    for y in range(height):
+        filter_type = raw[y * (stride + 1)]
+        line = bytearray(raw[y * (stride + 1) + 1:(y + 1) * (stride + 1)])
+        for x in range(stride):
+            a = line[x - channels] if x >= channels else 0
+            b = prev[x]
+            c = prev[x - channels] if x >= channels else 0
+            if filter_type == 1:
+                line[x] = (line[x] + a) & 0xFF
+            elif filter_type == 2:
+                line[x] = (line[x] + b) & 0xFF
+            elif filter_type == 3:
+                line[x] = (line[x] + ((a + b) >> 1)) & 0xFF
+            elif filter_type == 4:
+                line[x] = (line[x] + paeth(a, b, c)) & 0xFF
+        if channels == 4:
+            out += line
+        else:
+            for x in range(width):
+                out += line[x * 3:x * 3 + 3] + b"\xff"
+        prev = line
+    return width, height, bytes(out)
+
+# RGBA转为LVGL的ARGB8888(内存顺序B,G,R,A)
+def rgba_to_native(rgba):
+    native = bytearray(rgba)
+    native[0::4] = rgba[2::4]
+    native[2::4] = rgba[0::4]
+    return bytes(native)
+
+def collect_icons():
+    icons = []
+    for icon_dir in ICON_DIRS:
+        for name in sorted(os.listdir(os.path.join(ROOT_DIR, icon_dir))):
+            if name.endswith(".png") and "icon" in name:
+                icons.append(icon_dir + "/" + name)
+    return icons
+
+def build(icons):
+    entries = []
+    blob = bytearray()
+    for rel_path in icons:
+        width, height, rgba = decode_png(os.path.join(ROOT_DIR, rel_path))
+        pixels = rgba_to_native(rgba)
+        entries.append((rel_path.encode("utf-8"), width, height, len(blob), len(pixels)))
+        blob += pixels
+        blob += bytes(-len(blob) % ALIGN)
+    index = bytearray()
+    for name, width, height, offset, size in entries:
+        index += struct.pack("<H", len(name)) + name + struct.pack("<HHII", width, height, offset, size)
+    data_offset = 12 + len(index)
+    data_offset += -data_offset % ALIGN
+    header = struct.pack("<4sHHI", MAGIC, VERSION, len(entries), data_offset)
+    return header + index + bytes(data_offset - 12 - len(index)) + blob, entries
+
+def main():
+    parser = argparse.ArgumentParser(description="pack launcher icons into a pre-decoded ARGB8888 atlas")
+    parser.add_argument("-o", "--output", default=os.path.join(ROOT_DIR, "APP", "icon_atlas.bin"), help="atlas file to write")
+    args = parser.parse_args()
+
+    icons = collect_icons()
+    atlas, entries = build(icons)
+    with open(args.output, "wb") as f:
+        f.write(atlas)
+    png_bytes = sum(os.path.getsize(os.path.join(ROOT_DIR, p)) for p in icons)
+    for name, width, height, offset, size in entries:
+        print("{:>8} {:>4}x{:<4} {}".format(offset, width, height, name.decode("utf-8")))
+    print("{} icons, {} png bytes -> {} atlas bytes: {}".format(len(entries), png_bytes, len(atlas), os.path.normpath(args.output)))
+
+if __name__ == "__main__":
+    main()
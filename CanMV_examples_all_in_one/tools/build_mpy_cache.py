@@ -0,0 +1,101 @@
+#####################################################################################################
+# @file         build_mpy_cache.py
+# @author       正点原子团队(ALIENTEK)
+# @version      V1.0
+# @date         2026-10-19
+# @brief        字节码缓存生成工具(PC端运行)
+#   @note       用mpy-cross把桌面程序main.py、AI Hub例程及hub_libs、main_project/pH_detect_main.py预编译为.mpy，
+#               输出到各自源文件目录下的mpy_cache目录，并生成manifest.json记录每个源文件的sha256，
+#               开机时由mpy_loader.py校验哈希，一致才加载字节码。源文件哈希未变化且.mpy已存在时跳过编译。
+#               mpy-cross的版本(.mpy格式版本)必须与固件的MicroPython版本一致，否则固件会拒绝导入字节码。
+#               生成后将mpy_cache目录随源文件一起拷贝到SD卡，桌面程序改由boot_main.py作为/sdcard/main.py启动。
+#               用法: python build_mpy_cache.py [--mpy-cross mpy-cross] [--check]
+# @license      Copyright (c) 2020-2032, 广州市星翼电子科技有限公司
+#####################################################################################################
+
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+CACHE_DIR = "mpy_cache"
+MANIFEST = "manifest.json"
+VERSION = 1
+
+# 每组为(源文件目录, [(源文件相对路径, 模块名)])
+# 入口脚本使用单独的模块名，避免与固件启动时的main模块冲突
+def collect_groups():
+    hub_dir = os.path.join(ROOT_DIR, "APP", "AI Hub")
+    hub_files = [(name, name[:-3]) for name in sorted(os.listdir(hub_dir)) if name.endswith(".py")]
+    hub_files += [("hub_libs/" + name, "hub_libs." + name[:-3]) for name in sorted(os.listdir(os.path.join(hub_dir, "hub_libs"))) if name.endswith(".py")]
+    return [
+        (ROOT_DIR, [("main.py", "canmv_launcher")]),
+        (hub_dir, hub_files),
+        (os.path.join(ROOT_DIR, "..", "main_project"), [("pH_detect_main.py", "pH_detect_main")]),
+    ]
+
+def source_hash(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def read_manifest(cache_dir):
+    try:
+        with open(os.path.join(cache_dir, MANIFEST), "r") as f:
+            return {entry["source"]: entry for entry in json.load(f)["files"]}
+    except (OSError, ValueError, KeyError):
+        return {}
+
+# 编译一组脚本，返回(编译数, 跳过数, 过期数)；check为True时只检查不编译
+def build_group(src_dir, files, mpy_cross, check):
+    cache_dir = os.path.join(src_dir, CACHE_DIR)
+    old = read_manifest(cache_dir)
+    entries = []
+    built = skipped = stale = 0
+    for source, module in files:
+        src_path = os.path.join(src_dir, source)
+        mpy = module.replace(".", "/") + ".mpy"
+        mpy_path = os.path.join(cache_dir, mpy)
+        digest = source_hash(src_path)
+        entry = {"source": source, "module": module, "mpy": mpy, "sha256": digest}
+        prev = old.get(source)
+        if prev is not None and prev["sha256"] == digest and prev["mpy"] == mpy and os.path.exists(mpy_path):
+            skipped += 1
+            entries.append(entry)
+            continue
+        if check:
+            stale += 1
+            print("  stale   {}".format(source))
+            continue
+        os.makedirs(os.path.dirname(mpy_path), exist_ok=True)
+        # -s指定错误信息中的文件名，与设备上的源文件名一致
+        subprocess.run([mpy_cross, "-s", source, "-o", mpy_path, src_path], check=True)
+        built += 1
+        entries.append(entry)
+        print("  compile {} -> {}/{} ({} -> {} bytes)".format(source, CACHE_DIR, mpy, os.path.getsize(src_path), os.path.getsize(mpy_path)))
+    if not check:
+        with open(os.path.join(cache_dir, MANIFEST), "w") as f:
+            json.dump({"version": VERSION, "files": entries}, f, indent=1)
+    return built, skipped, stale
+
+def main():
+    parser = argparse.ArgumentParser(description="precompile the launcher, AI Hub apps and pH_detect_main.py into a hash-keyed .mpy cache")
+    parser.add_argument("--mpy-cross", default="mpy-cross", help="mpy-cross executable matching the firmware MicroPython version")
+    parser.add_argument("--check", action="store_true", help="only report stale entries, exit with 1 if any")
+    args = parser.parse_args()
+
+    total_built = total_skipped = total_stale = 0
+    for src_dir, files in collect_groups():
+        print(os.path.normpath(src_dir))
+        built, skipped, stale = build_group(src_dir, files, args.mpy_cross, args.check)
+        total_built += built
+        total_skipped += skipped
+        total_stale += stale
+    print("{} compiled, {} up to date, {} stale".format(total_built, total_skipped, total_stale))
+    if args.check and total_stale:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
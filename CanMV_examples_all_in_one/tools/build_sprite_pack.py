@@ -0,0 +1,105 @@
+#####################################################################################################
+# @file         build_sprite_pack.py
+# @author       正点原子团队(ALIENTEK)
+# @version      V1.0
+# @date         2026-10-19
+# @brief        AI Hub贴图资源包生成工具(PC端运行)
+#   @note       把板端/sdcard/examples/utils目录下的ARGB贴图bin文件(动态手势的shang/xia/zuo/you，猜拳的five/fist/shear)
+#               打包为hub_libs/sprite_pack.py读取的资源包，文件格式见sprite_pack.py。
+#               透明像素较多的贴图使用透明像素游程编码，编码后小于原始大小的75%时才采用，否则按原始ARGB存放(运行时不复制)。
+#               生成后将资源包拷贝到SD卡的"CanMV Sample/APP/AI Hub/"目录
+#               用法: python build_sprite_pack.py utils_dir [-o ../APP/AI\ Hub/sprites.pak] [--no-rle]
+# @license      Copyright (c) 2020-2032, 广州市星翼电子科技有限公司
+#####################################################################################################
+
+import argparse
+import os
+import struct
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+MAGIC = b"SPAK"
+VERSION = 1
+ALIGN = 16
+ENCODING_RAW = 0
+ENCODING_RLE = 1
+# 透明像素少于该数量的间隔并入前后的非透明段，减少段数
+MIN_GAP = 16
+RLE_MAX_RATIO = 0.75
+
+# (名称, bin文件名, 宽, 高)
+SPRITES = [
+    ("shang", "shang.bin", 150, 216),
+    ("xia", "xia.bin", 150, 216),
+    ("zuo", "zuo.bin", 216, 150),
+    ("you", "you.bin", 216, 150),
+    ("five", "five.bin", 400, 400),
+    ("fist", "fist.bin", 400, 400),
+    ("shear", "shear.bin", 400, 400),
+]
+
+# 透明像素游程编码：记录alpha不为0的像素段，段外像素解码时为0
+def encode_rle(pixels):
+    count = len(pixels) // 4
+    spans = []
+    i = 0
+    while i < count:
+        if pixels[i * 4] == 0:
+            i += 1
+            continue
+        start = i
+        while i < count and pixels[i * 4] != 0:
+            i += 1
+        if spans and start - (spans[-1][0] + spans[-1][1]) < MIN_GAP:
+            spans[-1][1] = i - spans[-1][0]
+        else:
+            spans.append([start, i - start])
+    out = bytearray(struct.pack("<I", len(spans)))
+    for start, length in spans:
+        out += struct.pack("<II", start, length)
+    for start, length in spans:
+        out += pixels[start * 4:(start + length) * 4]
+    return bytes(out), len(spans)
+
+def build(utils_dir, use_rle):
+    entries = []
+    blob = bytearray()
+    for name, file_name, width, height in SPRITES:
+        with open(os.path.join(utils_dir, file_name), "rb") as f:
+            pixels = f.read()
+        if len(pixels) != width * height * 4:
+            raise ValueError("{}: expected {} bytes, got {}".format(file_name, width * height * 4, len(pixels)))
+        encoding, data, spans = ENCODING_RAW, pixels, 0
+        if use_rle:
+            rle, spans = encode_rle(pixels)
+            if len(rle) < len(pixels) * RLE_MAX_RATIO:
+                encoding, data = ENCODING_RLE, rle
+        entries.append((name.encode("utf-8"), width, height, encoding, len(blob), len(data), len(pixels), spans))
+        blob += data
+        blob += bytes(-len(blob) % ALIGN)
+    index = bytearray()
+    for name, width, height, encoding, offset, size, _, _ in entries:
+        index += struct.pack("<H", len(name)) + name + struct.pack("<HHBBII", width, height, encoding, 0, offset, size)
+    data_offset = 12 + len(index)
+    data_offset += -data_offset % ALIGN
+    header = struct.pack("<4sHHI", MAGIC, VERSION, len(entries), data_offset)
+    return header + index + bytes(data_offset - 12 - len(index)) + blob, entries
+
+def main():
+    parser = argparse.ArgumentParser(description="pack AI Hub ARGB sprites into one indexed, aligned asset pack")
+    parser.add_argument("utils_dir", help="folder with the sprite .bin files copied from /sdcard/examples/utils")
+    parser.add_argument("-o", "--output", default=os.path.join(ROOT_DIR, "APP", "AI Hub", "sprites.pak"), help="pack file to write")
+    parser.add_argument("--no-rle", action="store_true", help="store every sprite as raw ARGB")
+    args = parser.parse_args()
+
+    pack, entries = build(args.utils_dir, not args.no_rle)
+    with open(args.output, "wb") as f:
+        f.write(pack)
+    raw_bytes = 0
+    for name, width, height, encoding, offset, size, raw_size, spans in entries:
+        raw_bytes += raw_size
+        print("{:>8} {:>4}x{:<4} {:<6} {:>7} -> {:>7} bytes {}".format(offset, width, height, name.decode("utf-8"), raw_size, size,
+                                                                "rle {} spans".format(spans) if encoding == ENCODING_RLE else "raw"))
+    print("{} sprites, {} bin bytes -> {} pack bytes: {}".format(len(entries), raw_bytes, len(pack), os.path.normpath(args.output)))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+#####################################################################################################
+# @file         make_photo_folder.py
+# @author       正点原子团队(ALIENTEK)
+# @version      V1.0
+# @date         2026-10-19
+# @brief        生成相册测试用的大量照片目录(PC端运行)
+#   @note       循环复制Photos目录下自带的照片，生成指定数量的照片文件，
+#               拷贝到SD卡的"CanMV Sample/Photos/"后打开相册APP滑动浏览，串口会输出滑动显示耗时和缓存命中率
+#               用法: python make_photo_folder.py out_dir [-n 200]
+# @license      Copyright (c) 2020-2032, 广州市星翼电子科技有限公司
+#####################################################################################################
+
+import argparse
+import os
+import shutil
+
+PHOTOS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Photos")
+
+def main():
+    parser = argparse.ArgumentParser(description="build a synthetic photo folder for the Photos app swipe benchmark")
+    parser.add_argument("out_dir", help="output folder")
+    parser.add_argument("-n", type=int, default=200, help="number of photos to generate")
+    args = parser.parse_args()
+
+    sources = sorted(f for f in os.listdir(PHOTOS_DIR) if f.endswith(".png"))
+    os.makedirs(args.out_dir, exist_ok=True)
+    total = 0
+    for i in range(args.n):
+        src = os.path.join(PHOTOS_DIR, sources[i % len(sources)])
+        dst = os.path.join(args.out_dir, "{:04d}_{}".format(i, sources[i % len(sources)]))
+        shutil.copyfile(src, dst)
+        total += os.path.getsize(dst)
+    print("{} photos, {} bytes -> {}".format(args.n, total, args.out_dir))
+
+if __name__ == "__main__":
+    main()
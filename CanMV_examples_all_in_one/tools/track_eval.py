@@ -0,0 +1,70 @@
+#####################################################################################################
+# @file         track_eval.py
+# @author       正点原子团队(ALIENTEK)
+# @version      V1.0
+# @date         2026-10-19
+# @brief        间隔检测+跟踪的精度评估工具(PC端运行)
+#   @note       输入为TrackedDetector录制模式(record_path)在板端生成的逐帧检测结果文件，
+#               以每帧检测的结果为基准，模拟每N帧检测一次、其余帧用跟踪结果代替，输出不同N下的精度
+#               用法: python track_eval.py record.jsonl [-n 1 2 3 4 6 8] [--iou 0.5]
+# @license      Copyright (c) 2020-2032, 广州市星翼电子科技有限公司
+#####################################################################################################
+
+import argparse
+import json
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "APP", "AI Hub"))
+from hub_libs.tracker import Tracker, greedy_match, iou
+
+def load_record(path):
+    frames = []
+    with open(path, "r") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                frames.append(json.loads(line)["boxes"])
+    return frames
+
+# 模拟每n帧检测一次，返回(平均IoU, 召回率, 精确率, 轨迹数)
+def evaluate(frames, n, iou_threshold):
+    tracker = Tracker()
+    iou_sum, matched, tp, gt_total, out_total = 0.0, 0, 0, 0, 0
+    for k in range(len(frames)):
+        gt = frames[k]
+        if k % n == 0:
+            tracker.update(gt)
+        else:
+            tracker.predict()
+        out = tracker.results()
+        matches, _, _ = greedy_match(out, gt, 1e-6)
+        for i, j in matches:
+            v = iou(out[i], gt[j])
+            iou_sum += v
+            matched += 1
+            if v >= iou_threshold:
+                tp += 1
+        gt_total += len(gt)
+        out_total += len(out)
+    mean_iou = iou_sum / matched if matched else 0.0
+    recall = tp / gt_total if gt_total else 1.0
+    precision = tp / out_total if out_total else 1.0
+    return mean_iou, recall, precision, tracker.next_id - 1
+
+def main():
+    parser = argparse.ArgumentParser(description="accuracy of detect-every-N tracking on a recorded sequence")
+    parser.add_argument("record", help="jsonl file written by TrackedDetector(record_path=...)")
+    parser.add_argument("-n", type=int, nargs="+", default=[1, 2, 3, 4, 6, 8], help="detection intervals to evaluate")
+    parser.add_argument("--iou", type=float, default=0.5, help="IoU threshold for a correct box")
+    args = parser.parse_args()
+
+    frames = load_record(args.record)
+    print("{} frames, {} boxes".format(len(frames), sum(len(b) for b in frames)))
+    print("{:>4} {:>8} {:>9} {:>8} {:>10} {:>7}".format("N", "KPU duty", "mean IoU", "recall", "precision", "tracks"))
+    for n in args.n:
+        mean_iou, recall, precision, tracks = evaluate(frames, n, args.iou)
+        print("{:>4} {:>7.1f}% {:>9.3f} {:>8.3f} {:>10.3f} {:>7}".format(n, 100.0 / n, mean_iou, recall, precision, tracks))
+
+if __name__ == "__main__":
+    main()
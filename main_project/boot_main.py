@@ -0,0 +1,12 @@
+import os, sys
+
+# pH检测程序启动脚本，复制为/sdcard/main.py后开机运行
+# 经mpy_loader加载pH_detect_main.py：mpy_cache中的字节码与源文件哈希一致时直接加载字节码，否则回退为从源码编译
+# 需将pH_detect_main.py及其mpy_cache目录拷贝到APP_DIR，mpy_loader.py随"CanMV Sample"目录一起拷贝
+APP_DIR = "/sdcard/main_project"
+
+sys.path.append("/sdcard/CanMV Sample")
+import mpy_loader
+
+os.exitpoint(os.EXITPOINT_ENABLE)
+mpy_loader.run(APP_DIR + "/pH_detect_main.py")